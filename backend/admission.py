@@ -0,0 +1,226 @@
+# backend/admission.py
+"""
+Admission control for the expensive endpoints.
+
+Each endpoint class ("predict", "chat") has a Limiter: at most
+`max_concurrency` requests run, up to `max_queue` more wait in a priority
+queue for at most `queue_timeout` seconds. A full queue or an expired wait
+is answered at once with 503 + Retry-After, before any CPU or Gemini time
+is spent, so the work that is admitted still finishes within its deadline
+instead of everything timing out together.
+
+Cheap requests never take a slot: health / readiness / stats endpoints and
+cache hits (prediction cache, answer cache) are answered directly. Among
+the queued requests, cheaper ones (lower priority value) are admitted first.
+
+An optional per-client token bucket (RateLimiter) answers 429 + Retry-After
+to a client sending more than RATE_LIMIT_PER_SECOND requests on average.
+
+All state lives on the event loop thread: no locks.
+
+Config (env):
+  ADMISSION_ENABLED            "1" (default) / "0" – no concurrency limits at all
+  ADMIT_PREDICT_CONCURRENCY    /predict-cnn requests running at once (default: 64)
+  ADMIT_PREDICT_QUEUE          /predict-cnn requests allowed to wait (default: 128)
+  ADMIT_CHAT_CONCURRENCY       /chat, /chat/stream, /diagnose running at once (default: 16)
+  ADMIT_CHAT_QUEUE             chat requests allowed to wait (default: 32)
+  ADMIT_QUEUE_TIMEOUT_SECONDS  max wait for a slot before 503 (default: 5)
+  RATE_LIMIT_PER_SECOND        per-client token refill rate, 0 = off (default: 0)
+  RATE_LIMIT_BURST             per-client bucket size (default: 20)
+  RATE_LIMIT_TRUST_FORWARDED   "1" to identify clients by X-Forwarded-For (behind a proxy)
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Callable, Dict
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "1") == "1"
+ADMIT_PREDICT_CONCURRENCY = int(os.getenv("ADMIT_PREDICT_CONCURRENCY", "64"))
+ADMIT_PREDICT_QUEUE = int(os.getenv("ADMIT_PREDICT_QUEUE", "128"))
+ADMIT_CHAT_CONCURRENCY = int(os.getenv("ADMIT_CHAT_CONCURRENCY", "16"))
+ADMIT_CHAT_QUEUE = int(os.getenv("ADMIT_CHAT_QUEUE", "32"))
+ADMIT_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMIT_QUEUE_TIMEOUT_SECONDS", "5"))
+RATE_LIMIT_PER_SECOND = float(os.getenv("RATE_LIMIT_PER_SECOND", "0"))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "20"))
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "0") == "1"
+
+# Queue priorities: lower is admitted first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+
+MAX_RETRY_AFTER = 30
+
+
+class AdmissionRejected(Exception):
+    """Request turned away before doing any work: 503 (overloaded) or 429 (client over its rate)."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+def _noop():
+    pass
+
+
+class Limiter:
+    """Concurrency limit + bounded priority wait queue for one endpoint class."""
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_concurrency = max_concurrency   # <= 0: unlimited
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._queued = 0
+        self._waiters = []   # heap of (priority, seq, future); done futures are skipped
+        self._seq = itertools.count()
+        self._service_s = 0.0   # EWMA of slot hold time, for Retry-After
+        self._counters = {"admitted": 0, "waited": 0, "rejected_full": 0, "rejected_timeout": 0}
+
+    async def acquire(self, priority: int = PRIORITY_NORMAL) -> Callable[[], None]:
+        """Wait for a slot → release callable (safe to call more than once). Raises AdmissionRejected."""
+        if self.max_concurrency <= 0:
+            return _noop
+        if self.active < self.max_concurrency and self._queued == 0:
+            self.active += 1
+            self._counters["admitted"] += 1
+            return self._releaser()
+        if self._queued >= self.max_queue:
+            self._counters["rejected_full"] += 1
+            raise AdmissionRejected(503, f"{self.name} is overloaded, try again later", self.retry_after())
+
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), fut))
+        self._queued += 1
+        self._counters["waited"] += 1
+        try:
+            await asyncio.wait_for(fut, self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if fut.done() and not fut.cancelled():
+                self._release()   # the slot was handed over just as we gave up: pass it on
+            else:
+                fut.cancel()
+                self._queued -= 1
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self._counters["rejected_timeout"] += 1
+            raise AdmissionRejected(503, f"{self.name} is overloaded, try again later", self.retry_after())
+        self._counters["admitted"] += 1
+        return self._releaser()
+
+    def retry_after(self) -> int:
+        """Seconds until the current queue has likely drained (at least 1)."""
+        if self.max_concurrency <= 0:
+            return 1
+        drain = self._service_s * (self._queued + 1) / self.max_concurrency
+        return int(min(MAX_RETRY_AFTER, max(1, math.ceil(drain))))
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queued": self._queued,
+            "avg_service_ms": self._service_s * 1000.0,
+            **self._counters,
+        }
+
+    def _releaser(self) -> Callable[[], None]:
+        started = time.perf_counter()
+        released = False
+
+        def release():
+            nonlocal released
+            if released:
+                return
+            released = True
+            held = time.perf_counter() - started
+            self._service_s = held if self._service_s == 0.0 else 0.9 * self._service_s + 0.1 * held
+            self._release()
+
+        return release
+
+    def _release(self):
+        self.active -= 1
+        while self._waiters:
+            _, _, fut = heapq.heappop(self._waiters)
+            if not fut.done():
+                self._queued -= 1
+                self.active += 1
+                fut.set_result(None)
+                return
+
+
+class RateLimiter:
+    """Per-client token buckets; the least recently seen clients are forgotten past max_clients."""
+
+    def __init__(self, rate: float, burst: float, max_clients: int = 10000):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()   # client → (tokens, last refill time)
+        self.rejected = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def check(self, client: str, cost: float = 1.0):
+        """Take `cost` tokens from the client's bucket or raise AdmissionRejected(429)."""
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        tokens, last = self._buckets.pop(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - last) * self.rate)
+        allowed = tokens >= cost
+        self._buckets[client] = (tokens - cost if allowed else tokens, now)
+        while len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        if not allowed:
+            self.rejected += 1
+            retry_after = int(min(MAX_RETRY_AFTER, max(1, math.ceil((cost - tokens) / self.rate))))
+            raise AdmissionRejected(429, "Too many requests from this client", retry_after)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+            "clients": len(self._buckets),
+            "rejected": self.rejected,
+        }
+
+
+def client_id(request) -> str:
+    """Client address of a Starlette request (first X-Forwarded-For hop when trusted)."""
+    if RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def _limit(value: int) -> int:
+    return value if ADMISSION_ENABLED else 0
+
+
+limiters: Dict[str, Limiter] = {
+    "predict": Limiter("predict", _limit(ADMIT_PREDICT_CONCURRENCY), ADMIT_PREDICT_QUEUE, ADMIT_QUEUE_TIMEOUT_SECONDS),
+    "chat": Limiter("chat", _limit(ADMIT_CHAT_CONCURRENCY), ADMIT_CHAT_QUEUE, ADMIT_QUEUE_TIMEOUT_SECONDS),
+}
+rate_limiter = RateLimiter(RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST)
+
+
+def stats() -> dict:
+    return {
+        "enabled": ADMISSION_ENABLED,
+        "limiters": {name: limiter.stats() for name, limiter in limiters.items()},
+        "rate_limit": rate_limiter.stats(),
+    }
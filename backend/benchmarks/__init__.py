@@ -0,0 +1,10 @@
+"""
+Benchmarks for the AgriAssist backend.
+
+Run from the backend/ directory, e.g.:
+    python -m benchmarks.bench_preprocess
+    python -m benchmarks.run_suite --output results/suite.json
+
+run_suite needs no real weights or API key: it uses a generated stand-in
+CNN (make_standin_model) and LLM_BACKEND=fake (fake_gemini).
+"""
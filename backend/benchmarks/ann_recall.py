@@ -0,0 +1,124 @@
+"""
+Recall vs latency for the ANN index types, measured against the flat index.
+
+By default uses synthetic clustered 384-d vectors (the MiniLM embedding size),
+so it runs without the corpus or the embedding model:
+
+    python -m benchmarks.ann_recall --vectors 100000 --queries 500
+    python -m benchmarks.ann_recall --vectors 1000000 --nprobe 8 16 32 64 --ef-search 32 64 128
+
+Reports, per index / search setting: recall@k against exact search, mean
+and p99 single-query latency, build (train + add) time and index size.
+"""
+
+import argparse
+import json
+import time
+
+import faiss
+import numpy as np
+
+from vector_index import IndexConfig, configure_search, create_index
+
+
+def synthetic_vectors(n: int, dim: int, clusters: int, seed: int = 0) -> np.ndarray:
+    """Clustered unit vectors, closer to real sentence embeddings than uniform noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    assignment = rng.integers(0, clusters, size=n)
+    vectors = centers[assignment] + 0.35 * rng.normal(size=(n, dim)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def _build(config: IndexConfig, vectors: np.ndarray):
+    start = time.perf_counter()
+    index, actual = create_index(vectors.shape[1], config, vectors)
+    index.add_with_ids(vectors, np.arange(len(vectors), dtype="int64"))
+    return index, actual, time.perf_counter() - start
+
+
+def _measure(index, queries: np.ndarray, k: int, truth: np.ndarray = None) -> dict:
+    latencies = []
+    found = []
+    for q in queries:
+        start = time.perf_counter()
+        _, ids = index.search(q.reshape(1, -1), k)
+        latencies.append(time.perf_counter() - start)
+        found.append(ids[0])
+    found = np.array(found)
+    latencies.sort()
+
+    result = {
+        "latency_ms_mean": float(np.mean(latencies) * 1000),
+        "latency_ms_p99": float(latencies[int(0.99 * (len(latencies) - 1))] * 1000),
+    }
+    if truth is not None:
+        hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+        result["recall_at_k"] = hits / truth.size
+    return result, found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=0, help="0 = 4*sqrt(N)")
+    parser.add_argument("--pq-m", type=int, default=48)
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16, 32, 64])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 32, 64, 128, 256])
+    parser.add_argument("--threads", type=int, default=1, help="FAISS OpenMP threads (1 = per-request cost)")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    faiss.omp_set_num_threads(args.threads)
+    vectors = synthetic_vectors(args.vectors, args.dim, args.clusters)
+    queries = synthetic_vectors(args.queries, args.dim, args.clusters, seed=1)
+    print(f"{args.vectors} vectors x {args.dim}d, {args.queries} queries, recall@{args.k}")
+
+    results = []
+
+    flat, _, build_s = _build(IndexConfig("flat"), vectors)
+    flat_res, truth = _measure(flat, queries, args.k)
+    results.append({"index": "flat", "param": "-", "build_s": build_s,
+                    "size_mb": faiss.serialize_index(flat).nbytes / 1e6, "recall_at_k": 1.0, **flat_res})
+
+    ivf_config = IndexConfig("ivfpq", nlist=args.nlist, pq_m=args.pq_m)
+    ivf, actual, build_s = _build(ivf_config, vectors)
+    if actual == "ivfpq":
+        size = faiss.serialize_index(ivf).nbytes / 1e6
+        for nprobe in args.nprobe:
+            ivf_config.nprobe = nprobe
+            configure_search(ivf, ivf_config)
+            res, _ = _measure(ivf, queries, args.k, truth)
+            results.append({"index": "ivfpq", "param": f"nprobe={nprobe}", "build_s": build_s,
+                            "size_mb": size, **res})
+
+    hnsw_config = IndexConfig("hnsw", hnsw_m=args.hnsw_m)
+    hnsw, _, build_s = _build(hnsw_config, vectors)
+    size = faiss.serialize_index(hnsw).nbytes / 1e6
+    for ef in args.ef_search:
+        hnsw_config.ef_search = ef
+        configure_search(hnsw, hnsw_config)
+        res, _ = _measure(hnsw, queries, args.k, truth)
+        results.append({"index": "hnsw", "param": f"efSearch={ef}", "build_s": build_s,
+                        "size_mb": size, **res})
+
+    print(f"{'index':>6} {'param':>13} {'recall':>7} {'mean ms':>8} {'p99 ms':>8} {'build s':>8} {'size MB':>8}")
+    for r in results:
+        print(
+            f"{r['index']:>6} {r['param']:>13} {r['recall_at_k']:7.3f} {r['latency_ms_mean']:8.3f} "
+            f"{r['latency_ms_p99']:8.3f} {r['build_s']:8.1f} {r['size_mb']:8.1f}"
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Micro-benchmark: image decode + preprocessing, before vs after the fast path.
+
+"legacy" is the original cnn_model.preprocess_image (full PIL decode,
+resize, divide by 255.0 → float64). "fast" is preprocessing.preprocess_image
+(draft/reduce decode, float32 into a reused buffer).
+
+Each variant runs in its own process so peak RSS numbers don't mix.
+
+    python -m benchmarks.bench_preprocess --width 4000 --height 3000 --iterations 20
+"""
+
+import argparse
+import io
+import json
+import multiprocessing as mp
+import resource
+import statistics
+import time
+import tracemalloc
+
+import numpy as np
+from PIL import Image
+
+from preprocessing import IMG_SIZE, preprocess_image
+
+
+def legacy_preprocess(image_bytes):
+    img = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+    img = img.resize(IMG_SIZE)
+    img_array = np.array(img) / 255.0
+    img_array = np.expand_dims(img_array, axis=0)
+    return img_array
+
+
+def make_jpeg(width: int, height: int, quality: int = 90) -> bytes:
+    """Synthetic 'leaf-like' photo: smooth gradients + noise, so JPEG size is realistic."""
+    rng = np.random.default_rng(0)
+    y = np.linspace(0, 1, height, dtype=np.float32)[:, None]
+    x = np.linspace(0, 1, width, dtype=np.float32)[None, :]
+    r = 60 + 80 * x * y
+    g = 120 + 100 * np.sin(6 * x) * np.cos(4 * y)
+    b = 40 + 60 * y
+    img = np.stack(np.broadcast_arrays(r, g, b), axis=-1)
+    img += rng.normal(0, 12, img.shape).astype(np.float32)
+    img = np.clip(img, 0, 255).astype(np.uint8)
+
+    buf = io.BytesIO()
+    Image.fromarray(img).save(buf, format="JPEG", quality=quality)
+    return buf.getvalue()
+
+
+def _rss_kb() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _run_variant(name, image_bytes, iterations, result_queue):
+    out = np.empty((1,) + IMG_SIZE[::-1] + (3,), dtype=np.float32)
+    if name == "legacy":
+        fn = legacy_preprocess
+    else:
+        def fn(data):
+            return preprocess_image(data, out=out)
+
+    # Warm-up (imports, codec init) before measuring
+    fn(image_bytes)
+    rss_before = _rss_kb()
+
+    times = []
+    tracemalloc.start()
+    for _ in range(iterations):
+        start = time.perf_counter()
+        arr = fn(image_bytes)
+        times.append(time.perf_counter() - start)
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result_queue.put({
+        "variant": name,
+        "dtype": str(arr.dtype),
+        "mean_ms": statistics.mean(times) * 1000,
+        "p50_ms": statistics.median(times) * 1000,
+        "min_ms": min(times) * 1000,
+        "peak_rss_growth_mb": (_rss_kb() - rss_before) / 1024,
+        "peak_python_alloc_mb": traced_peak / (1024 * 1024),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width", type=int, default=4000)
+    parser.add_argument("--height", type=int, default=3000)
+    parser.add_argument("--quality", type=int, default=90)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    image_bytes = make_jpeg(args.width, args.height, args.quality)
+    print(f"Input: {args.width}x{args.height} JPEG, {len(image_bytes) / 1024:.0f} KB")
+
+    ctx = mp.get_context("spawn")
+    results = []
+    for name in ("legacy", "fast"):
+        q = ctx.Queue()
+        p = ctx.Process(target=_run_variant, args=(name, image_bytes, args.iterations, q))
+        p.start()
+        results.append(q.get())
+        p.join()
+
+    for r in results:
+        print(
+            f"{r['variant']:>7}: mean {r['mean_ms']:7.2f} ms  p50 {r['p50_ms']:7.2f} ms  "
+            f"peak RSS +{r['peak_rss_growth_mb']:6.1f} MB  "
+            f"python allocs {r['peak_python_alloc_mb']:6.2f} MB  ({r['dtype']})"
+        )
+    legacy, fast = results
+    print(f"Speed-up: {legacy['mean_ms'] / fast['mean_ms']:.1f}x")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"input": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Accuracy parity + speed check for the leaf classifier backends.
+
+Runs every backend on the same held-out image set and reports, per backend:
+- top-1 agreement with the Keras model (and accuracy, if labels are known)
+- per-image latency (batch of 1) and batched throughput
+- peak RSS of a process that only loads that backend
+
+Labels are taken from sub-directory names when they match CLASS_NAMES
+(e.g. held_out/Tomato Late Blight/img1.jpg).
+
+    python cnn_backends.py convert --quantization dynamic
+    python cnn_backends.py convert --quantization float16
+    python -m benchmarks.cnn_parity --images held_out/ --limit 500
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import resource
+import statistics
+import time
+
+import numpy as np
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+
+def list_images(root: str, limit: int = None):
+    paths = []
+    for dirpath, _, filenames in os.walk(root):
+        for name in sorted(filenames):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                paths.append(os.path.join(dirpath, name))
+    paths.sort()
+    return paths[:limit] if limit else paths
+
+
+def _run_backend(spec, paths, batch_size, result_queue):
+    from cnn_backends import load_backend
+    from preprocessing import load_pixels, to_model_input
+
+    name, model_path, tflite_path, threads = spec
+    backend = load_backend(name, model_path, tflite_path, threads)
+
+    inputs = np.stack([to_model_input(load_pixels(open(p, "rb").read())) for p in paths])
+
+    # Warm-up (graph tracing / tensor allocation) before timing
+    backend.predict(inputs[:1])
+
+    single = []
+    preds = []
+    for i in range(len(inputs)):
+        start = time.perf_counter()
+        out = backend.predict(inputs[i:i + 1])
+        single.append(time.perf_counter() - start)
+        preds.append(int(np.argmax(out[0])))
+
+    start = time.perf_counter()
+    for i in range(0, len(inputs), batch_size):
+        backend.predict(inputs[i:i + batch_size])
+    batched = time.perf_counter() - start
+
+    single.sort()
+    result_queue.put({
+        "predictions": preds,
+        "latency_ms_p50": statistics.median(single) * 1000,
+        "latency_ms_p99": single[int(0.99 * (len(single) - 1))] * 1000,
+        "batched_images_per_sec": len(inputs) / batched if batched else 0.0,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    })
+
+
+def main():
+    from cnn_backends import default_tflite_path
+    from cnn_model import CLASS_NAMES, MODEL_PATH
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", required=True, help="directory of held-out images")
+    parser.add_argument("--model", default=MODEL_PATH, help="Keras .h5 model")
+    parser.add_argument("--tflite", nargs="*", help="TFLite files to compare (default: dynamic + float16 exports)")
+    parser.add_argument("--threads", type=int, default=None, help="TFLite interpreter threads")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    paths = list_images(args.images, args.limit)
+    if not paths:
+        raise SystemExit(f"No images found under {args.images}")
+
+    tflite_paths = args.tflite or [
+        p for p in (default_tflite_path(args.model, q) for q in ("dynamic", "float16"))
+        if os.path.exists(p)
+    ]
+    specs = [("keras", args.model, None, None)]
+    specs += [("tflite", args.model, p, args.threads) for p in tflite_paths]
+
+    label_index = {name.lower(): i for i, name in enumerate(CLASS_NAMES)}
+    labels = [label_index.get(os.path.basename(os.path.dirname(p)).lower()) for p in paths]
+    labelled = [i for i, label in enumerate(labels) if label is not None]
+
+    ctx = mp.get_context("spawn")
+    results = []
+    for spec in specs:
+        q = ctx.Queue()
+        proc = ctx.Process(target=_run_backend, args=(spec, paths, args.batch_size, q))
+        proc.start()
+        res = q.get()
+        proc.join()
+        res["backend"] = spec[0] if spec[0] == "keras" else os.path.basename(spec[2])
+        results.append(res)
+
+    reference = results[0]["predictions"]
+    print(f"{len(paths)} images ({len(labelled)} labelled)")
+    for res in results:
+        preds = res.pop("predictions")
+        res["top1_agreement"] = float(np.mean([a == b for a, b in zip(preds, reference)]))
+        if labelled:
+            res["accuracy"] = float(np.mean([preds[i] == labels[i] for i in labelled]))
+        print(
+            f"{res['backend']:>28}: agree {res['top1_agreement']:6.2%}  "
+            + (f"acc {res['accuracy']:6.2%}  " if labelled else "")
+            + f"p50 {res['latency_ms_p50']:6.2f} ms  p99 {res['latency_ms_p99']:6.2f} ms  "
+            f"{res['batched_images_per_sec']:7.1f} img/s  RSS {res['peak_rss_mb']:6.0f} MB"
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"images": len(paths), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
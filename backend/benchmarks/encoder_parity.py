@@ -0,0 +1,178 @@
+"""
+Parity + speed check for the query encoder backends (encoders.py).
+
+Every backend runs in its own process on the same query set and reports:
+- top-k document overlap with the float (torch) encoder on the saved FAISS
+  index, top-1 agreement and mean cosine between the two query vectors
+- load time, per-query latency (batch of 1) and peak RSS of a process that
+  only loads that encoder
+
+    python build_index.py                      # index built with the float model
+    python encoders.py export                  # int8 ONNX → data/encoder/
+    python -m benchmarks.encoder_parity --k 5 --json results/encoder_parity.json
+
+--queries takes a text file with one question per line; the default set is
+a few dozen typical farmer questions.
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import resource
+import statistics
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_QUERIES = [
+    "my tomato leaves have brown spots with rings",
+    "white powder on the leaves of my plant",
+    "rice leaves turning yellow from the tip",
+    "potato leaves have dark water soaked patches",
+    "how do I stop leaf curl on chilli",
+    "black spots on apple leaves",
+    "orange rust spots under corn leaves",
+    "grape leaves have brown patches with yellow edges",
+    "how to treat early blight on potato",
+    "what fungicide for apple scab",
+    "my pepper plant has small dark spots on leaves",
+    "cherry leaves covered with white powder",
+    "strawberry leaves look scorched at the edges",
+    "peach leaves have small holes and spots",
+    "squash leaves have white powdery coating",
+    "yellow mosaic pattern on tomato leaves",
+    "how to prevent late blight in rainy season",
+    "leaves are curling and turning yellow on tomato",
+    "corn leaves have long grey lesions",
+    "citrus fruit with yellow shoots and bitter taste",
+    "soybean leaves healthy but small, what fertilizer",
+    "how much water does rice need",
+    "what is the best soil ph for tomato",
+    "organic spray for fungal leaf spots",
+    "how to stop spider mites on tomato",
+    "my grape bunches are rotting and turning black",
+    "how to keep blueberry plants healthy",
+    "raspberry leaves are fine, how to prevent disease",
+    "northern leaf blight treatment for maize",
+    "brown circles on apple fruit and leaves with cedar trees nearby",
+]
+
+
+def _run_encoder(backend, queries, result_queue):
+    start = time.perf_counter()
+    from encoders import load_local_encoder
+
+    encoder = load_local_encoder(backend)
+    load_s = time.perf_counter() - start
+
+    encoder.encode(["warm up"])
+    vectors = []
+    latencies = []
+    for q in queries:
+        t0 = time.perf_counter()
+        vec = np.asarray(encoder.encode([q]), dtype=np.float32)
+        latencies.append(time.perf_counter() - t0)
+        vectors.append(vec[0])
+
+    t0 = time.perf_counter()
+    encoder.encode(queries)
+    batched_s = time.perf_counter() - t0
+
+    latencies.sort()
+    result_queue.put({
+        "vectors": np.stack(vectors),
+        "load_s": load_s,
+        "latency_ms_p50": statistics.median(latencies) * 1000,
+        "latency_ms_p99": latencies[int(0.99 * (len(latencies) - 1))] * 1000,
+        "batched_queries_per_sec": len(queries) / batched_s if batched_s else 0.0,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    })
+
+
+def _top_docs(index, vector_owner, vectors, k, overfetch=4):
+    import faiss
+
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    faiss.normalize_L2(vectors)
+    _, ids = index.search(vectors, min(index.ntotal, k * overfetch))
+    out = []
+    for row in ids:
+        docs = []
+        for vid in row:
+            doc = vector_owner.get(int(vid))
+            if doc is not None and doc not in docs:
+                docs.append(doc)
+            if len(docs) == k:
+                break
+        out.append(docs)
+    return out
+
+
+def main():
+    from database import AgriKnowledgeBase
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--index-dir", default=os.path.join(BACKEND_DIR, "data"),
+                        help="directory holding faiss_index/ (as written by build_index.py)")
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx"])
+    parser.add_argument("--queries", help="text file, one query per line")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    if args.queries:
+        with open(args.queries, "r", encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+    else:
+        queries = DEFAULT_QUERIES
+
+    state = AgriKnowledgeBase(index_dir=args.index_dir, load=False).load_index()
+    if state is None:
+        raise SystemExit("No saved index: run build_index.py first")
+    index, vector_owner = state.index, state.vector_owner
+
+    ctx = mp.get_context("spawn")
+    results = []
+    for backend in args.backends:
+        q = ctx.Queue()
+        proc = ctx.Process(target=_run_encoder, args=(backend, queries, q))
+        proc.start()
+        res = q.get()
+        proc.join()
+        res["backend"] = backend
+        results.append(res)
+
+    reference = results[0]
+    ref_vectors = reference["vectors"] / np.linalg.norm(reference["vectors"], axis=1, keepdims=True)
+    ref_docs = _top_docs(index, vector_owner, reference["vectors"], args.k)
+
+    print(f"{len(queries)} queries, top-{args.k} documents vs {reference['backend']}")
+    for res in results:
+        vectors = res.pop("vectors")
+        docs = _top_docs(index, vector_owner, vectors, args.k)
+        unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        res["mean_cosine_to_reference"] = float(np.mean(np.sum(unit * ref_vectors, axis=1)))
+        res[f"top{args.k}_overlap"] = float(np.mean([
+            len(set(a) & set(b)) / max(1, len(b)) for a, b in zip(docs, ref_docs)
+        ]))
+        res["top1_agreement"] = float(np.mean([
+            bool(a) and bool(b) and a[0] == b[0] for a, b in zip(docs, ref_docs)
+        ]))
+        print(
+            f"{res['backend']:>8}: overlap {res[f'top{args.k}_overlap']:6.2%}  "
+            f"top-1 {res['top1_agreement']:6.2%}  cos {res['mean_cosine_to_reference']:.4f}  "
+            f"load {res['load_s']:5.2f}s  p50 {res['latency_ms_p50']:6.2f} ms  "
+            f"p99 {res['latency_ms_p99']:6.2f} ms  RSS {res['peak_rss_mb']:6.0f} MB"
+        )
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"queries": len(queries), "k": args.k, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Local stand-in for the Gemini client, used with LLM_BACKEND=fake.
+
+Mimics the parts of google.generativeai.GenerativeModel that llm.py uses:
+`await generate_content_async(prompt)` → object with `.text`, and
+`await generate_content_async(prompt, stream=True)` → async iterator of chunks
+with `.text`. No network, no API key.
+
+Config (env):
+  FAKE_GEMINI_LATENCY_MS   time to first token (default 800)
+  FAKE_GEMINI_TOKEN_MS     time between streamed chunks (default 25)
+  FAKE_GEMINI_TOKENS       chunks per answer (default 40)
+  FAKE_GEMINI_JITTER       ± relative jitter on every delay (default 0.2)
+  FAKE_GEMINI_ERROR_RATE   fraction of calls that raise (default 0)
+  FAKE_GEMINI_SEED         RNG seed for reproducible runs (default 0)
+"""
+
+import asyncio
+import os
+import random
+
+_ANSWER_WORDS = (
+    "Remove the infected leaves and burn them away from the field. "
+    "Spray a copper based fungicide as advised by the local agriculture officer. "
+    "Water the plants at the base in the morning and keep good spacing for air flow. "
+    "Check the crop every week and act early if new spots appear. "
+    "For exact advice, please also ask a local agriculture expert."
+).split()
+
+
+class FakeGeminiError(RuntimeError):
+    pass
+
+
+class _Chunk:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class _Stream:
+    def __init__(self, model, words):
+        self._model = model
+        self._words = words
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for i, word in enumerate(self._words):
+            if i:
+                await asyncio.sleep(self._model._delay(self._model.token_ms))
+            yield _Chunk(word + " ")
+
+
+class FakeGenerativeModel:
+    def __init__(self, first_token_ms: float = 800, token_ms: float = 25, tokens: int = 40,
+                 jitter: float = 0.2, error_rate: float = 0.0, seed: int = 0):
+        self.first_token_ms = first_token_ms
+        self.token_ms = token_ms
+        self.tokens = tokens
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self.calls = 0
+
+    @classmethod
+    def from_env(cls) -> "FakeGenerativeModel":
+        return cls(
+            first_token_ms=float(os.getenv("FAKE_GEMINI_LATENCY_MS", "800")),
+            token_ms=float(os.getenv("FAKE_GEMINI_TOKEN_MS", "25")),
+            tokens=int(os.getenv("FAKE_GEMINI_TOKENS", "40")),
+            jitter=float(os.getenv("FAKE_GEMINI_JITTER", "0.2")),
+            error_rate=float(os.getenv("FAKE_GEMINI_ERROR_RATE", "0")),
+            seed=int(os.getenv("FAKE_GEMINI_SEED", "0")),
+        )
+
+    def _delay(self, ms: float) -> float:
+        factor = 1.0 + self._rng.uniform(-self.jitter, self.jitter)
+        return max(0.0, ms * factor / 1000.0)
+
+    def _words(self):
+        return [_ANSWER_WORDS[i % len(_ANSWER_WORDS)] for i in range(self.tokens)]
+
+    async def generate_content_async(self, prompt: str, stream: bool = False, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self._delay(self.first_token_ms))
+        if self._rng.random() < self.error_rate:
+            raise FakeGeminiError("fake Gemini error (FAKE_GEMINI_ERROR_RATE)")
+
+        words = self._words()
+        if stream:
+            return _Stream(self, words)
+
+        await asyncio.sleep(sum(self._delay(self.token_ms) for _ in words[1:]))
+        return _Chunk(" ".join(words))
@@ -0,0 +1,228 @@
+"""
+Concurrent load driver for a running AgriAssist API.
+
+Scenarios:
+  predict   POST /predict-cnn with synthetic JPEGs
+  chat      POST /chat
+  stream    POST /chat/stream (also records time to first token)
+  mixed     predict + chat interleaved, like a diagnosis session
+  diagnose  POST /diagnose (image + question in one request)
+
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000 --scenario mixed \\
+        --concurrency 32 --duration 30 --output results/load.json
+
+--distinct-images / --distinct-queries control how many unique inputs are
+cycled through, i.e. how much the prediction and answer caches can help.
+Needs httpx (pip install httpx); it is not a runtime dependency of the API.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import time
+
+import httpx
+
+from benchmarks.bench_preprocess import make_jpeg
+from benchmarks.micro import QUERIES
+from benchmarks.stats import run_metadata, summarize
+
+SCENARIOS = ("predict", "chat", "stream", "mixed", "diagnose")
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = {}
+        self.first_token = []
+        self.errors = {}
+
+    def ok(self, kind: str, seconds: float):
+        self.latencies.setdefault(kind, []).append(seconds)
+
+    def error(self, kind: str, reason: str):
+        key = f"{kind}:{reason}"
+        self.errors[key] = self.errors.get(key, 0) + 1
+
+
+def make_images(count: int, width: int, height: int):
+    images = []
+    for i in range(count):
+        # Slightly different sizes give distinct bytes and pixels.
+        images.append(make_jpeg(width + i, height + i))
+    return images
+
+
+def make_queries(count: int):
+    return [QUERIES[i % len(QUERIES)] + ("" if i < len(QUERIES) else f" (case {i})") for i in range(count)]
+
+
+async def do_predict(client, recorder, image):
+    t0 = time.perf_counter()
+    try:
+        r = await client.post("/predict-cnn", files={"file": ("leaf.jpg", image, "image/jpeg")})
+    except httpx.HTTPError as e:
+        recorder.error("predict", type(e).__name__)
+        return None
+    if r.status_code != 200:
+        recorder.error("predict", str(r.status_code))
+        return None
+    recorder.ok("predict", time.perf_counter() - t0)
+    return r.json().get("prediction")
+
+
+async def do_chat(client, recorder, query, cnn_prediction=None):
+    payload = {"message": query, "language": "English", "cnn_prediction": cnn_prediction}
+    t0 = time.perf_counter()
+    try:
+        r = await client.post("/chat", json=payload)
+    except httpx.HTTPError as e:
+        recorder.error("chat", type(e).__name__)
+        return
+    if r.status_code != 200:
+        recorder.error("chat", str(r.status_code))
+        return
+    recorder.ok("chat", time.perf_counter() - t0)
+
+
+async def do_stream(client, recorder, query):
+    payload = {"message": query, "language": "English", "cnn_prediction": None}
+    t0 = time.perf_counter()
+    first = None
+    try:
+        async with client.stream("POST", "/chat/stream", json=payload) as r:
+            if r.status_code != 200:
+                recorder.error("stream", str(r.status_code))
+                return
+            async for line in r.aiter_lines():
+                if first is None and line.startswith("event: token"):
+                    first = time.perf_counter() - t0
+                if line.startswith("event: error"):
+                    recorder.error("stream", "event")
+                    return
+    except httpx.HTTPError as e:
+        recorder.error("stream", type(e).__name__)
+        return
+    recorder.ok("stream", time.perf_counter() - t0)
+    if first is not None:
+        recorder.first_token.append(first)
+
+
+async def do_diagnose(client, recorder, image, query):
+    t0 = time.perf_counter()
+    try:
+        r = await client.post(
+            "/diagnose",
+            files={"file": ("leaf.jpg", image, "image/jpeg")},
+            data={"message": query, "language": "English"},
+        )
+    except httpx.HTTPError as e:
+        recorder.error("diagnose", type(e).__name__)
+        return
+    if r.status_code != 200:
+        recorder.error("diagnose", str(r.status_code))
+        return
+    recorder.ok("diagnose", time.perf_counter() - t0)
+
+
+async def worker(client, recorder, scenario, images, queries, deadline, remaining):
+    while time.perf_counter() < deadline:
+        if remaining is not None:
+            if remaining[0] <= 0:
+                return
+            remaining[0] -= 1
+        image = next(images)
+        query = next(queries)
+        if scenario == "predict":
+            await do_predict(client, recorder, image)
+        elif scenario == "chat":
+            await do_chat(client, recorder, query)
+        elif scenario == "stream":
+            await do_stream(client, recorder, query)
+        elif scenario == "diagnose":
+            await do_diagnose(client, recorder, image, query)
+        else:
+            class_index = await do_predict(client, recorder, image)
+            await do_chat(client, recorder, query, class_index)
+
+
+async def run(args) -> dict:
+    images = itertools.cycle(make_images(args.distinct_images, args.width, args.height))
+    queries = itertools.cycle(make_queries(args.distinct_queries))
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    timeout = httpx.Timeout(args.timeout)
+
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=timeout) as client:
+        for _ in range(args.warmup):
+            await do_predict(client, Recorder(), next(images))
+            await do_chat(client, Recorder(), next(queries))
+
+        remaining = [args.requests] if args.requests else None
+        deadline = time.perf_counter() + (args.duration if not args.requests else 1e9)
+        start = time.perf_counter()
+        await asyncio.gather(*[
+            worker(client, recorder, args.scenario, images, queries, deadline, remaining)
+            for _ in range(args.concurrency)
+        ])
+        elapsed = time.perf_counter() - start
+
+        server_stats = {}
+        for path in ("/predict-cnn/stats", "/chat/stats"):
+            try:
+                server_stats[path] = (await client.get(path)).json()
+            except (httpx.HTTPError, ValueError):
+                pass
+
+    results = {kind: summarize(values, elapsed) for kind, values in recorder.latencies.items()}
+    if recorder.first_token:
+        results["stream_first_token"] = summarize(recorder.first_token)
+    return {
+        "meta": run_metadata(),
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "elapsed_s": elapsed,
+        "results": results,
+        "errors": recorder.errors,
+        "server_stats": server_stats,
+    }
+
+
+def print_report(report: dict):
+    print(f"Scenario {report['config']['scenario']} · concurrency {report['config']['concurrency']} "
+          f"· {report['elapsed_s']:.1f}s")
+    for kind, r in report["results"].items():
+        rps = f"{r['throughput_rps']:7.1f} req/s" if "throughput_rps" in r else " " * 13
+        print(f"  {kind:20s} n={r['count']:<6d} {rps}  p50 {r['p50_ms']:8.1f}  "
+              f"p95 {r['p95_ms']:8.1f}  p99 {r['p99_ms']:8.1f} ms")
+    if report["errors"]:
+        print(f"  errors: {report['errors']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--scenario", choices=SCENARIOS, default="mixed")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds (ignored with --requests)")
+    parser.add_argument("--requests", type=int, default=0, help="stop after this many iterations")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--distinct-images", type=int, default=8)
+    parser.add_argument("--distinct-queries", type=int, default=24)
+    parser.add_argument("--width", type=int, default=1600)
+    parser.add_argument("--height", type=int, default=1200)
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
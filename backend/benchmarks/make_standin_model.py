@@ -0,0 +1,52 @@
+"""
+Generate a stand-in leaf classifier with the real model's interface:
+input (None, 150, 150, 3) float32 in [0, 1] → softmax over the 38 CLASS_NAMES.
+
+The weights are random, so predictions are meaningless, but the compute
+profile is in the same range as a small CNN, which is what the benchmarks need.
+
+    python -m benchmarks.make_standin_model --output bench_data/standin_cnn.h5
+    CNN_MODEL_PATH=bench_data/standin_cnn.h5 uvicorn main:app
+"""
+
+import argparse
+import os
+
+from labels import CLASS_NAMES
+from preprocessing import IMG_SIZE
+
+
+def build_model(width: int = 32):
+    import tensorflow as tf
+
+    layers = tf.keras.layers
+    inputs = tf.keras.Input(shape=(IMG_SIZE[1], IMG_SIZE[0], 3))
+    x = inputs
+    for filters in (width, width * 2, width * 4):
+        x = layers.Conv2D(filters, 3, padding="same", activation="relu")(x)
+        x = layers.MaxPooling2D()(x)
+    x = layers.Conv2D(width * 4, 3, padding="same", activation="relu")(x)
+    x = layers.GlobalAveragePooling2D()(x)
+    x = layers.Dense(128, activation="relu")(x)
+    outputs = layers.Dense(len(CLASS_NAMES), activation="softmax")(x)
+    return tf.keras.Model(inputs, outputs, name="standin_leaf_cnn")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=os.path.join("bench_data", "standin_cnn.h5"))
+    parser.add_argument("--width", type=int, default=32, help="filters in the first conv layer")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    import tensorflow as tf
+
+    tf.keras.utils.set_random_seed(args.seed)
+    model = build_model(args.width)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    model.save(args.output)
+    print(f"✅ Stand-in CNN ({model.count_params():,} params) written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Micro-benchmarks for the request hot path, one stage at a time:
+
+  preprocess       preprocessing.preprocess_image on a synthetic photo
+  predict          cnn_model.predict_image (decode + batcher + model)
+  search_cold      knowledge_base.search_diseases with a fresh query each call
+  search_cached    knowledge_base.search_diseases with a repeated query
+  prompt           prompts.build_prompt with retrieved diseases
+
+Run with the stand-in model so numbers are reproducible without the real weights:
+
+    CNN_MODEL_PATH=bench_data/standin_cnn.h5 python -m benchmarks.micro --output results/micro.json
+"""
+
+import argparse
+import json
+import os
+import time
+
+from benchmarks.bench_preprocess import make_jpeg
+from benchmarks.stats import run_metadata, summarize
+
+QUERIES = [
+    "my tomato leaves have brown spots with rings",
+    "white powder on the leaves of my plant",
+    "rice leaves turning yellow from the tip",
+    "potato leaves have dark water soaked patches",
+    "how do I stop leaf curl on chilli",
+    "black spots on apple leaves",
+]
+
+
+def _time(fn, iterations: int, warmup: int = 2):
+    for i in range(warmup):
+        fn(i)
+    latencies = []
+    start = time.perf_counter()
+    for i in range(iterations):
+        t0 = time.perf_counter()
+        fn(i)
+        latencies.append(time.perf_counter() - t0)
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def bench_preprocess(image_bytes, iterations):
+    from preprocessing import preprocess_image
+
+    return _time(lambda i: preprocess_image(image_bytes), iterations)
+
+
+def bench_predict(image_bytes, iterations):
+    import cnn_model
+
+    try:
+        cnn_model.load_model()
+    except Exception as e:
+        return {"skipped": f"CNN model not loaded (set CNN_MODEL_PATH): {e}"}
+    cnn_model.warm_up()
+
+    def run(i):
+        # Measure the uncached path: the same image would otherwise hit the prediction cache.
+        cnn_model.prediction_cache.clear()
+        cnn_model.predict_image(image_bytes)
+
+    return _time(run, iterations)
+
+
+def bench_search(iterations, cached: bool):
+    from database import knowledge_base
+
+    knowledge_base.load()
+    if cached:
+        knowledge_base.search_diseases(QUERIES[0])
+        return _time(lambda i: knowledge_base.search_diseases(QUERIES[0]), iterations)
+    # Unique suffix per call defeats the query-embedding cache.
+    return _time(
+        lambda i: knowledge_base.search_diseases(f"{QUERIES[i % len(QUERIES)]} #{time.perf_counter_ns()}"),
+        iterations,
+    )
+
+
+def bench_prompt(iterations):
+    from database import knowledge_base
+    from prompts import build_prompt
+
+    knowledge_base.load()
+    diseases = knowledge_base.search_diseases(QUERIES[0])
+    return _time(lambda i: build_prompt(QUERIES[i % len(QUERIES)], "English", 0, diseases), iterations)
+
+
+BENCHMARKS = ("preprocess", "predict", "search_cold", "search_cached", "prompt")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--width", type=int, default=1600)
+    parser.add_argument("--height", type=int, default=1200)
+    parser.add_argument("--only", nargs="*", choices=BENCHMARKS, default=list(BENCHMARKS))
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    image_bytes = make_jpeg(args.width, args.height)
+    runners = {
+        "preprocess": lambda: bench_preprocess(image_bytes, args.iterations),
+        "predict": lambda: bench_predict(image_bytes, args.iterations),
+        "search_cold": lambda: bench_search(args.iterations, cached=False),
+        "search_cached": lambda: bench_search(args.iterations, cached=True),
+        "prompt": lambda: bench_prompt(args.iterations),
+    }
+
+    results = {}
+    for name in args.only:
+        results[name] = runners[name]()
+        r = results[name]
+        if "skipped" in r:
+            print(f"{name:14s} skipped: {r['skipped']}")
+        else:
+            print(f"{name:14s} p50 {r['p50_ms']:8.2f} ms  p95 {r['p95_ms']:8.2f} ms  p99 {r['p99_ms']:8.2f} ms")
+
+    report = {
+        "meta": run_metadata(),
+        "config": {"iterations": args.iterations, "image": [args.width, args.height]},
+        "results": results,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
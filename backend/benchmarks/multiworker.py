@@ -0,0 +1,190 @@
+"""
+Memory and throughput: models in every worker vs one shared model server.
+
+For each worker count, two deployments are started and measured:
+  local    uvicorn --workers N, every worker loads the CNN and the encoder
+  remote   model_server.py + uvicorn --workers N with INFERENCE_MODE=remote
+
+Reported per deployment: startup time until the API answers, total PSS of
+the process tree (shared pages counted once, so the numbers are additive)
+and of every process in it, and the load driver's throughput / latency for
+the chosen scenario.
+
+    python -m benchmarks.multiworker --workers 1 2 4 --scenario mixed \\
+        --model bench_data/standin_cnn.h5 --output results/multiworker.json
+
+--index-mmap 1 0 repeats every deployment with the FAISS index memory-mapped
+and read into each worker (KB_INDEX_MMAP), to see what the mmap saves per worker.
+
+Linux only (reads /proc). Uses LLM_BACKEND=fake so Gemini is not called.
+"""
+
+import argparse
+import json
+import os
+import secrets
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.run_suite import BACKEND_DIR, _load, _run_module, _wait_ready
+from benchmarks.stats import run_metadata
+
+
+def _children(pid: int):
+    """pid plus all descendants."""
+    pids = [pid]
+    for p in pids:
+        try:
+            with open(f"/proc/{p}/task/{p}/children") as f:
+                pids.extend(int(c) for c in f.read().split())
+        except OSError:
+            pass
+    return pids
+
+
+def _memory_kb(pid: int) -> int:
+    """Proportional set size (falls back to RSS where smaps_rollup is missing)."""
+    for path, field in ((f"/proc/{pid}/smaps_rollup", "Pss:"), (f"/proc/{pid}/status", "VmRSS:")):
+        try:
+            with open(path) as f:
+                for line in f:
+                    if line.startswith(field):
+                        return int(line.split()[1])
+        except OSError:
+            continue
+    return 0
+
+
+def process_memory_mb(*root_pids) -> dict:
+    """{pid: PSS in MB} for every process in the trees."""
+    memory = {}
+    for root in root_pids:
+        for pid in _children(root):
+            if pid not in memory:
+                memory[pid] = _memory_kb(pid) / 1024.0
+    return memory
+
+
+def tree_memory_mb(*root_pids) -> float:
+    return sum(process_memory_mb(*root_pids).values())
+
+
+def _stop(proc):
+    if proc is None or proc.poll() is not None:
+        return
+    proc.send_signal(signal.SIGINT)
+    try:
+        proc.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+def run_deployment(mode: str, workers: int, args, base_env: dict, index_mmap: str = "1") -> dict:
+    env = dict(base_env)
+    env["INFERENCE_MODE"] = mode
+    env["KB_INDEX_MMAP"] = index_mmap
+    socket_path = os.path.join(tempfile.gettempdir(), f"agriassist-bench-{os.getpid()}.sock")
+    env["MODEL_SERVER_SOCKET"] = socket_path
+    env.setdefault("MODEL_SERVER_AUTHKEY", secrets.token_hex(16))
+    url = f"http://127.0.0.1:{args.port}"
+
+    model_server = None
+    api = None
+    start = time.perf_counter()
+    try:
+        if mode == "remote":
+            model_server = subprocess.Popen(
+                [sys.executable, "model_server.py", "--socket", socket_path], cwd=BACKEND_DIR, env=env,
+            )
+            deadline = time.time() + 180
+            while not os.path.exists(socket_path):
+                if model_server.poll() is not None or time.time() > deadline:
+                    raise RuntimeError("model server did not start")
+                time.sleep(0.2)
+
+        api = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port),
+             "--workers", str(workers), "--log-level", "warning"],
+            cwd=BACKEND_DIR, env=env,
+        )
+        _wait_ready(url, timeout=300)
+        startup_s = time.perf_counter() - start
+        # Let every worker finish importing before taking the idle snapshot
+        time.sleep(args.settle)
+        idle_by_process = process_memory_mb(*[p.pid for p in (api, model_server) if p is not None])
+        idle_mb = sum(idle_by_process.values())
+
+        out_path = os.path.join(args.work_dir, f"load_{mode}_{workers}.json")
+        _run_module("benchmarks.loadtest", [
+            "--url", url, "--scenario", args.scenario, "--concurrency", str(args.concurrency),
+            "--duration", str(args.duration), "--output", out_path,
+        ], env)
+        loaded = _load(out_path)
+        busy_mb = tree_memory_mb(*[p.pid for p in (api, model_server) if p is not None])
+    finally:
+        _stop(api)
+        _stop(model_server)
+
+    return {
+        "mode": mode,
+        "workers": workers,
+        "index_mmap": index_mmap == "1",
+        "startup_s": startup_s,
+        "memory_idle_mb": idle_mb,
+        "memory_idle_per_process_mb": sorted(idle_by_process.values(), reverse=True),
+        "memory_after_load_mb": busy_mb,
+        "results": loaded["results"],
+        "errors": loaded["errors"],
+        "server_stats": loaded.get("server_stats", {}),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--modes", nargs="+", choices=("local", "remote"), default=["local", "remote"])
+    parser.add_argument("--model", default=os.path.join("bench_data", "standin_cnn.h5"))
+    parser.add_argument("--scenario", default="mixed")
+    parser.add_argument("--index-mmap", nargs="+", choices=("1", "0"), default=["1"],
+                        help="KB_INDEX_MMAP values to compare")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--settle", type=float, default=5.0, help="seconds to wait before the idle snapshot")
+    parser.add_argument("--output", default=os.path.join("results", "multiworker.json"))
+    args = parser.parse_args()
+
+    os.chdir(BACKEND_DIR)
+    args.work_dir = os.path.join("bench_data", "runs")
+    os.makedirs(args.work_dir, exist_ok=True)
+    if not os.path.exists(args.model):
+        _run_module("benchmarks.make_standin_model", ["--output", args.model], dict(os.environ))
+
+    base_env = dict(os.environ)
+    base_env.update({"CNN_MODEL_PATH": os.path.abspath(args.model), "LLM_BACKEND": "fake"})
+
+    runs = []
+    for workers in args.workers:
+        for mode in args.modes:
+            for index_mmap in args.index_mmap:
+                run = run_deployment(mode, workers, args, base_env, index_mmap)
+                runs.append(run)
+                rps = sum(r.get("throughput_rps", 0.0) for r in run["results"].values())
+                print(f"{mode:6s} x{workers} mmap={index_mmap}: startup {run['startup_s']:6.1f}s  "
+                      f"memory {run['memory_idle_mb']:8.0f} MB idle / {run['memory_after_load_mb']:8.0f} MB loaded  "
+                      f"{rps:7.1f} req/s")
+
+    report = {"meta": run_metadata(), "config": {k: v for k, v in vars(args).items() if k != "output"},
+              "runs": runs}
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
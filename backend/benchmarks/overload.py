@@ -0,0 +1,175 @@
+"""
+Goodput under overload: admission control on vs off.
+
+Requests arrive open-loop (Poisson, fixed offered rate, no waiting for
+earlier responses) like farmers' phones during a spike. For each offered
+rate the driver records:
+  goodput_rps     200 responses that finished within --slo seconds, per second
+  ok / rejected   counts of 200 and of 503 / 429 (with Retry-After) answers
+  errors          timeouts, connection errors and other statuses
+  latency         of the good responses, and of the rejections (should be ms)
+
+With admission control goodput should level off at capacity as the offered
+rate rises; without it, queues inside the worker grow until most requests
+miss the SLO and goodput collapses.
+
+    python -m benchmarks.overload --scenario chat --rates 2 4 8 16 32 \\
+        --duration 20 --output results/overload.json
+
+Uses the stand-in CNN and LLM_BACKEND=fake (FAKE_GEMINI_LATENCY_MS sets
+the Gemini latency); the answer cache is disabled so every question costs.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.loadtest import make_images, make_queries
+from benchmarks.multiworker import _stop
+from benchmarks.run_suite import BACKEND_DIR, _run_module, _wait_ready
+from benchmarks.stats import run_metadata, summarize
+
+CONFIGS = {
+    "admission": {"ADMISSION_ENABLED": "1"},
+    "no-admission": {"ADMISSION_ENABLED": "0"},
+}
+
+
+async def _send(client, scenario, image, query):
+    if scenario == "predict":
+        return await client.post("/predict-cnn", files={"file": ("leaf.jpg", image, "image/jpeg")})
+    if scenario == "diagnose":
+        return await client.post("/diagnose", files={"file": ("leaf.jpg", image, "image/jpeg")},
+                                 data={"message": query, "language": "English"})
+    return await client.post("/chat", json={"message": query, "language": "English", "cnn_prediction": None})
+
+
+async def run_rate(url: str, scenario: str, rate: float, args, images, queries) -> dict:
+    good, ok, rejected_lat = [], [], []
+    statuses = {}
+    rng = random.Random(args.seed)
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+
+    async def one(image, query):
+        t0 = time.perf_counter()
+        try:
+            r = await _send(client, scenario if scenario != "mixed" else rng.choice(("predict", "chat")),
+                            image, query)
+            status = str(r.status_code)
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        elapsed = time.perf_counter() - t0
+        statuses[status] = statuses.get(status, 0) + 1
+        if status == "200":
+            ok.append(elapsed)
+            if elapsed <= args.slo:
+                good.append(elapsed)
+        elif status in ("503", "429"):
+            rejected_lat.append(elapsed)
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=httpx.Timeout(args.timeout)) as client:
+        tasks = []
+        start = time.perf_counter()
+        next_at = start
+        while next_at - start < args.duration:
+            await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+            tasks.append(asyncio.create_task(one(next(images), next(queries))))
+            next_at += rng.expovariate(rate)
+        await asyncio.gather(*tasks)
+        try:
+            server = (await client.get("/admission/stats")).json()
+        except (httpx.HTTPError, ValueError):
+            server = {}
+
+    sent = len(tasks)
+    rejected = statuses.get("503", 0) + statuses.get("429", 0)
+    return {
+        "offered_rps": rate,
+        "sent": sent,
+        "goodput_rps": len(good) / args.duration,
+        "ok": len(ok),
+        "rejected": rejected,
+        "errors": sent - len(ok) - rejected,
+        "statuses": statuses,
+        "latency_ok": summarize(ok),
+        "latency_rejected": summarize(rejected_lat),
+        "admission": server,
+    }
+
+
+def run_config(name: str, args, base_env: dict) -> dict:
+    env = dict(base_env)
+    env.update(CONFIGS[name])
+    url = f"http://127.0.0.1:{args.port}"
+    api = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    points = []
+    try:
+        _wait_ready(url, timeout=300)
+        images = itertools.cycle(make_images(64, 256, 256))
+        # Unique questions: no embedding or answer cache hits
+        queries = iter(make_queries(10 ** 6))
+        for rate in args.rates:
+            point = asyncio.run(run_rate(url, args.scenario, rate, args, images, queries))
+            points.append(point)
+            print(f"{name:13s} offered {rate:7.1f} rps → goodput {point['goodput_rps']:6.1f} rps  "
+                  f"ok {point['ok']:5d}  rejected {point['rejected']:5d}  errors {point['errors']:5d}  "
+                  f"p99 ok {point['latency_ok']['p99_ms']:8.0f} ms  "
+                  f"p99 rejected {point['latency_rejected']['p99_ms']:6.0f} ms")
+            time.sleep(args.cooldown)
+    finally:
+        _stop(api)
+    return {"config": name, "points": points}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=("chat", "predict", "diagnose", "mixed"), default="chat")
+    parser.add_argument("--rates", type=float, nargs="+", default=[2, 4, 8, 16, 32])
+    parser.add_argument("--configs", nargs="+", choices=tuple(CONFIGS), default=list(CONFIGS))
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per offered rate")
+    parser.add_argument("--slo", type=float, default=5.0, help="a 200 slower than this is not goodput")
+    parser.add_argument("--timeout", type=float, default=30.0, help="client timeout (the phone gives up)")
+    parser.add_argument("--cooldown", type=float, default=5.0, help="seconds between rates")
+    parser.add_argument("--max-connections", type=int, default=1000)
+    parser.add_argument("--llm-latency-ms", type=float, default=800.0)
+    parser.add_argument("--model", default=os.path.join("bench_data", "standin_cnn.h5"))
+    parser.add_argument("--port", type=int, default=8768)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=os.path.join("results", "overload.json"))
+    args = parser.parse_args()
+
+    os.chdir(BACKEND_DIR)
+    if not os.path.exists(args.model):
+        _run_module("benchmarks.make_standin_model", ["--output", args.model], dict(os.environ))
+
+    base_env = dict(os.environ)
+    base_env.update({
+        "CNN_MODEL_PATH": os.path.abspath(args.model),
+        "LLM_BACKEND": "fake",
+        "FAKE_GEMINI_LATENCY_MS": str(args.llm_latency_ms),
+        "ANSWER_CACHE_ENABLED": "0",
+        "PREDICTION_CACHE_SIZE": "0",
+    })
+
+    runs = [run_config(name, args, base_env) for name in args.configs]
+    report = {"meta": run_metadata(), "config": {k: v for k, v in vars(args).items() if k != "output"},
+              "runs": runs}
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
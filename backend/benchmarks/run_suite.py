@@ -0,0 +1,129 @@
+"""
+Reproducible end-to-end benchmark run, no GPU, weights or API key needed.
+
+1. generates the stand-in CNN (once) with benchmarks.make_standin_model
+2. runs the micro-benchmarks in-process
+3. starts uvicorn with CNN_MODEL_PATH=<stand-in> and LLM_BACKEND=fake
+4. runs the load driver for each scenario and writes one JSON file
+
+    python -m benchmarks.run_suite --output results/suite.json
+    python -m benchmarks.run_suite --output results/after.json --compare results/before.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run_module(module, args, env):
+    cmd = [sys.executable, "-m", module] + args
+    print(f"▶ {' '.join(cmd)}")
+    subprocess.run(cmd, cwd=BACKEND_DIR, env=env, check=True)
+
+
+def _wait_ready(url: str, timeout: float):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            # /ready: 200 only once the models are loaded (lifecycle.py)
+            with urllib.request.urlopen(url + "/ready", timeout=2) as r:
+                if r.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"API did not come up at {url} within {timeout:.0f}s")
+
+
+def _load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(before: dict, after: dict):
+    """Print p50/p95/p99 deltas for every benchmark present in both runs."""
+    print(f"\nComparison {before['meta']['commit']} → {after['meta']['commit']}")
+    for section in ("micro", "load"):
+        for group, old_results in before.get(section, {}).items():
+            new_results = after.get(section, {}).get(group, {})
+            for name, old in old_results.items():
+                new = new_results.get(name)
+                if not isinstance(old, dict) or not isinstance(new, dict) or "p50_ms" not in old or "p50_ms" not in new:
+                    continue
+                cells = []
+                for key in ("p50_ms", "p95_ms", "p99_ms"):
+                    delta = (new[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+                    cells.append(f"{key[:-3]} {old[key]:8.1f}→{new[key]:8.1f} ({delta:+5.1f}%)")
+                print(f"  {section}/{group}/{name:18s} " + "  ".join(cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=os.path.join("results", "suite.json"))
+    parser.add_argument("--compare", help="previous suite JSON to diff against")
+    parser.add_argument("--model", default=os.path.join("bench_data", "standin_cnn.h5"))
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--scenarios", nargs="*", default=["predict", "chat", "stream", "mixed"])
+    parser.add_argument("--llm-latency-ms", type=float, default=800)
+    args = parser.parse_args()
+
+    os.chdir(BACKEND_DIR)
+    work_dir = os.path.join("bench_data", "runs")
+    os.makedirs(work_dir, exist_ok=True)
+
+    if not os.path.exists(args.model):
+        _run_module("benchmarks.make_standin_model", ["--output", args.model], dict(os.environ))
+
+    env = dict(os.environ)
+    env.update({
+        "CNN_MODEL_PATH": os.path.abspath(args.model),
+        "LLM_BACKEND": "fake",
+        "FAKE_GEMINI_LATENCY_MS": str(args.llm_latency_ms),
+        "PYTHONHASHSEED": "0",
+    })
+
+    micro_path = os.path.join(work_dir, "micro.json")
+    _run_module("benchmarks.micro", ["--output", micro_path], env)
+    micro = _load(micro_path)
+    report = {"meta": micro["meta"], "micro": {"stages": micro["results"]}, "load": {}}
+
+    url = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    try:
+        _wait_ready(url, timeout=180)
+        for scenario in args.scenarios:
+            path = os.path.join(work_dir, f"load_{scenario}.json")
+            _run_module("benchmarks.loadtest", [
+                "--url", url, "--scenario", scenario, "--concurrency", str(args.concurrency),
+                "--duration", str(args.duration), "--output", path,
+            ], env)
+            loaded = _load(path)
+            report["load"][scenario] = loaded["results"]
+            report.setdefault("errors", {})[scenario] = loaded["errors"]
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    report["config"] = {k: v for k, v in vars(args).items() if k not in ("output", "compare")}
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Suite results written to {args.output}")
+
+    if args.compare:
+        compare(_load(args.compare), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Serialisation cost of one /chat response (3 source diseases + answer text).
+
+  response_model   what FastAPI does for a returned ChatResponse with
+                   response_model=ChatResponse: dump, re-validate against the
+                   response model, jsonable_encoder, json.dumps
+  fragments        responses.chat_body() from the disease JSON bytes prepared
+                   at index load (orjson for the answer text when installed)
+  + gzip / + br    fragments plus compression, with the compressed size
+
+Reports µs per response and the CPU it costs at --qps requests per second.
+
+    python -m benchmarks.serialization --iterations 20000 --qps 500 \\
+        --output results/serialization.json
+"""
+
+import argparse
+import gzip
+import json
+import os
+import time
+
+from benchmarks.stats import run_metadata
+from models import ChatResponse, Disease
+from record_store import disease_to_dict, record_json
+import responses
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ANSWER = (
+    "Your tomato plant shows the typical signs of early blight: brown spots with concentric rings, "
+    "starting on the older, lower leaves. Remove and destroy the affected leaves, avoid overhead "
+    "watering and keep the foliage dry. Spray a copper-based or mancozeb fungicide every 7-10 days "
+    "in humid weather, rotate crops and mulch around the base of the plants. "
+) * 4
+
+
+def _diseases(n: int):
+    with open(os.path.join(BACKEND_DIR, "data", "knowledge_data.json"), "r", encoding="utf-8") as f:
+        records = json.load(f)["diseases"][:n]
+    return [Disease(**r) for r in records]
+
+
+def _response_model_path(response: ChatResponse) -> bytes:
+    from fastapi.encoders import jsonable_encoder
+
+    validated = ChatResponse(**disease_to_dict(response))
+    return json.dumps(
+        jsonable_encoder(validated), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def _time(fn, iterations: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--diseases", type=int, default=3)
+    parser.add_argument("--qps", type=float, default=500.0)
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    diseases = _diseases(args.diseases)
+    fragments = [record_json(d) for d in diseases]   # prepared once, at index load
+    response = ChatResponse(response=ANSWER, source_diseases=diseases, language="English")
+
+    baseline_body = _response_model_path(response)
+    fast_body = responses.chat_body(ANSWER, fragments, "English")
+    assert json.loads(baseline_body) == json.loads(fast_body), "fragment body differs from response_model output"
+
+    cases = {
+        "response_model": lambda: _response_model_path(response),
+        "fragments": lambda: responses.chat_body(ANSWER, fragments, "English"),
+        "fragments+gzip": lambda: gzip.compress(responses.chat_body(ANSWER, fragments, "English"),
+                                                compresslevel=responses.RESPONSE_GZIP_LEVEL, mtime=0),
+    }
+    sizes = {"response_model": len(baseline_body), "fragments": len(fast_body),
+             "fragments+gzip": len(responses.compress(fast_body, "gzip"))}
+    if responses.brotli is not None:
+        cases["fragments+br"] = lambda: responses.compress(responses.chat_body(ANSWER, fragments, "English"), "br")
+        sizes["fragments+br"] = len(responses.compress(fast_body, "br"))
+
+    results = {}
+    baseline_us = None
+    print(f"{len(diseases)} diseases, answer {len(ANSWER)} chars, encoder: "
+          f"{'orjson' if responses.orjson is not None else 'json'}")
+    for name, fn in cases.items():
+        us = _time(fn, args.iterations)
+        baseline_us = us if baseline_us is None else baseline_us
+        results[name] = {
+            "us_per_response": us,
+            "bytes": sizes[name],
+            "cpu_cores_at_qps": us * args.qps / 1e6,
+            "saved_us_vs_response_model": baseline_us - us,
+        }
+        print(f"{name:16s} {us:8.1f} µs  {sizes[name]:6d} bytes  "
+              f"{results[name]['cpu_cores_at_qps']:.3f} cores at {args.qps:.0f} QPS")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump({"meta": run_metadata(), "config": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Startup profile: import cost of main.py and time until the API is live,
+ready and has answered its first requests, per STARTUP_MODE.
+
+1. `python -X importtime -c "import main"` in a fresh interpreter: wall time
+   of the import and the modules with the largest cumulative import time
+2. for each mode, uvicorn is started and polled:
+     live_s          first 200 from /live (process accepts HTTP)
+     ready_s         first 200 from /ready (models loaded and warmed up)
+     first_predict   latency of the first /predict-cnn after ready
+     first_chat      latency of the first /chat after ready
+
+STARTUP_MODE=eager reproduces the old behaviour (nothing is served until
+every model is loaded); background / lazy are the new defaults.
+
+    python -m benchmarks.startup --modes eager background lazy \\
+        --model bench_data/standin_cnn.h5 --output results/startup.json
+
+Uses LLM_BACKEND=fake so Gemini is not called.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from benchmarks.bench_preprocess import make_jpeg
+from benchmarks.multiworker import _stop
+from benchmarks.run_suite import BACKEND_DIR, _run_module
+from benchmarks.stats import run_metadata
+
+IMPORT_SNIPPET = (
+    "import time; t = time.perf_counter(); import main; "
+    "print(f'IMPORT_SECONDS={time.perf_counter() - t:.6f}')"
+)
+
+
+def profile_import(env: dict, top: int) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", IMPORT_SNIPPET],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    seconds = next(float(line.split("=", 1)[1]) for line in proc.stdout.splitlines()
+                   if line.startswith("IMPORT_SECONDS="))
+
+    # "import time: self [us] | cumulative | imported package"
+    modules = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, self_us, cumulative_us, name = [p.strip() for p in line.replace("import time:", "|", 1).split("|")]
+        modules.append({"module": name.strip(), "self_ms": int(self_us) / 1000,
+                        "cumulative_ms": int(cumulative_us) / 1000})
+    modules.sort(key=lambda m: m["cumulative_ms"], reverse=True)
+    return {"import_s": seconds, "modules": len(modules), "top_cumulative": modules[:top]}
+
+
+def _get(url: str) -> int:
+    try:
+        with urllib.request.urlopen(url, timeout=2) as r:
+            return r.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return 0
+
+
+def _poll(url: str, start: float, deadline: float) -> float:
+    while time.time() < deadline:
+        if _get(url) == 200:
+            return time.perf_counter() - start
+        time.sleep(0.05)
+    raise RuntimeError(f"{url} did not return 200 in time")
+
+
+def _timed_request(request: urllib.request.Request) -> dict:
+    t0 = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=120) as r:
+            r.read()
+            status = r.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    return {"status": status, "latency_ms": (time.perf_counter() - t0) * 1000}
+
+
+def _predict_request(url: str) -> urllib.request.Request:
+    boundary = "agriassist-startup-bench"
+    body = (
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"leaf.jpg\"\r\n"
+        f"Content-Type: image/jpeg\r\n\r\n"
+    ).encode() + make_jpeg(256, 256) + f"\r\n--{boundary}--\r\n".encode()
+    return urllib.request.Request(
+        url + "/predict-cnn", data=body, method="POST",
+        headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+    )
+
+
+def _chat_request(url: str) -> urllib.request.Request:
+    body = json.dumps({"message": "brown spots with rings on tomato leaves", "language": "English"}).encode()
+    return urllib.request.Request(url + "/chat", data=body, method="POST",
+                                  headers={"Content-Type": "application/json"})
+
+
+def run_mode(mode: str, args, base_env: dict) -> dict:
+    env = dict(base_env)
+    env["STARTUP_MODE"] = mode
+    url = f"http://127.0.0.1:{args.port}"
+
+    start = time.perf_counter()
+    api = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    try:
+        deadline = time.time() + args.timeout
+        live_s = _poll(url + "/live", start, deadline)
+        ready_s = _poll(url + "/ready", start, deadline)
+        with urllib.request.urlopen(url + "/ready", timeout=2) as r:
+            components = json.load(r)["components"]
+        first_predict = _timed_request(_predict_request(url))
+        first_chat = _timed_request(_chat_request(url))
+    finally:
+        _stop(api)
+
+    return {
+        "mode": mode,
+        "live_s": live_s,
+        "ready_s": ready_s,
+        "first_predict": first_predict,
+        "first_chat": first_chat,
+        "components": components,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", choices=("eager", "background", "lazy"),
+                        default=["eager", "background", "lazy"])
+    parser.add_argument("--model", default=os.path.join("bench_data", "standin_cnn.h5"))
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--top", type=int, default=15, help="modules listed in the import profile")
+    parser.add_argument("--output", default=os.path.join("results", "startup.json"))
+    args = parser.parse_args()
+
+    os.chdir(BACKEND_DIR)
+    if not os.path.exists(args.model):
+        _run_module("benchmarks.make_standin_model", ["--output", args.model], dict(os.environ))
+
+    base_env = dict(os.environ)
+    base_env.update({"CNN_MODEL_PATH": os.path.abspath(args.model), "LLM_BACKEND": "fake"})
+
+    imports = profile_import(base_env, args.top)
+    print(f"import main: {imports['import_s'] * 1000:.0f} ms ({imports['modules']} modules)")
+    for m in imports["top_cumulative"]:
+        print(f"  {m['cumulative_ms']:9.1f} ms  {m['module']}")
+
+    runs = []
+    for mode in args.modes:
+        run = run_mode(mode, args, base_env)
+        runs.append(run)
+        print(f"{mode:10s}: live {run['live_s']:6.2f}s  ready {run['ready_s']:6.2f}s  "
+              f"first predict {run['first_predict']['latency_ms']:7.1f} ms ({run['first_predict']['status']})  "
+              f"first chat {run['first_chat']['latency_ms']:7.1f} ms ({run['first_chat']['status']})")
+
+    report = {"meta": run_metadata(), "config": {k: v for k, v in vars(args).items() if k != "output"},
+              "import": imports, "runs": runs}
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
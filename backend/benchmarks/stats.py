@@ -0,0 +1,48 @@
+"""Shared helpers for benchmark result summaries."""
+
+import os
+import platform
+import subprocess
+import time
+
+
+def summarize(latencies_s, elapsed_s: float = None) -> dict:
+    """count / throughput / mean / p50 / p95 / p99 / max (latencies in seconds → ms)."""
+    values = sorted(latencies_s)
+    n = len(values)
+
+    def pct(p):
+        if not values:
+            return 0.0
+        return values[min(n - 1, int(round(p / 100.0 * (n - 1))))] * 1000.0
+
+    summary = {
+        "count": n,
+        "mean_ms": (sum(values) / n * 1000.0) if n else 0.0,
+        "p50_ms": pct(50),
+        "p95_ms": pct(95),
+        "p99_ms": pct(99),
+        "max_ms": values[-1] * 1000.0 if values else 0.0,
+    }
+    if elapsed_s:
+        summary["throughput_rps"] = n / elapsed_s
+    return summary
+
+
+def run_metadata() -> dict:
+    """Where and on what commit the numbers were taken, so runs can be compared."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except Exception:
+        commit = "unknown"
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
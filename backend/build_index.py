@@ -0,0 +1,71 @@
+# backend/build_index.py
+"""
+Offline build / training step for the knowledge index.
+
+Embeds data/knowledge_data.json plus the corpus directory, trains the
+configured ANN index (IVF-PQ needs training; HNSW and flat do not) and
+writes the index files next to the data. API workers then just open them.
+
+    python build_index.py                       # flat (default)
+    python build_index.py --index-type ivfpq --nlist 1024 --pq-m 48
+    python build_index.py --index-type hnsw --hnsw-m 32 --force
+
+Command-line options override the KB_* environment variables
+(see vector_index.py and chunking.py).
+"""
+
+import argparse
+import os
+import shutil
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--index-type", choices=("flat", "ivfpq", "hnsw"))
+    parser.add_argument("--nlist", type=int, help="IVF lists")
+    parser.add_argument("--pq-m", type=int, help="PQ sub-quantisers")
+    parser.add_argument("--pq-bits", type=int, help="bits per PQ code")
+    parser.add_argument("--hnsw-m", type=int, help="HNSW neighbours per node")
+    parser.add_argument("--train-size", type=int, help="max training vectors")
+    parser.add_argument("--corpus-dir", help="directory of extra documents")
+    parser.add_argument("--chunk-words", type=int, help="max words per passage")
+    parser.add_argument("--force", action="store_true", help="delete saved index files and re-embed everything")
+    args = parser.parse_args()
+
+    overrides = {
+        "KB_INDEX_TYPE": args.index_type,
+        "KB_IVF_NLIST": args.nlist,
+        "KB_PQ_M": args.pq_m,
+        "KB_PQ_BITS": args.pq_bits,
+        "KB_HNSW_M": args.hnsw_m,
+        "KB_TRAIN_SIZE": args.train_size,
+        "KB_CORPUS_DIR": args.corpus_dir,
+        "KB_CHUNK_WORDS": args.chunk_words,
+    }
+    for key, value in overrides.items():
+        if value is not None:
+            os.environ[key] = str(value)
+
+    if args.force:
+        data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+        for name in os.listdir(data_dir):
+            path = os.path.join(data_dir, name)
+            if not name.startswith("faiss_index"):
+                continue
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+
+    # Import after the environment is set: load() builds/updates the index
+    start = time.perf_counter()
+    from database import knowledge_base
+
+    knowledge_base.load()
+
+    print(f"⏱️ Index ready in {time.perf_counter() - start:.1f}s: {knowledge_base.index_path}")
+
+
+if __name__ == "__main__":
+    main()
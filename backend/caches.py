@@ -0,0 +1,345 @@
+# backend/caches.py
+"""
+Small in-process caches used on the request hot paths.
+
+- LRUCache:       thread-safe LRU with entry and (optional) byte budget
+- EmbeddingCache: query text → normalised embedding, optional .npz persistence
+- AnswerCache:    near-duplicate question → stored chat answer
+"""
+
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from observability import get_logger
+
+logger = get_logger("caches")
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache with hit/miss counters.
+
+    max_entries: hard cap on number of entries
+    max_bytes:   optional memory budget; `size_fn(value)` gives each entry's size
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = None, size_fn=None):
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max_bytes
+        self._size_fn = size_fn or (lambda value: 0)
+        self._data = OrderedDict()
+        self._sizes = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def peek(self, key, default=None):
+        """Lookup without touching LRU order or counters."""
+        with self._lock:
+            return self._data.get(key, default)
+
+    def put(self, key, value):
+        size = self._size_fn(value)
+        with self._lock:
+            if key in self._data:
+                self._bytes -= self._sizes.pop(key, 0)
+                del self._data[key]
+            self._data[key] = value
+            self._sizes[key] = size
+            self._bytes += size
+            self._evict_locked()
+
+    def pop(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._bytes -= self._sizes.pop(key, 0)
+            return self._data.pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self._bytes = 0
+
+    def items(self):
+        """Snapshot of (key, value) pairs, oldest first."""
+        with self._lock:
+            return list(self._data.items())
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+        }
+
+    def _evict_locked(self):
+        while len(self._data) > self.max_entries or (
+            self.max_bytes is not None and self._bytes > self.max_bytes and len(self._data) > 1
+        ):
+            key, _ = self._data.popitem(last=False)
+            self._bytes -= self._sizes.pop(key, 0)
+            self.evictions += 1
+
+
+def normalize_query(text: str) -> str:
+    """Cache key for a user question: lowercase, collapsed whitespace, no trailing punctuation."""
+    return " ".join(text.lower().split()).strip(" ?!.,;:")
+
+
+class EmbeddingCache(LRUCache):
+    """
+    LRU cache of query embeddings keyed on normalised query text.
+
+    If `path` is set, entries are loaded from / saved to a .npz file
+    (no pickle) so a restarted worker starts warm. The file also records
+    the encoder name; a file written by a different encoder is ignored.
+    Every `save_every` new entries a background thread writes the file, so
+    no request waits for it; call save() at shutdown for the rest.
+    """
+
+    def __init__(self, max_entries: int = 2048, path: str = None, encoder_name: str = "",
+                 save_every: int = 100):
+        super().__init__(max_entries=max_entries)
+        self.path = path
+        self.encoder_name = encoder_name
+        self.save_every = max(1, int(save_every))
+        self._unsaved = 0
+        self._save_lock = threading.Lock()
+        self._save_wanted = threading.Event()
+        self._saver = None
+        if self.path:
+            self.load()
+
+    def put(self, key, value):
+        super().put(key, value)
+        if self.path:
+            with self._lock:   # also taken by save(), on the saver thread
+                self._unsaved += 1
+                due = self._unsaved >= self.save_every
+            if due:
+                self._request_save()
+
+    def _request_save(self):
+        if self._saver is None:
+            with self._save_lock:
+                if self._saver is None:
+                    self._saver = threading.Thread(target=self._save_loop, name="embed-cache-saver", daemon=True)
+                    self._saver.start()
+        self._save_wanted.set()
+
+    def _save_loop(self):
+        while True:
+            self._save_wanted.wait()
+            self._save_wanted.clear()
+            try:
+                self.save()
+            except Exception as e:
+                logger.error("Error saving query cache: %s", e)
+
+    def load(self) -> int:
+        """Load persisted embeddings. Returns number of entries loaded."""
+        if not self.path or not os.path.exists(self.path):
+            return 0
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                if str(data["encoder"]) != self.encoder_name:
+                    logger.warning("Ignoring query cache %s: written by another encoder", self.path)
+                    return 0
+                keys = data["keys"]
+                vectors = data["vectors"].astype(np.float32)
+        except Exception as e:
+            logger.error("Error loading query cache: %s", e)
+            return 0
+
+        for key, vector in zip(keys[-self.max_entries:], vectors[-self.max_entries:]):
+            vec = vector.reshape(1, -1)
+            vec.setflags(write=False)
+            LRUCache.put(self, str(key), vec)
+        logger.info("Loaded %d cached query embeddings", len(self))
+        return len(self)
+
+    def save(self):
+        """Write all entries to `path` atomically."""
+        if not self.path:
+            return
+        with self._save_lock:
+            with self._lock:   # snapshot and reset together: no put() is counted but not saved
+                entries = list(self._data.items())
+                self._unsaved = 0
+            if not entries:
+                return
+            keys = np.array([k for k, _ in entries])
+            vectors = np.concatenate([v for _, v in entries], axis=0).astype(np.float32)
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp.npz"   # workers may share one path
+            try:
+                np.savez(tmp_path, keys=keys, vectors=vectors, encoder=np.array(self.encoder_name))
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                logger.error("Error saving query cache: %s", e)
+
+
+class AnswerCache:
+    """
+    Semantic cache of chat answers.
+
+    Entries are grouped by (language, cnn_prediction). A lookup compares the
+    query embedding against every stored question embedding in that group
+    (cosine similarity = dot product, embeddings are L2-normalised) and
+    returns the best stored answer if it is at least `threshold` similar.
+
+    Eviction: entries older than `ttl_seconds` are dropped, and the oldest
+    entries go first once `max_entries` is exceeded. All entries are dropped
+    when the knowledge-base fingerprint passed to lookup/store changes.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 86400, threshold: float = 0.95):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+        self.threshold = float(threshold)
+
+        self._entries = OrderedDict()   # entry_id → (group, vector, value, created), LRU order
+        self._created = OrderedDict()   # entry_id → created, insertion (= expiry) order
+        self._groups = {}               # group → {"ids": [...], "matrix": ndarray or None}
+        self._ids = itertools.count()
+        self._fingerprint = None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _group(language: str, cnn_prediction):
+        return ((language or "English").strip().lower(), cnn_prediction)
+
+    def lookup(self, embedding: np.ndarray, language: str, cnn_prediction, fingerprint=None):
+        """Return the cached value for a near-duplicate question, else None."""
+        group_key = self._group(language, cnn_prediction)
+        query = np.asarray(embedding, dtype=np.float32).reshape(-1)
+
+        with self._lock:
+            self._check_fingerprint_locked(fingerprint)
+            self._expire_locked()
+
+            group = self._groups.get(group_key)
+            if not group or not group["ids"]:
+                self.misses += 1
+                return None
+
+            if group["matrix"] is None:
+                group["matrix"] = np.stack([self._entries[i][1] for i in group["ids"]])
+
+            scores = group["matrix"] @ query
+            best = int(np.argmax(scores))
+            if float(scores[best]) < self.threshold:
+                self.misses += 1
+                return None
+
+            entry_id = group["ids"][best]
+            self._entries.move_to_end(entry_id)
+            self.hits += 1
+            return self._entries[entry_id][2]
+
+    def store(self, embedding: np.ndarray, language: str, cnn_prediction, value, fingerprint=None):
+        group_key = self._group(language, cnn_prediction)
+        vector = np.array(embedding, dtype=np.float32).reshape(-1)
+
+        with self._lock:
+            self._check_fingerprint_locked(fingerprint)
+            entry_id = next(self._ids)
+            created = time.monotonic()
+            self._entries[entry_id] = (group_key, vector, value, created)
+            self._created[entry_id] = created
+            group = self._groups.setdefault(group_key, {"ids": [], "matrix": None})
+            group["ids"].append(entry_id)
+            group["matrix"] = None
+
+            while len(self._entries) > self.max_entries:
+                self._remove_locked(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._created.clear()
+            self._groups.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+        }
+
+    # ---------- internals (lock held) ----------
+    def _check_fingerprint_locked(self, fingerprint):
+        if fingerprint is None or fingerprint == self._fingerprint:
+            return
+        if self._fingerprint is not None and self._entries:
+            self._entries.clear()
+            self._created.clear()
+            self._groups.clear()
+            self.invalidations += 1
+        self._fingerprint = fingerprint
+
+    def _expire_locked(self):
+        if self.ttl_seconds <= 0:
+            return
+        cutoff = time.monotonic() - self.ttl_seconds
+        # Oldest first: stop at the first live entry instead of scanning them all
+        while self._created:
+            entry_id, created = next(iter(self._created.items()))
+            if created >= cutoff:
+                break
+            self._remove_locked(entry_id)
+            self.evictions += 1
+
+    def _remove_locked(self, entry_id):
+        group_key = self._entries.pop(entry_id)[0]
+        self._created.pop(entry_id, None)
+        group = self._groups.get(group_key)
+        if group is None:
+            return
+        group["ids"].remove(entry_id)
+        group["matrix"] = None
+        if not group["ids"]:
+            del self._groups[group_key]
@@ -0,0 +1,166 @@
+# backend/chunking.py
+"""
+Corpus loading + passage chunking for the knowledge index.
+
+Long documents (extension bulletins, pesticide labels, regional advisories)
+are split into overlapping passages so each vector covers one focused piece
+of text instead of a whole document.
+
+Corpus directory (KB_CORPUS_DIR, default data/corpus) may contain:
+  *.jsonl   one document per line: {"id", "title", "text", "source"}
+  *.json    a list of such documents, or {"documents": [...]}
+  *.txt/md  one document per file (title = file name)
+
+Document ids must be unique across the corpus. An id used by several
+documents is namespaced with each one's file path ("<path>#<id>", plus the
+line / position if a file repeats it) and a warning is logged.
+
+Config (env):
+  KB_CHUNK_WORDS    max words per passage (default 120)
+  KB_CHUNK_OVERLAP  words repeated between neighbouring passages (default 30)
+"""
+
+import json
+import os
+import re
+from collections import Counter
+from typing import Dict, List
+
+from observability import get_logger
+
+logger = get_logger("corpus")
+
+KB_CHUNK_WORDS = int(os.getenv("KB_CHUNK_WORDS", "120"))
+KB_CHUNK_OVERLAP = int(os.getenv("KB_CHUNK_OVERLAP", "30"))
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+TEXT_EXTENSIONS = (".txt", ".md")
+
+
+def chunk_text(text: str, max_words: int = KB_CHUNK_WORDS, overlap: int = KB_CHUNK_OVERLAP,
+               prefix: str = "") -> List[str]:
+    """
+    Split text into passages of at most `max_words` words, on sentence
+    boundaries where possible, with `overlap` words carried over.
+    Text that already fits is returned unchanged as a single passage.
+    `prefix` (e.g. a document title) is prepended to every passage after the first.
+    """
+    words = text.split()
+    if len(words) <= max_words:
+        return [text]
+
+    overlap = max(0, min(overlap, max_words // 2))
+    sentences = [s.split() for s in _SENTENCE_END.split(" ".join(words)) if s.strip()]
+
+    passages = []
+    current = []
+    fresh = 0   # words in `current` not yet part of any passage
+
+    def flush():
+        nonlocal current, fresh
+        passages.append(current)
+        current = current[-overlap:] if overlap else []
+        fresh = 0
+
+    for sentence in sentences:
+        if len(current) + len(sentence) > max_words:
+            if fresh:
+                flush()
+            # Very long "sentence" (lists, tables): hard-split it
+            while len(current) + len(sentence) > max_words:
+                room = max_words - len(current)
+                current = current + sentence[:room]
+                sentence = sentence[room:]
+                fresh += room
+                flush()
+        current = current + sentence
+        fresh += len(sentence)
+
+    if fresh:
+        passages.append(current)
+
+    texts = [" ".join(p) for p in passages]
+    if prefix:
+        texts = [texts[0]] + [f"{prefix} {t}" for t in texts[1:]]
+    return texts
+
+
+def _document(doc: dict, default_id: str, source: str) -> dict:
+    return {
+        "id": str(doc.get("id") or default_id),
+        "title": str(doc.get("title") or ""),
+        "text": str(doc.get("text") or ""),
+        "source": str(doc.get("source") or source),
+    }
+
+
+def _namespace_duplicate_ids(documents: List[dict], locations: List[tuple]):
+    """Give documents that share an id a unique one: "<path>#<id>", or "<path>:<pos>#<id>" within one file."""
+    counts = Counter(d["id"] for d in documents)
+    duplicates = {doc_id for doc_id, n in counts.items() if n > 1}
+    if not duplicates:
+        return
+    per_file = Counter((rel, d["id"]) for d, (rel, _) in zip(documents, locations) if d["id"] in duplicates)
+    for doc, (rel, position) in zip(documents, locations):
+        doc_id = doc["id"]
+        if doc_id in duplicates:
+            doc["id"] = f"{rel}#{doc_id}" if per_file[(rel, doc_id)] == 1 else f"{position}#{doc_id}"
+    logger.warning("Duplicate corpus document ids, namespaced by file: %s", ", ".join(sorted(duplicates)))
+
+
+def load_corpus(corpus_dir: str) -> List[dict]:
+    """Read all documents under `corpus_dir` (sorted by path). Missing dir → []."""
+    if not corpus_dir or not os.path.isdir(corpus_dir):
+        return []
+
+    documents = []
+    locations = []   # (relative path, position id) of each document, for duplicate ids
+    for dirpath, dirnames, filenames in os.walk(corpus_dir):
+        dirnames.sort()
+        for name in sorted(filenames):
+            path = os.path.join(dirpath, name)
+            rel = os.path.relpath(path, corpus_dir).replace(os.sep, "/")
+            lower = name.lower()
+            try:
+                if lower.endswith(".jsonl"):
+                    with open(path, "r", encoding="utf-8") as f:
+                        for line_no, line in enumerate(f, 1):
+                            if line.strip():
+                                documents.append(_document(json.loads(line), f"{rel}:{line_no}", rel))
+                                locations.append((rel, f"{rel}:{line_no}"))
+                elif lower.endswith(".json"):
+                    with open(path, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                    items = data.get("documents", []) if isinstance(data, dict) else data
+                    for i, item in enumerate(items):
+                        documents.append(_document(item, f"{rel}:{i}", rel))
+                        locations.append((rel, f"{rel}:{i}"))
+                elif lower.endswith(TEXT_EXTENSIONS):
+                    with open(path, "r", encoding="utf-8") as f:
+                        text = f.read()
+                    title = os.path.splitext(name)[0].replace("_", " ")
+                    documents.append({"id": rel, "title": title, "text": text, "source": rel})
+                    locations.append((rel, rel))
+            except Exception as e:
+                logger.warning("Skipping corpus file %s: %s", rel, e)
+
+    located = [(d, location) for d, location in zip(documents, locations) if d["text"].strip()]
+    documents = [d for d, _ in located]
+    _namespace_duplicate_ids(documents, [location for _, location in located])
+    documents.sort(key=lambda d: d["id"])
+    return documents
+
+
+def corpus_fingerprint(corpus_dir: str) -> Dict[str, tuple]:
+    """(mtime, size) per corpus file – cheap change detection without reading files."""
+    stamps = {}
+    if corpus_dir and os.path.isdir(corpus_dir):
+        for dirpath, _, filenames in os.walk(corpus_dir):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                stamps[os.path.relpath(path, corpus_dir)] = (st.st_mtime_ns, st.st_size)
+    return stamps
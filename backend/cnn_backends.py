@@ -0,0 +1,148 @@
+# backend/cnn_backends.py
+"""
+Inference backends for the leaf classifier.
+
+- "keras":  tf.keras model from the .h5 file (predict_on_batch)
+- "tflite": TFLite flatbuffer run by the TFLite interpreter. Uses the small
+            `tflite_runtime` package when installed, else `tf.lite`.
+
+Convert the Keras model once, offline:
+    python cnn_backends.py convert                          # TFLITE_QUANTIZATION (int8 weights)
+    python cnn_backends.py convert --quantization float16
+
+Config (env), read by cnn_model.py:
+  CNN_BACKEND          "keras" (default) or "tflite"
+  TFLITE_QUANTIZATION  "dynamic" (default), "float16" or "none": the default for
+                       `convert` and the file the tflite backend loads
+  TFLITE_MODEL_PATH    .tflite file (default: default_tflite_path(MODEL_PATH,
+                       TFLITE_QUANTIZATION), e.g. cnn_model_final_dynamic.tflite)
+  TFLITE_NUM_THREADS   interpreter threads (default: CPU count)
+"""
+
+import argparse
+import os
+import threading
+
+import numpy as np
+
+QUANTIZATION_MODES = ("dynamic", "float16", "none")
+TFLITE_QUANTIZATION = os.getenv("TFLITE_QUANTIZATION", "dynamic").lower()
+
+
+class KerasBackend:
+    """Full TensorFlow / Keras model."""
+
+    name = "keras"
+
+    def __init__(self, model_path: str):
+        import tensorflow as tf
+
+        self.model_path = model_path
+        self.model = tf.keras.models.load_model(model_path)
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        return np.asarray(self.model.predict_on_batch(batch))
+
+
+class TFLiteBackend:
+    """TFLite interpreter; resizes the input tensor when the batch size changes."""
+
+    name = "tflite"
+
+    def __init__(self, model_path: str, num_threads: int = None):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+
+        self.model_path = model_path
+        self.num_threads = num_threads or os.cpu_count() or 1
+        self.interpreter = Interpreter(model_path=model_path, num_threads=self.num_threads)
+        self.interpreter.allocate_tensors()
+
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch_size = int(self._input["shape"][0])
+        # One interpreter = one set of tensors: serialise callers
+        self._lock = threading.Lock()
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        batch = np.ascontiguousarray(batch, dtype=self._input["dtype"])
+        with self._lock:
+            if batch.shape[0] != self._batch_size:
+                self.interpreter.resize_tensor_input(self._input["index"], batch.shape)
+                self.interpreter.allocate_tensors()
+                self._batch_size = batch.shape[0]
+            self.interpreter.set_tensor(self._input["index"], batch)
+            self.interpreter.invoke()
+            return self.interpreter.get_tensor(self._output["index"]).copy()
+
+
+def default_tflite_path(model_path: str, quantization: str = TFLITE_QUANTIZATION) -> str:
+    """Where `convert` writes (and the tflite backend looks for) the model: <base>_<quantization>.tflite."""
+    base = os.path.splitext(model_path)[0]
+    if quantization and quantization != "none":
+        return f"{base}_{quantization}.tflite"
+    return f"{base}.tflite"
+
+
+def load_backend(name: str, model_path: str, tflite_path: str = None, num_threads: int = None):
+    """Create the configured backend. Raises on unknown names or load errors."""
+    name = (name or "keras").lower()
+    if name == "keras":
+        return KerasBackend(model_path)
+    if name == "tflite":
+        return TFLiteBackend(tflite_path or default_tflite_path(model_path), num_threads)
+    raise ValueError(f"Unknown CNN backend: {name!r} (use 'keras' or 'tflite')")
+
+
+def convert_to_tflite(model_path: str, output_path: str, quantization: str = TFLITE_QUANTIZATION) -> str:
+    """
+    Export the Keras .h5 model to TFLite.
+
+    quantization:
+      "dynamic"  int8 weights, float activations (≈4x smaller, faster on CPU)
+      "float16"  float16 weights (≈2x smaller, near-identical accuracy)
+      "none"     plain float32
+    """
+    import tensorflow as tf
+
+    if quantization not in QUANTIZATION_MODES:
+        raise ValueError(f"quantization must be one of {QUANTIZATION_MODES}")
+
+    model = tf.keras.models.load_model(model_path)
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantization in ("dynamic", "float16"):
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+
+    flatbuffer = converter.convert()
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, "wb") as f:
+        f.write(flatbuffer)
+
+    print(f"✅ Wrote {quantization} TFLite model to {output_path} ({len(flatbuffer) / 1e6:.1f} MB)")
+    return output_path
+
+
+def main():
+    from cnn_model import MODEL_PATH
+
+    parser = argparse.ArgumentParser(description="Leaf classifier backend tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    convert = sub.add_parser("convert", help="export the Keras model to TFLite")
+    convert.add_argument("--model", default=MODEL_PATH, help="Keras .h5 model")
+    convert.add_argument("--output", help="output .tflite path")
+    convert.add_argument("--quantization", choices=QUANTIZATION_MODES, default=TFLITE_QUANTIZATION)
+
+    args = parser.parse_args()
+    if args.command == "convert":
+        output = args.output or default_tflite_path(args.model, args.quantization)
+        convert_to_tflite(args.model, output, args.quantization)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,98 +1,315 @@
 # backend/cnn_model.py
 
-import tensorflow as tf
 import numpy as np
-from PIL import Image
-import io
+from collections import Counter, deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+import asyncio
+import hashlib
 import os
+import queue
+import threading
+import time
 
-# Path to your trained multi-class model (.h5)
-MODEL_PATH = r"D:\cnn_model_final.h5"
-
-try:
-    print("🔍 Loading CNN model...")
-    cnn_model = tf.keras.models.load_model(MODEL_PATH)
-    print("✅ CNN model loaded successfully")
-except Exception as e:
-    print("❌ Error loading CNN model:", e)
-    cnn_model = None
-
-
-# Image size used during training
-IMG_SIZE = (150, 150)
- 
-CLASS_NAMES = [
-    "Apple Scab",                                        # 0
-    "Apple Black Rot",                                   # 1
-    "Apple Cedar Apple Rust",                            # 2
-    "Apple Healthy",                                     # 3
-    "Blueberry Healthy",                                 # 4
-    "Cherry Healthy",                                    # 5
-    "Cherry Powdery Mildew",                             # 6
-    "Corn Gray Leaf Spot",                               # 7
-    "Corn Common Rust",                                  # 8
-    "Corn Healthy",                                      # 9
-    "Corn Northern Leaf Blight",                         # 10
-    "Grape Black Rot",                                   # 11
-    "Grape Esca (Black Measles)",                        # 12
-    "Grape Healthy",                                     # 13
-    "Grape Leaf Blight (Isariopsis Leaf Spot)",          # 14
-    "Citrus Greening (Huanglongbing)",                   # 15
-    "Peach Bacterial Spot",                              # 16
-    "Peach Healthy",                                     # 17
-    "Pepper Bacterial Spot",                             # 18
-    "Pepper Healthy",                                    # 19
-    "Potato Early Blight",                               # 20
-    "Potato Healthy",                                    # 21
-    "Potato Late Blight",                                # 22
-    "Raspberry Healthy",                                 # 23
-    "Soybean Healthy",                                   # 24
-    "Squash Powdery Mildew",                             # 25
-    "Strawberry Healthy",                                # 26
-    "Strawberry Leaf Scorch",                            # 27
-    "Tomato Bacterial Spot",                             # 28
-    "Tomato Early Blight",                               # 29
-    "Tomato Healthy",                                    # 30
-    "Tomato Late Blight",                                # 31
-    "Tomato Leaf Mold",                                  # 32
-    "Tomato Septoria Leaf Spot",                         # 33
-    "Tomato Spider Mite (Two-spotted)",                  # 34
-    "Tomato Target Spot",                                # 35
-    "Tomato Mosaic Virus",                               # 36
-    "Tomato Yellow Leaf Curl Virus"                      # 37
-]
-
-
-def preprocess_image(image_bytes):
-    """Convert uploaded image bytes → preprocessed array for the model."""
-    img = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-    img = img.resize(IMG_SIZE)
-    img_array = np.array(img) / 255.0
-    img_array = np.expand_dims(img_array, axis=0)
-    return img_array
+from caches import LRUCache
+from cnn_backends import load_backend
+from compute import run_cpu
+from labels import BINARY_CLASS_INDEX, BINARY_CLASS_NAMES, CLASS_NAMES  # re-exported: cnn_model.CLASS_NAMES
+from model_client import INFERENCE_MODE, MODEL_SERVER_SOCKET, MODEL_SERVER_TIMEOUT, ModelServerError, get_client
+from observability import get_logger, timed
+# IMG_SIZE / preprocess_image are re-exported for existing callers
+from preprocessing import IMG_SIZE, load_pixels, preprocess_image, to_model_input  # noqa: F401
 
+# Path to your trained multi-class model (.h5), overridable with CNN_MODEL_PATH
+MODEL_PATH = os.getenv(
+    "CNN_MODEL_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "cnn_model_final.h5")
+)
 
-def predict_image(image_bytes):
+# Inference backend (see cnn_backends.py): "keras" or "tflite"
+CNN_BACKEND = os.getenv("CNN_BACKEND", "keras")
+TFLITE_MODEL_PATH = os.getenv("TFLITE_MODEL_PATH") or None
+TFLITE_NUM_THREADS = int(os.getenv("TFLITE_NUM_THREADS", "0")) or None
+
+logger = get_logger("cnn")
+
+# Set by load_model(); importing this module loads nothing (see lifecycle.py)
+cnn_model = None
+_load_lock = threading.Lock()
+_loaded_version = None   # model file identity at load time, reported by the model server
+
+
+def load_model():
     """
-    Run prediction using the CNN model.
+    Load the CNN backend (or connect to the model server) once and return it.
+    Raises if the model cannot be loaded; cnn_model stays None in that case.
+    """
+    global cnn_model, _loaded_version
+    with _load_lock:
+        if cnn_model is not None:
+            return cnn_model
+        if INFERENCE_MODE == "remote":
+            # The model lives in model_server.py; this worker only decodes and forwards pixels
+            cnn_model = get_client()
+            threading.Thread(target=_watch_model_version, name="cnn-model-version", daemon=True).start()
+            logger.info("CNN inference served by the model server (%s)", MODEL_SERVER_SOCKET)
+            return cnn_model
 
-    Supports:
-    - Multi-class softmax output: shape (1, N)
-    - Binary sigmoid output: shape (1, 1)
+        logger.info("Loading CNN model (%s backend)...", CNN_BACKEND)
+        model = load_backend(CNN_BACKEND, MODEL_PATH, TFLITE_MODEL_PATH, TFLITE_NUM_THREADS)
+        prediction_cache.set_model_path(model.model_path)
+        _loaded_version = _file_version(model.model_path)
+        cnn_model = model
+        logger.info("CNN model loaded from %s", model.model_path)
+        return cnn_model
 
-    Returns:
-    {
-      "prediction": <int>,          # class index or 0/1
-      "class_name": <str>,          # best text label if available
-      "confidence": <float>         # probability of predicted class
-    }
+
+def warm_up():
     """
-    if cnn_model is None:
-        return {"error": "Model not loaded"}
+    One forward pass for every padded batch size the batcher can send,
+    so no real request pays for graph tracing / tensor allocation.
+    """
+    if cnn_model is None or INFERENCE_MODE == "remote":
+        return
+    shape = (IMG_SIZE[1], IMG_SIZE[0], 3)
+    size = 1
+    while True:
+        with timed("cnn_warmup"):
+            cnn_model.predict(np.zeros((size,) + shape, dtype=np.float32))
+        if size >= MAX_BATCH_SIZE:
+            break
+        size = min(size * 2, MAX_BATCH_SIZE)
+
+
+# -------------------------------------------------
+# Dynamic micro-batching
+# -------------------------------------------------
+# Max number of images stacked into one forward pass
+MAX_BATCH_SIZE = int(os.getenv("CNN_MAX_BATCH_SIZE", "16"))
+# How long the first request of a batch waits for company (milliseconds)
+MAX_WAIT_MS = float(os.getenv("CNN_MAX_WAIT_MS", "5"))
+
+
+class BatchScheduler:
+    """
+    Collects concurrent prediction requests into one batch.
+
+    A single background thread takes the first queued request, then keeps
+    pulling requests until either `max_batch_size` is reached or
+    `max_wait_ms` has passed since that first request. The whole batch goes
+    through one `predict_fn` call and every caller gets its own output row
+    back through a `concurrent.futures.Future`.
+
+    Requests are (H, W, C) uint8 pixel arrays (see preprocessing.load_pixels).
+    The worker scales them straight into one preallocated float32 batch
+    buffer, so no per-request float tensors are allocated.
+
+    Batches are zero-padded up to the next power of two so the model only
+    ever sees a handful of distinct input shapes (no retracing per size).
+    Futures cancelled while still queued are dropped from the batch.
+    """
+
+    def __init__(self, predict_fn, max_batch_size: int = 16, max_wait_ms: float = 5.0):
+        self._predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self._queue = queue.Queue()
+        self._buffer = None   # (max_batch_size, H, W, C) float32, owned by the worker
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+        # Stats (updated only by the worker thread, read by anyone)
+        self._stats_lock = threading.Lock()
+        self._requests = 0
+        self._batches = 0
+        self._errors = 0
+        self._batch_sizes = Counter()
+        self._max_queue_depth = 0
+        self._queue_waits = deque(maxlen=2048)   # seconds spent queued
+        self._batch_times = deque(maxlen=2048)   # seconds per forward pass
+
+    # ---------- public API ----------
+    def submit(self, pixels) -> Future:
+        """Queue one (H, W, C) uint8 image. Returns a Future with its (1, N) output."""
+        self._ensure_started()
+        fut = Future()
+        self._queue.put((pixels, fut, time.perf_counter()))
+        return fut
+
+    def predict(self, pixels):
+        """Blocking helper: submit and wait for the result."""
+        return self.submit(pixels).result()
+
+    def stats(self) -> dict:
+        """Queue depth / batch size numbers for throughput vs latency tuning."""
+        with self._stats_lock:
+            waits = sorted(self._queue_waits)
+            times = sorted(self._batch_times)
+            batches = self._batches
+            requests = self._requests
+            histogram = dict(sorted(self._batch_sizes.items()))
+            errors = self._errors
+            max_depth = self._max_queue_depth
+
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "queue_depth": self._queue.qsize(),
+            "max_queue_depth": max_depth,
+            "requests": requests,
+            "batches": batches,
+            "errors": errors,
+            "avg_batch_size": (requests / batches) if batches else 0.0,
+            "batch_size_histogram": histogram,
+            "queue_wait_ms": {
+                "p50": _percentile(waits, 50) * 1000.0,
+                "p99": _percentile(waits, 99) * 1000.0,
+            },
+            "batch_time_ms": {
+                "p50": _percentile(times, 50) * 1000.0,
+                "p99": _percentile(times, 99) * 1000.0,
+            },
+        }
+
+    # ---------- worker ----------
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="cnn-batcher", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            batch = [first]
+            deadline = time.perf_counter() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    if remaining <= 0:
+                        # Deadline passed: still take whatever is already waiting
+                        batch.append(self._queue.get_nowait())
+                    else:
+                        batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            # Callers that gave up (request cancelled / timed out) cancel their future: skip them
+            batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                self._process(batch)
+            except Exception as e:
+                # Never let one bad batch kill the worker thread: every later submit would hang
+                logger.exception("CNN batch failed")
+                for _, fut, _ in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+
+    def _process(self, batch):
+        started = time.perf_counter()
+        depth = self._queue.qsize() + len(batch)
+
+        try:
+            shape = batch[0][0].shape
+            if self._buffer is None or self._buffer.shape[1:] != shape:
+                self._buffer = np.zeros((self.max_batch_size,) + shape, dtype=np.float32)
+
+            for i, (pixels, _, _) in enumerate(batch):
+                to_model_input(pixels, self._buffer[i])
+
+            padded_size = _bucket_size(len(batch), self.max_batch_size)
+            self._buffer[len(batch):padded_size] = 0.0
+            inputs = self._buffer[:padded_size]
+
+            with timed("cnn_inference"):
+                outputs = np.asarray(self._predict_fn(inputs))
+        except Exception as e:
+            for _, fut, _ in batch:
+                fut.set_exception(e)
+            with self._stats_lock:
+                self._errors += 1
+            return
+
+        for i, (_, fut, _) in enumerate(batch):
+            fut.set_result(outputs[i:i + 1])
+
+        finished = time.perf_counter()
+        with self._stats_lock:
+            self._requests += len(batch)
+            self._batches += 1
+            self._batch_sizes[len(batch)] += 1
+            self._max_queue_depth = max(self._max_queue_depth, depth)
+            self._batch_times.append(finished - started)
+            for _, _, enqueued in batch:
+                self._queue_waits.append(started - enqueued)
+
+
+def _bucket_size(n: int, max_batch_size: int) -> int:
+    """Smallest power of two >= n, capped at max_batch_size."""
+    size = 1
+    while size < n:
+        size *= 2
+    return max(n, min(size, max_batch_size))
+
+
+def _percentile(sorted_values, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = int(round((pct / 100.0) * (len(sorted_values) - 1)))
+    return sorted_values[k]
+
 
-    processed = preprocess_image(image_bytes)
-    prediction = cnn_model.predict(processed)
+def _model_forward(batch):
+    return cnn_model.predict(batch)
 
+
+batcher = BatchScheduler(_model_forward, MAX_BATCH_SIZE, MAX_WAIT_MS)
+
+
+def submit_pixels(pixels) -> Future:
+    """
+    Queue one (H, W, C) uint8 image for inference → Future with its (1, N) output.
+    In remote mode the model server batches it together with other workers' images.
+    """
+    if INFERENCE_MODE == "remote":
+        return cnn_model.submit("predict", pixels)
+    return batcher.submit(pixels)
+
+
+# A local batch always completes; a model server reply may never come
+PREDICT_TIMEOUT = MODEL_SERVER_TIMEOUT if INFERENCE_MODE == "remote" else None
+
+
+def wait_prediction(fut: Future):
+    """Blocking wait for a submit_pixels() result (bounded in remote mode)."""
+    try:
+        return fut.result(PREDICT_TIMEOUT)
+    except FutureTimeoutError:
+        fut.cancel()
+        raise ModelServerError(f"No prediction from the model server within {PREDICT_TIMEOUT:.0f}s")
+
+
+async def await_prediction(fut: Future):
+    """Async wait for a submit_pixels() result; cancels the future on timeout or cancellation."""
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(fut), PREDICT_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise ModelServerError(f"No prediction from the model server within {PREDICT_TIMEOUT:.0f}s")
+
+
+def _format_prediction(prediction):
+    """
+    Turn one model output row (shape (1, N)) into the API result dict.
+
+    "class_index" is always an index into CLASS_NAMES (None if out of range),
+    also for the legacy binary model whose "prediction" is 0 / 1.
+    """
     # Multi-class: shape (1, N) with N > 1
     if prediction.ndim == 2 and prediction.shape[1] > 1:
         probs = prediction[0]  # shape (N,)
@@ -107,6 +324,7 @@ def predict_image(image_bytes):
 
         return {
             "prediction": class_index,
+            "class_index": class_index if 0 <= class_index < len(CLASS_NAMES) else None,
             "class_name": class_name,
             "confidence": confidence,
         }
@@ -114,10 +332,253 @@ def predict_image(image_bytes):
     # Binary case: shape (1, 1) – kept for backward compatibility
     prob = float(prediction[0][0])
     label = int(prob > 0.5)
-    class_name = "Apple Scab" if label == 1 else "Healthy"
+    class_name = BINARY_CLASS_NAMES[label]
 
     return {
         "prediction": label,
+        "class_index": BINARY_CLASS_INDEX[label],
         "class_name": class_name,
         "confidence": prob,
     }
+
+
+# -------------------------------------------------
+# Prediction cache (repeated / retried uploads)
+# -------------------------------------------------
+# PREDICTION_CACHE_SIZE       max cached results (LRU)
+# PREDICTION_CACHE_MAX_BYTES  memory budget for cached results
+# PREDICTION_CACHE_PIXEL_KEYS "1" to also key on decoded 150x150 pixels,
+#                             so re-encoded copies of a photo hit too
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "4096"))
+PREDICTION_CACHE_MAX_BYTES = int(os.getenv("PREDICTION_CACHE_MAX_BYTES", str(4 * 1024 * 1024)))
+PREDICTION_CACHE_PIXEL_KEYS = os.getenv("PREDICTION_CACHE_PIXEL_KEYS", "1") == "1"
+
+
+def _result_size(result: dict) -> int:
+    """Rough memory footprint of one cached result dict (+ its key)."""
+    return 400 + len(result.get("class_name", ""))
+
+
+class PredictionCache:
+    """
+    LRU cache of prediction results keyed on content hashes.
+
+    - "b:<hash>" keys hash the raw upload bytes (exact duplicates / retries)
+    - "p:<hash>" keys hash the decoded, resized pixels (re-encoded copies)
+
+    The whole cache is dropped when the active model file changes (mtime/size
+    of `model_path`, i.e. the .h5 or .tflite in use), checked at most once per `check_interval` seconds.
+    In remote mode there is no local model file (model_path=None): the cache
+    follows the version the model server(s) report instead (set_model_version).
+    """
+
+    def __init__(self, model_path: str, max_entries: int, max_bytes: int, check_interval: float = 1.0):
+        self.model_path = model_path
+        self.check_interval = check_interval
+        self._lru = LRUCache(max_entries=max_entries, max_bytes=max_bytes, size_fn=_result_size)
+        self._model_stamp = self._stat_model()
+        self._last_check = time.monotonic()
+        self._model_version = None
+        self.invalidations = 0
+
+    @staticmethod
+    def bytes_key(image_bytes) -> str:
+        return "b:" + hashlib.blake2b(image_bytes, digest_size=16).hexdigest()
+
+    @staticmethod
+    def pixels_key(pixels: np.ndarray) -> str:
+        return "p:" + hashlib.blake2b(np.ascontiguousarray(pixels).data, digest_size=16).hexdigest()
+
+    def get(self, key: str):
+        self._check_model()
+        result = self._lru.get(key)
+        # Hand out copies so callers can't mutate cached entries
+        return dict(result) if result is not None else None
+
+    def put(self, key: str, result: dict):
+        self._lru.put(key, dict(result))
+
+    def clear(self):
+        self._lru.clear()
+
+    def stats(self) -> dict:
+        return {**self._lru.stats(), "invalidations": self.invalidations}
+
+    def set_model_path(self, model_path: str):
+        """Track the file of the model actually loaded (e.g. the .tflite)."""
+        if model_path != self.model_path:
+            self.model_path = model_path
+            self._model_stamp = self._stat_model()
+            self._lru.clear()
+
+    def set_model_version(self, version):
+        """Version reported by the model server(s); a change drops every cached result."""
+        if version != self._model_version:
+            if self._model_version is not None:
+                self._lru.clear()
+                self.invalidations += 1
+            self._model_version = version
+
+    def _stat_model(self):
+        return _file_version(self.model_path) if self.model_path else None
+
+    def _check_model(self):
+        if self.model_path is None:
+            return
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+        stamp = self._stat_model()
+        if stamp != self._model_stamp:
+            self._model_stamp = stamp
+            self._lru.clear()
+            self.invalidations += 1
+
+
+def _file_version(path: str):
+    """(mtime, size) of a model file, None if it is missing."""
+    try:
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+
+def model_version():
+    """Identity of the model this process serves: "<file>:<mtime_ns>:<size>" at load time, None if not loaded."""
+    if cnn_model is None or INFERENCE_MODE == "remote" or _loaded_version is None:
+        return None
+    return "{}:{}:{}".format(os.path.basename(cnn_model.model_path), *_loaded_version)
+
+
+def _watch_model_version():
+    """Remote mode: poll the servers' model versions so cached predictions of an old model are dropped."""
+    while True:
+        try:
+            prediction_cache.set_model_version(cnn_model.versions())
+        except Exception as e:
+            logger.debug("Model version check failed: %s", e)
+        time.sleep(MODEL_VERSION_POLL_SECONDS)
+
+
+# MODEL_VERSION_POLL_SECONDS: remote mode, how often the server's model version is checked
+MODEL_VERSION_POLL_SECONDS = float(os.getenv("MODEL_VERSION_POLL_SECONDS", "5"))
+
+prediction_cache = PredictionCache(
+    MODEL_PATH if INFERENCE_MODE != "remote" else None,
+    PREDICTION_CACHE_SIZE,
+    PREDICTION_CACHE_MAX_BYTES,
+)
+
+
+def _cached_by_pixels(pixels, bytes_key):
+    """Pixel-content lookup; on a hit also remember the new byte hash."""
+    if not PREDICTION_CACHE_PIXEL_KEYS:
+        return None, None
+    pixels_key = PredictionCache.pixels_key(pixels)
+    result = prediction_cache.get(pixels_key)
+    if result is not None:
+        prediction_cache.put(bytes_key, result)
+    return result, pixels_key
+
+
+def _remember(result, bytes_key, pixels_key):
+    prediction_cache.put(bytes_key, result)
+    if pixels_key is not None:
+        prediction_cache.put(pixels_key, result)
+
+
+def cached_prediction(image_bytes):
+    """Result for an upload seen before (byte hash only, no decode), else None."""
+    if cnn_model is None:
+        return None
+    return prediction_cache.get(PredictionCache.bytes_key(image_bytes))
+
+
+def predict_image(image_bytes):
+    """
+    Run prediction using the CNN model.
+
+    Duplicate uploads are answered from the prediction cache. Otherwise the
+    request goes through the shared micro-batcher, so concurrent callers
+    share one forward pass.
+
+    Supports:
+    - Multi-class softmax output: shape (1, N)
+    - Binary sigmoid output: shape (1, 1)
+
+    Returns:
+    {
+      "prediction": <int>,          # class index or 0/1
+      "class_name": <str>,          # best text label if available
+      "confidence": <float>         # probability of predicted class
+    }
+    """
+    if cnn_model is None:
+        return {"error": "Model not loaded"}
+
+    bytes_key = PredictionCache.bytes_key(image_bytes)
+    cached = prediction_cache.get(bytes_key)
+    if cached is not None:
+        return cached
+
+    with timed("decode"):
+        pixels = load_pixels(image_bytes)
+    cached, pixels_key = _cached_by_pixels(pixels, bytes_key)
+    if cached is not None:
+        return cached
+
+    with timed("cnn_wait"):
+        prediction = wait_prediction(submit_pixels(pixels))
+    result = _format_prediction(prediction)
+    _remember(result, bytes_key, pixels_key)
+    return result
+
+
+async def predict_image_async(image_bytes):
+    """Same as predict_image, but awaits the batch result instead of blocking."""
+    if cnn_model is None:
+        return {"error": "Model not loaded"}
+
+    bytes_key = PredictionCache.bytes_key(image_bytes)
+    cached = prediction_cache.get(bytes_key)
+    if cached is not None:
+        return cached
+
+    # Decoding/resizing is CPU work: keep it off the event loop
+    with timed("decode"):
+        pixels = await run_cpu(load_pixels, image_bytes)
+    cached, pixels_key = _cached_by_pixels(pixels, bytes_key)
+    if cached is not None:
+        return cached
+
+    # Queue wait + batched forward pass, as seen by this request
+    with timed("cnn_wait"):
+        prediction = await await_prediction(submit_pixels(pixels))
+    result = _format_prediction(prediction)
+    _remember(result, bytes_key, pixels_key)
+    return result
+
+
+def get_batch_stats() -> dict:
+    """Current micro-batching stats (queue depth, batch sizes, waits)."""
+    if INFERENCE_MODE == "remote" and cnn_model is not None:
+        # One model server: its stats; a pool: per server
+        servers = [s["batching"] for s in cnn_model.stats()]
+        return servers[0] if len(servers) == 1 else {"servers": servers}
+    return batcher.stats()
+
+
+def get_queue_depth() -> int:
+    """Images waiting for inference: this worker's batcher, or summed over the model server pool."""
+    stats = get_batch_stats()
+    if "servers" in stats:
+        return sum(s["queue_depth"] for s in stats["servers"])
+    return stats["queue_depth"]
+
+
+def get_cache_stats() -> dict:
+    """Prediction cache counters (hits, misses, bytes, invalidations)."""
+    return prediction_cache.stats()
+
@@ -0,0 +1,84 @@
+# backend/compute.py
+"""
+Bounded executors for blocking work called from async endpoints.
+
+- Thread pool: for work that needs objects living in this process
+  (SentenceTransformer, FAISS index, TensorFlow model). These libraries
+  release the GIL while they crunch numbers, so threads scale fine.
+- Process pool (optional): for pure functions on bytes / arrays, e.g.
+  image decoding. Select with COMPUTE_EXECUTOR=process.
+
+Config (env):
+  COMPUTE_EXECUTOR   "thread" (default) or "process"
+  COMPUTE_WORKERS    max workers per pool (default: min(4, CPU count))
+"""
+
+import asyncio
+import contextvars
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+COMPUTE_EXECUTOR = os.getenv("COMPUTE_EXECUTOR", "thread").lower()
+COMPUTE_WORKERS = int(os.getenv("COMPUTE_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_thread_pool = None
+_process_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_thread_pool() -> ThreadPoolExecutor:
+    global _thread_pool
+    if _thread_pool is None:
+        with _pool_lock:
+            if _thread_pool is None:
+                _thread_pool = ThreadPoolExecutor(
+                    max_workers=COMPUTE_WORKERS, thread_name_prefix="compute"
+                )
+    return _thread_pool
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        with _pool_lock:
+            if _process_pool is None:
+                _process_pool = ProcessPoolExecutor(max_workers=COMPUTE_WORKERS)
+    return _process_pool
+
+
+async def run_in_thread(func, *args, **kwargs):
+    """
+    Run a blocking call on the bounded thread pool and await its result.
+    Context variables (e.g. the request's stage timings) follow the call.
+    """
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(get_thread_pool(), partial(ctx.run, func, *args, **kwargs))
+
+
+async def run_cpu(func, *args, **kwargs):
+    """
+    Run a CPU-bound, picklable function off the event loop.
+
+    Uses the process pool when COMPUTE_EXECUTOR=process, else the thread pool.
+    `func` must be a module-level function for the process pool to work.
+    """
+    if COMPUTE_EXECUTOR != "process":
+        return await run_in_thread(func, *args, **kwargs)
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_process_pool(), partial(func, *args, **kwargs))
+
+
+def shutdown():
+    """Stop the pools (called on app shutdown)."""
+    global _thread_pool, _process_pool
+    with _pool_lock:
+        if _thread_pool is not None:
+            _thread_pool.shutdown(wait=False, cancel_futures=True)
+            _thread_pool = None
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False, cancel_futures=True)
+            _process_pool = None
@@ -1,95 +1,409 @@
 import faiss
 import numpy as np
+import hashlib
 import json
-import pickle
 import os
-from sentence_transformers import SentenceTransformer
-from typing import List, Dict
+import re
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import List, Dict, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:   # not on Windows: builds are then only serialised within one process
+    fcntl = None
+
 from models import Disease
+from caches import EmbeddingCache, normalize_query
+from encoders import EMBEDDING_MODEL_NAME, encoder_id, load_encoder
+from chunking import KB_CHUNK_OVERLAP, KB_CHUNK_WORDS, chunk_text, corpus_fingerprint, load_corpus
+from labels import CLASS_NAMES
+from record_store import DiseaseStore, RecordOverlay, RecordStore, VectorOwners, record_json, write_records
+from observability import get_logger, timed
+from vector_index import IndexConfig, configure_search, create_index, index_kind, remove_vectors
+
+logger = get_logger("knowledge")
+
+INDEX_FORMAT_VERSION = 7
+
+# Extra agronomy documents (bulletins, labels, advisories) indexed as passages
+#   KB_CORPUS_DIR: directory of corpus files (default data/corpus next to the data file)
+#   KB_OVERFETCH:  FAISS results fetched per requested hit (several passages can share a document)
+KB_CORPUS_DIR = os.getenv("KB_CORPUS_DIR", "")
+KB_OVERFETCH = int(os.getenv("KB_OVERFETCH", "4"))
+
+# Minimum cosine similarity for a search hit to count as relevant (0 keeps everything)
+KB_MIN_SCORE = float(os.getenv("KB_MIN_SCORE", "0.3"))
+
+# Open the saved FAISS index with mmap so workers share its pages (env, "1"/"0").
+# Flat / HNSW vectors need faiss >= 1.8 (IO_FLAG_MMAP_IFC); the HNSW graph is always per worker.
+KB_INDEX_MMAP = os.getenv("KB_INDEX_MMAP", "1") == "1"
+
+# Published index versions kept on disk (the current one included); older ones are deleted
+KB_INDEX_KEEP_VERSIONS = max(1, int(os.getenv("KB_INDEX_KEEP_VERSIONS", "2")))
+
+# Query embedding cache (env)
+#   EMBED_CACHE_SIZE: max cached queries (LRU eviction)
+#   EMBED_CACHE_PATH: optional .npz file so restarted workers start warm
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "2048"))
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH", "")
+
+
+def record_hash(disease: dict) -> str:
+    """Content hash of one disease record; any edit to the record changes it"""
+    payload = json.dumps(disease, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def file_hash(path: str) -> Optional[str]:
+    """sha256 of a file's bytes (None if missing)"""
+    try:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+    except OSError:
+        return None
+
+
+def document_text(disease: dict) -> str:
+    """Create comprehensive document for embedding"""
+    return f"""
+                Crop: {disease['crop']}
+                Disease: {disease['disease_name']}
+                Description: {disease['description']}
+                Causes: {disease['causes']}
+                Symptoms: {disease['symptoms']}
+                Solution: {disease['solution']}
+                Prevention: {disease['prevention']}
+                Pesticides: {', '.join([p['name'] for p in disease['pesticides']])}
+                """
+
+
+def _name_tokens(name: str) -> set:
+    return set(re.findall(r'[a-z0-9]+', name.lower()))
+
+
+def build_class_map(diseases: Dict[str, dict], min_overlap: float = 0.6) -> Dict[int, List[str]]:
+    """
+    Map each CNN class index (labels.CLASS_NAMES) to matching disease ids.
+    
+    Matching is by token overlap (Jaccard) between the class label and the
+    record's disease_name, so "Tomato Spider Mite (Two-spotted)" still finds
+    "Tomato Spider Mite (Two-Spotted Spider Mite)". "Healthy" classes map to
+    nothing. Built once per index build, not per request.
+    """
+    record_tokens = {i: _name_tokens(d['disease_name']) for i, d in diseases.items()}
+    class_map = {}
+    for class_index, label in enumerate(CLASS_NAMES):
+        label_tokens = _name_tokens(label)
+        if 'healthy' in label_tokens:
+            continue
+        
+        best_score = 0.0
+        best_ids = []
+        for disease_id, tokens in record_tokens.items():
+            score = len(label_tokens & tokens) / len(label_tokens | tokens)
+            if score > best_score:
+                best_score, best_ids = score, [disease_id]
+            elif score == best_score and score > 0:
+                best_ids.append(disease_id)
+        
+        if best_score >= min_overlap:
+            class_map[class_index] = best_ids
+    return class_map
+
+
+def disease_fragments_for(diseases_map) -> Dict[str, bytes]:
+    """
+    JSON bytes of every disease record, as it appears in API responses.
+    Records in a DiseaseStore are already stored in that form, so their bytes are used as-is.
+    """
+    if isinstance(diseases_map, DiseaseStore):
+        return {disease_id: diseases_map.raw(disease_id) for disease_id in diseases_map}
+    return {disease_id: record_json(d) for disease_id, d in diseases_map.items()}
+
+
+class KnowledgeState:
+    """
+    Everything a search needs, as one object.
+    A reload builds a new state and swaps it in with a single assignment,
+    so concurrent searches see either the old or the new index, never a mix.
+    """
+    
+    def __init__(self, index=None, vector_owner=None, diseases_map=None, records=None,
+                 next_id: int = 0, fingerprint=None, data_hash: str = None, class_map=None,
+                 passages=None, index_params=None, disease_json=None, index_type: str = None):
+        self.index = index                          # FAISS index addressed by vector id (see vector_index.py)
+        # vector id → document id (disease id or "doc:<id>")
+        self.vector_owner = vector_owner if vector_owner is not None else VectorOwners()
+        self.diseases_map = diseases_map or {}      # disease id → Disease (dict or DiseaseStore)
+        self.passages = passages or {}              # str(vector id) → corpus passage dict (RecordStore / overlay)
+        self.records = records or {}                # document id → {'hash', 'kind'}
+        self.next_id = next_id                      # next free vector id
+        self.fingerprint = fingerprint              # data file (mtime, size) this state was built from
+        self.data_hash = data_hash                  # sha256 of the data file + corpus this state was built from
+        self.class_map = class_map or {}            # CNN class index → [disease id]
+        self.index_params = index_params or {}      # configured build parameters (a change forces a rebuild)
+        self.index_type = index_type or 'flat'      # type actually built: IVF-PQ falls back to flat on little data
+        self.disease_json = disease_json or {}      # disease id → JSON bytes of the record (response fragment)
+
 
 class AgriKnowledgeBase:
-    def __init__(self, data_path: str = None):
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
-        self.diseases_map = {}
-        self.index = None
-        self.disease_texts = []
-        self.index_path = "faiss_index"
+    def __init__(self, data_path: str = None, index_dir: str = None, load: bool = True):
+        self.model = None   # query encoder, set by load()
+        self.query_cache = EmbeddingCache(
+            max_entries=EMBED_CACHE_SIZE,
+            path=EMBED_CACHE_PATH or None,
+            encoder_name=encoder_id(),
+        )
+        self._state = KnowledgeState()
+        self._reload_lock = threading.Lock()
+        self.index_config = IndexConfig.from_env()
         
         # Set default data path if not provided
         if data_path is None:
             current_dir = os.path.dirname(os.path.abspath(__file__))
             data_path = os.path.join(current_dir, "data", "knowledge_data.json")
+        self.data_path = os.path.abspath(data_path)
+        
+        # Index files live next to the data file, not in the current working directory:
+        #   faiss_index/<version>/  index.faiss, meta.json, owners.npy, records.bin, passages.bin
+        #   faiss_index/CURRENT     {"version": ...}, replaced atomically on publish
+        #   faiss_index/.lock       held by the one worker (re)building the index
+        self.index_path = os.path.join(index_dir or os.path.dirname(self.data_path), "faiss_index")
+        self.manifest_path = os.path.join(self.index_path, "CURRENT")
+        self.corpus_dir = KB_CORPUS_DIR or os.path.join(os.path.dirname(self.data_path), "corpus")
         
-        print(f"🔍 Looking for data at: {data_path}")
+        logger.info("Looking for data at: %s", self.data_path)
         
-        # Try to load existing index first
-        if not self.load_index():
-            # If no index exists, load data and create new index
-            self.load_data(data_path)
+        if load:
+            self.load()
     
-    def load_data(self, data_path: str):
-        """Load disease data and create FAISS index"""
-        try:
-            print(f"📂 Loading data from: {data_path}")
+    def load(self):
+        """Load the query encoder and the saved index (if any), bringing it up to date with the data file"""
+        if self.model is None:
+            self.model = load_encoder()
+        if self._state.index is None:
+            self.reload()
+    
+    def warm_up(self):
+        """One encoder forward pass and one FAISS search, so the first query pays no first-call overhead"""
+        embedding = np.asarray(self.model.encode(["warm up"]), dtype=np.float32)
+        faiss.normalize_L2(embedding)
+        self.retrieve_scored(embedding, 1, 1)
+    
+    @property
+    def index(self):
+        return self._state.index
+    
+    @property
+    def diseases_map(self) -> Dict[str, Disease]:
+        return self._state.diseases_map
+    
+    def load_data(self, data_path: str) -> dict:
+        """Read disease records from the data file (sample data is created if missing)"""
+        logger.info("Loading data from: %s", data_path)
+        
+        # Check if file exists
+        if not os.path.exists(data_path):
+            # Create default data if file doesn't exist
+            self.create_sample_data(data_path)
+        
+        with open(data_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def reload(self, force_rebuild: bool = False) -> dict:
+        """
+        Bring the FAISS index in line with the data file (and corpus) and swap it in atomically.
+        
+        Only added / changed documents are re-embedded; removed and changed documents
+        are deleted from the index by id. Returns a summary of what changed.
+        """
+        with self._reload_lock, self._build_lock():
+            try:
+                stamp = self._source_stamp()
+                if not os.path.exists(self.data_path):
+                    self.create_sample_data(self.data_path)
+                data_hash = self._source_hash()
+                
+                base = None
+                if not force_rebuild:
+                    base = self._state if self._state.index is not None else None
+                    if base is None or base.data_hash != data_hash:
+                        # Another worker may already have published an index for these sources
+                        published = self.load_index()
+                        if published is not None and (base is None or published.data_hash == data_hash):
+                            base = published
+                if base is not None and base.index_params != self._index_params():
+                    logger.warning("Index settings changed, rebuilding FAISS index")
+                    base = None
+                
+                if base is not None and base.data_hash == data_hash:
+                    # Sources unchanged: no JSON parsing, no Disease objects built
+                    base.fingerprint = stamp
+                    new_state = base
+                    summary = {'added': 0, 'changed': 0, 'removed': 0, 'total': len(base.records),
+                               'vectors': base.index.ntotal}
+                else:
+                    data = self.load_data(self.data_path)
+                    corpus = load_corpus(self.corpus_dir)
+                    new_state, summary = self._sync(base, data['diseases'], corpus, stamp)
+                    new_state.data_hash = data_hash
+                    version_dir = self.save_index(new_state)
+                    if version_dir:
+                        # Serve from the mmapped files: parsed records are not kept per worker
+                        self._reopen_stores(new_state, version_dir)
+                if len(new_state.disease_json) != len(new_state.diseases_map):
+                    new_state.disease_json = disease_fragments_for(new_state.diseases_map)
+                self._state = new_state
+                
+                logger.info(
+                    "Knowledge base ready: %d documents, %d vectors (+%d ~%d -%d)",
+                    summary['total'], summary['vectors'], summary['added'], summary['changed'], summary['removed'],
+                )
+                return summary
             
-            # Check if file exists
-            if not os.path.exists(data_path):
-                # Create default data if file doesn't exist
-                self.create_sample_data(data_path)
+            except Exception as e:
+                logger.error("Error loading data: %s", e)
+                raise
+    
+    def reload_if_stale(self) -> Optional[dict]:
+        """Reload only when the data file or corpus changed since the current index was built"""
+        if self._source_stamp() == self._state.fingerprint:
+            return None
+        return self.reload()
+    
+    def _index_params(self) -> dict:
+        params = self.index_config.build_params()
+        params.update(chunk_words=KB_CHUNK_WORDS, chunk_overlap=KB_CHUNK_OVERLAP)
+        return params
+    
+    def _source_stamp(self):
+        """(mtime, size) of the data file and every corpus file"""
+        return [self._data_file_stamp(), sorted(corpus_fingerprint(self.corpus_dir).items())]
+    
+    def _source_hash(self) -> str:
+        """Combined content hash of the data file and corpus files"""
+        digest = hashlib.sha256((file_hash(self.data_path) or '').encode('utf-8'))
+        for rel_path in sorted(corpus_fingerprint(self.corpus_dir)):
+            file_digest = file_hash(os.path.join(self.corpus_dir, rel_path)) or ''
+            digest.update(f"{rel_path}:{file_digest}".encode('utf-8'))
+        return digest.hexdigest()
+    
+    def _sync(self, base: Optional[KnowledgeState], diseases: List[dict], corpus: List[dict],
+              stamp) -> Tuple[KnowledgeState, dict]:
+        """Diff documents against `base` by content hash and build the updated state"""
+        documents = {}   # document id → (kind, raw record)
+        for disease in diseases:
+            documents[str(disease['id'])] = ('disease', disease)
+        for doc in corpus:
+            documents[f"doc:{doc['id']}"] = ('doc', doc)
+        hashes = {doc_id: record_hash(raw) for doc_id, (_, raw) in documents.items()}
+        disease_records = {i: raw for i, (kind, raw) in documents.items() if kind == 'disease'}
+        
+        old_records = base.records if base else {}
+        removed = [i for i in old_records if i not in hashes]
+        changed = [i for i in hashes if i in old_records and old_records[i]['hash'] != hashes[i]]
+        added = [i for i in hashes if i not in old_records]
+        
+        if base is not None and not (added or changed or removed):
+            base.fingerprint = stamp
+            base.class_map = build_class_map(disease_records)
+            return base, {'added': 0, 'changed': 0, 'removed': 0, 'total': len(hashes),
+                          'vectors': base.index.ntotal}
+        
+        # Work on a copy: the current index keeps serving searches meanwhile
+        index = faiss.clone_index(base.index) if base else None
+        vector_owner = base.vector_owner.copy() if base else VectorOwners()
+        records = dict(old_records)
+        next_id = base.next_id if base else 0
+        
+        stale_ids = []
+        for doc_id in removed + changed:
+            records.pop(doc_id)
+            stale_ids.extend(int(i) for i in vector_owner.remove_document(doc_id))
+        if stale_ids and index is not None:
+            index = remove_vectors(index, self.index_config, stale_ids, vector_owner.ids())
+        
+        # Unchanged passages stay where they are (mmapped store); only changes are held in memory
+        new_passages = {}
+        passages = RecordOverlay(base.passages if base else {}, new_passages, (str(i) for i in stale_ids))
+        
+        to_embed = changed + added
+        if to_embed:
+            chunk_texts = []
+            chunk_owner = []
+            for doc_id in to_embed:
+                kind, raw = documents[doc_id]
+                if kind == 'disease':
+                    prefix = f"{raw['crop']} {raw['disease_name']}:"
+                    chunks = chunk_text(document_text(raw), prefix=prefix)
+                else:
+                    chunks = chunk_text(raw['text'], prefix=f"{raw['title']}:" if raw['title'] else "")
+                chunk_texts.extend(chunks)
+                chunk_owner.extend([doc_id] * len(chunks))
             
-            with open(data_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            logger.info("Creating embeddings for %d passages from %d documents...", len(chunk_texts), len(to_embed))
+            embeddings = np.asarray(self.model.encode(chunk_texts), dtype=np.float32)
             
-            self.disease_texts = []
-            texts_for_embedding = []
+            # Normalize vectors for cosine similarity
+            faiss.normalize_L2(embeddings)
             
-            for disease in data['diseases']:
-                # Create comprehensive document for embedding
-                doc_text = f"""
-                Crop: {disease['crop']}
-                Disease: {disease['disease_name']}
-                Description: {disease['description']}
-                Causes: {disease['causes']}
-                Symptoms: {disease['symptoms']}
-                Solution: {disease['solution']}
-                Prevention: {disease['prevention']}
-                Pesticides: {', '.join([p['name'] for p in disease['pesticides']])}
-                """
-                
-                self.disease_texts.append({
-                    'text': doc_text,
-                    'disease_id': disease['id']
-                })
-                texts_for_embedding.append(doc_text)
-                
-                # Store in map for quick retrieval
-                self.diseases_map[disease['id']] = Disease(**disease)
+            if index is None:
+                index, index_type = create_index(embeddings.shape[1], self.index_config, embeddings)
+                logger.info("Using %s index", index_type)
             
-            # Create embeddings and FAISS index
-            if texts_for_embedding:
-                print("🔄 Creating embeddings...")
-                embeddings = self.model.encode(texts_for_embedding)
-                
-                # Create FAISS index
-                dimension = embeddings.shape[1]
-                self.index = faiss.IndexFlatIP(dimension)  # Using inner product for cosine similarity
-                
-                # Normalize vectors for cosine similarity
-                faiss.normalize_L2(embeddings)
-                self.index.add(embeddings)
-                
-                # Save index and metadata
-                self.save_index()
-                
-                print(f"✅ Loaded {len(texts_for_embedding)} disease records into FAISS database")
-                
-        except Exception as e:
-            print(f"❌ Error loading data: {e}")
-            raise
+            vector_ids = np.arange(next_id, next_id + len(chunk_texts), dtype='int64')
+            next_id += len(chunk_texts)
+            index.add_with_ids(embeddings, vector_ids)
+            
+            for doc_id in to_embed:
+                records[doc_id] = {'hash': hashes[doc_id], 'kind': documents[doc_id][0]}
+            vector_owner.add(vector_ids, chunk_owner)
+            for doc_id, vector_id, text in zip(chunk_owner, vector_ids, chunk_texts):
+                kind, raw = documents[doc_id]
+                if kind == 'doc':
+                    new_passages[str(int(vector_id))] = {
+                        'doc_id': raw['id'],
+                        'title': raw['title'],
+                        'source': raw['source'],
+                        'text': text,
+                    }
+        
+        # Reuse parsed Disease objects for unchanged records, keep data file order
+        unchanged = set(hashes) - set(to_embed)
+        diseases_map = {}
+        for disease_id, disease in disease_records.items():
+            if base is not None and disease_id in unchanged and disease_id in base.diseases_map:
+                diseases_map[disease_id] = base.diseases_map[disease_id]
+            else:
+                diseases_map[disease_id] = Disease(**disease)
+        
+        configure_search(index, self.index_config)
+        new_state = KnowledgeState(
+            index, vector_owner, diseases_map, records, next_id, stamp,
+            class_map=build_class_map(disease_records),
+            passages=passages,
+            index_params=self._index_params(),
+            index_type=index_kind(index) if index is not None else None,
+        )
+        summary = {
+            'added': len(added),
+            'changed': len(changed),
+            'removed': len(removed),
+            'total': len(hashes),
+            'vectors': index.ntotal if index is not None else 0,
+        }
+        return new_state, summary
     
     def create_sample_data(self, data_path: str):
         """Create sample data if file doesn't exist"""
-        print("📝 Creating sample knowledge data...")
+        logger.info("Creating sample knowledge data...")
         
         # Create directory if it doesn't exist
         os.makedirs(os.path.dirname(data_path), exist_ok=True)
@@ -194,71 +508,310 @@ class AgriKnowledgeBase:
         with open(data_path, 'w', encoding='utf-8') as f:
             json.dump(sample_data, f, indent=2, ensure_ascii=False)
         
-        print(f"✅ Created sample data at: {data_path}")
+        logger.info("Created sample data at: %s", data_path)
     
-    def save_index(self):
-        """Save FAISS index and metadata"""
+    @contextmanager
+    def _build_lock(self):
+        """
+        Cross-process lock around loading / building the index: the first worker
+        embeds and publishes, the others wait and then load what it published.
+        """
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(self.index_path, exist_ok=True)
+        with open(os.path.join(self.index_path, ".lock"), 'a') as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    
+    def save_index(self, state: KnowledgeState = None) -> Optional[str]:
+        """
+        Publish FAISS index, metadata (JSON), disease records and corpus passages
+        (offset-indexed files) as a new version directory, then switch CURRENT to it
+        with one os.replace. Readers see the old or the new version, never a mix.
+        Returns the version directory, or None if nothing was saved.
+        """
+        state = state or self._state
+        if state.index is None:
+            return None
+        version = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        version_dir = os.path.join(self.index_path, version)
         try:
-            if self.index:
-                faiss.write_index(self.index, f"{self.index_path}.faiss")
-                with open(f"{self.index_path}_meta.pkl", 'wb') as f:
-                    pickle.dump({
-                        'disease_texts': self.disease_texts,
-                        'diseases_map': self.diseases_map
-                    }, f)
-                print("✅ FAISS index saved successfully")
+            os.makedirs(version_dir)
+            faiss.write_index(state.index, os.path.join(version_dir, "index.faiss"))
+            state.vector_owner.save(os.path.join(version_dir, "owners.npy"))
+            write_records(os.path.join(version_dir, "records.bin"), state.diseases_map)
+            write_records(os.path.join(version_dir, "passages.bin"), state.passages)
+            with open(os.path.join(version_dir, "meta.json"), 'w', encoding='utf-8') as f:
+                json.dump({
+                    'version': INDEX_FORMAT_VERSION,
+                    'embedding_model': EMBEDDING_MODEL_NAME,
+                    'index_params': state.index_params,
+                    'index_type': state.index_type,
+                    'ntotal': state.index.ntotal,
+                    'data_hash': state.data_hash,
+                    'next_id': state.next_id,
+                    'records': state.records,
+                    'documents': state.vector_owner.documents,   # ordinals used in owners.npy
+                    'class_map': {str(k): v for k, v in state.class_map.items()},
+                }, f)
+            
+            tmp_manifest = f"{self.manifest_path}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp"
+            with open(tmp_manifest, 'w', encoding='utf-8') as f:
+                json.dump({'version': version}, f)
+            os.replace(tmp_manifest, self.manifest_path)
+            logger.info("FAISS index saved (version %s)", version)
         except Exception as e:
-            print(f"❌ Error saving index: {e}")
+            logger.error("Error saving index: %s", e)
+            shutil.rmtree(version_dir, ignore_errors=True)
+            return None
+        self._prune_versions(version)
+        return version_dir
+    
+    def _prune_versions(self, current: str):
+        """Delete all but the newest KB_INDEX_KEEP_VERSIONS versions (open mmaps of deleted files stay valid)"""
+        versions = sorted(
+            (name for name in os.listdir(self.index_path)
+             if name != current and os.path.isdir(os.path.join(self.index_path, name))),
+            reverse=True,   # names start with the publish time
+        )
+        for name in versions[KB_INDEX_KEEP_VERSIONS - 1:]:
+            shutil.rmtree(os.path.join(self.index_path, name), ignore_errors=True)
     
-    def load_index(self):
-        """Load FAISS index and metadata if exists"""
+    def _current_version_dir(self) -> Optional[str]:
+        """Directory of the published index version, None if nothing was published yet"""
         try:
-            if os.path.exists(f"{self.index_path}.faiss") and os.path.exists(f"{self.index_path}_meta.pkl"):
-                print("📥 Loading existing FAISS index...")
-                self.index = faiss.read_index(f"{self.index_path}.faiss")
-                with open(f"{self.index_path}_meta.pkl", 'rb') as f:
-                    data = pickle.load(f)
-                    self.disease_texts = data['disease_texts']
-                    self.diseases_map = data['diseases_map']
-                print("✅ Loaded existing FAISS index")
-                return True
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                version_dir = os.path.join(self.index_path, json.load(f)['version'])
+        except (OSError, ValueError, KeyError):
+            return None
+        return version_dir if os.path.isdir(version_dir) else None
+    
+    def _reopen_stores(self, state: KnowledgeState, version_dir: str):
+        state.diseases_map = DiseaseStore(os.path.join(version_dir, "records.bin"))
+        state.passages = RecordStore(os.path.join(version_dir, "passages.bin"), memoize=False)
+    
+    def load_index(self) -> Optional[KnowledgeState]:
+        """Load the published FAISS index and metadata; None if missing, outdated or inconsistent"""
+        version_dir = self._current_version_dir()
+        if version_dir is None:
+            return None
+        index_file = os.path.join(version_dir, "index.faiss")
+        meta_file = os.path.join(version_dir, "meta.json")
+        owners_file = os.path.join(version_dir, "owners.npy")
+        records_file = os.path.join(version_dir, "records.bin")
+        passages_file = os.path.join(version_dir, "passages.bin")
+        try:
+            if all(os.path.exists(p) for p in (index_file, meta_file, owners_file, records_file, passages_file)):
+                logger.info("Loading existing FAISS index (%s)...", os.path.basename(version_dir))
+                with open(meta_file, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+                
+                if (meta.get('version') != INDEX_FORMAT_VERSION
+                        or meta.get('embedding_model') != EMBEDDING_MODEL_NAME):
+                    logger.warning("Saved FAISS index is outdated, rebuilding")
+                    return None
+                
+                index_type = meta.get('index_type') or (meta.get('index_params') or {}).get('index_type', 'flat')
+                index = self._read_index(index_file, index_type)
+                configure_search(index, self.index_config)
+                diseases = DiseaseStore(records_file)
+                vector_owner = VectorOwners.load(owners_file, meta['documents'])
+                n_diseases = sum(1 for r in meta['records'].values() if r['kind'] == 'disease')
+                if (meta.get('ntotal') != index.ntotal or len(vector_owner) != index.ntotal
+                        or len(diseases) != n_diseases):
+                    logger.warning("Saved FAISS index is inconsistent, rebuilding")
+                    return None
+                
+                logger.info("Loaded existing FAISS index")
+                return KnowledgeState(
+                    index=index,
+                    vector_owner=vector_owner,
+                    diseases_map=diseases,
+                    records=meta['records'],
+                    next_id=meta['next_id'],
+                    data_hash=meta.get('data_hash'),
+                    class_map={int(k): v for k, v in meta['class_map'].items()},
+                    passages=RecordStore(passages_file, memoize=False),
+                    index_params=meta.get('index_params'),
+                    index_type=index_type,
+                )
         except Exception as e:
-            print(f"❌ Error loading index: {e}")
-        return False
+            logger.error("Error loading index: %s", e)
+        return None
+    
+    @staticmethod
+    def _read_index(index_file: str, index_type: str = "flat"):
+        """
+        Open the index memory-mapped (shared page cache) with the flag FAISS needs for this index type:
+        IO_FLAG_MMAP maps IVF inverted lists only, flat codes (flat, HNSW storage) need IO_FLAG_MMAP_IFC.
+        Falls back to reading the whole index into this worker's memory.
+        """
+        if KB_INDEX_MMAP:
+            if index_type == "ivfpq":
+                flag = faiss.IO_FLAG_MMAP
+            else:
+                flag = getattr(faiss, "IO_FLAG_MMAP_IFC", None)
+                if flag is None:
+                    logger.warning("faiss < 1.8 cannot mmap a %s index: every worker loads its own copy", index_type)
+            if flag is not None:
+                try:
+                    return faiss.read_index(index_file, flag | faiss.IO_FLAG_READ_ONLY)
+                except Exception as e:
+                    logger.warning("Memory-mapped index read failed (%s), loading it into memory", e)
+        return faiss.read_index(index_file)
     
     def search_diseases(self, query: str, n_results: int = 3) -> List[Disease]:
         """Search for diseases based on query using semantic search"""
+        return self.search_with_embedding(query, n_results)[0]
+    
+    def search_diseases_scored(self, query: str, n_results: int = 3,
+                               min_score: float = KB_MIN_SCORE) -> List[Tuple[Disease, float]]:
+        """Like search_diseases, with the cosine similarity of each hit"""
+        return self.retrieve_scored(self.encode_query(query), n_results, 0, min_score)[0]
+    
+    def search_with_embedding(self, query: str, n_results: int = 3) -> Tuple[List[Disease], Optional[np.ndarray]]:
+        """Semantic search that also returns the query embedding (reused by the answer cache)"""
+        diseases, _, query_embedding = self.search_all(query, n_results, 0)
+        return diseases, query_embedding
+    
+    def search_all(self, query: str, n_diseases: int = 3,
+                   n_passages: int = 0) -> Tuple[List[Disease], List[dict], Optional[np.ndarray]]:
+        """Encode the query once, return (diseases, corpus passages, query embedding)"""
         try:
-            if not self.index:
-                print("❌ No FAISS index available")
-                return []
+            if self._state.index is None or self._state.index.ntotal == 0:
+                logger.warning("No FAISS index available")
+                return [], [], None
             
-            print(f"🔍 Searching for: '{query}'")
+            logger.debug("Searching for: %r", query)
             
-            # Encode query
-            query_embedding = self.model.encode([query])
-            faiss.normalize_L2(query_embedding)
+            # Encode query (cached)
+            query_embedding = self.encode_query(query)
             
-            # Search
-            distances, indices = self.index.search(query_embedding, n_results)
+            found_diseases, found_passages = self.retrieve(query_embedding, n_diseases, n_passages)
+            logger.debug("Found %d relevant diseases, %d passages", len(found_diseases), len(found_passages))
+            return found_diseases, found_passages, query_embedding
             
-            found_diseases = []
-            for i, idx in enumerate(indices[0]):
-                if idx < len(self.disease_texts) and idx >= 0:
-                    disease_id = self.disease_texts[idx]['disease_id']
-                    if disease_id in self.diseases_map:
-                        found_diseases.append(self.diseases_map[disease_id])
+        except Exception as e:
+            logger.error("Error searching diseases: %s", e)
+            return [], [], None
+    
+    def search_by_embedding(self, query_embedding: np.ndarray, n_results: int = 3) -> List[Disease]:
+        """FAISS search for an already-encoded, normalised (1, dim) query"""
+        return self.retrieve(query_embedding, n_results, 0)[0]
+    
+    def search_passages(self, query_embedding: np.ndarray, n_results: int = 3) -> List[dict]:
+        """Top corpus passages ({'doc_id', 'title', 'source', 'text', 'score'}) for a query"""
+        return self.retrieve(query_embedding, 0, n_results)[1]
+    
+    def retrieve(self, query_embedding: np.ndarray, n_diseases: int = 3, n_passages: int = 0,
+                 min_score: float = KB_MIN_SCORE) -> Tuple[List[Disease], List[dict]]:
+        """One FAISS search → (top diseases, top corpus passages), deduplicated per document"""
+        scored, passages = self.retrieve_scored(query_embedding, n_diseases, n_passages, min_score)
+        return [d for d, _ in scored], passages
+    
+    def retrieve_scored(self, query_embedding: np.ndarray, n_diseases: int = 3, n_passages: int = 0,
+                        min_score: float = KB_MIN_SCORE) -> Tuple[List[Tuple[Disease, float]], List[dict]]:
+        """
+        retrieve() with scores: ([(disease, similarity)], passages with 'score').
+        Hits below min_score are dropped, so an unrelated question gets no context.
+        """
+        state = self._state  # one consistent snapshot for the whole search
+        if state.index is None or state.index.ntotal == 0 or (n_diseases + n_passages) <= 0:
+            return [], []
+        
+        k = min(state.index.ntotal, (n_diseases + n_passages) * KB_OVERFETCH)
+        with timed("faiss_search"):
+            scores, vector_ids = state.index.search(query_embedding, k)
+        
+        found_diseases = []
+        found_passages = []
+        seen = set()
+        for vector_id, score in zip(vector_ids[0], scores[0]):
+            if vector_id < 0:
+                continue
+            if score < min_score:
+                break   # results are sorted by similarity
+            doc_id = state.vector_owner.get(int(vector_id))
+            if doc_id is None or doc_id in seen:
+                continue
             
-            print(f"✅ Found {len(found_diseases)} relevant diseases")
-            return found_diseases
+            if doc_id in state.diseases_map:
+                if len(found_diseases) < n_diseases:
+                    seen.add(doc_id)
+                    found_diseases.append((state.diseases_map[doc_id], float(score)))
+            elif len(found_passages) < n_passages and str(vector_id) in state.passages:
+                seen.add(doc_id)
+                found_passages.append({**state.passages[str(vector_id)], 'score': float(score)})
             
-        except Exception as e:
-            print(f"❌ Error searching diseases: {e}")
+            if len(found_diseases) >= n_diseases and len(found_passages) >= n_passages:
+                break
+        return found_diseases, found_passages
+    
+    def diseases_for_class(self, class_index: Optional[int]) -> List[Disease]:
+        """Disease records matching a CNN class index (O(1), no embedding); [] if none"""
+        state = self._state
+        if class_index is None:
             return []
+        return [state.diseases_map[i] for i in state.class_map.get(class_index, []) if i in state.diseases_map]
+    
+    def disease_fragments(self, diseases: List[Disease]) -> List[bytes]:
+        """Pre-serialised JSON of each disease (serialised now only if it isn't the current record)"""
+        state = self._state
+        fragments = []
+        for disease in diseases:
+            fragment = state.disease_json.get(disease.id)
+            if fragment is None or state.diseases_map.get(disease.id) is not disease:
+                # e.g. a cached answer from before a reload: its own version of the record
+                fragment = record_json(disease)
+            fragments.append(fragment)
+        return fragments
+    
+    def data_fingerprint(self) -> Optional[str]:
+        """
+        Content hash of the data file and corpus files the served index was built from.
+        
+        Changes exactly when a reload swaps in different knowledge (in-place corpus edits
+        included); no stat calls, so it is free per request. None before the first load.
+        """
+        return self._state.data_hash
+    
+    def _data_file_stamp(self):
+        """(mtime, size) of the knowledge data file, None if missing"""
+        try:
+            st = os.stat(self.data_path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+    
+    def encode_query(self, query: str) -> np.ndarray:
+        """Normalised (1, dim) float32 embedding for a query, served from the LRU cache when possible"""
+        key = normalize_query(query)
+        cached = self.query_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        with timed("embed"):
+            embedding = np.asarray(self.model.encode([key]), dtype=np.float32)
+        faiss.normalize_L2(embedding)
+        embedding.setflags(write=False)
+        self.query_cache.put(key, embedding)
+        return embedding
+    
+    def cached_query_embedding(self, query: str) -> Optional[np.ndarray]:
+        """Query embedding only if it is already cached (never runs the encoder, no hit/miss counted)"""
+        return self.query_cache.peek(normalize_query(query))
+    
+    def save_query_cache(self):
+        """Persist cached query embeddings (no-op without EMBED_CACHE_PATH)"""
+        self.query_cache.save()
     
     def get_all_diseases(self) -> List[Disease]:
         """Get all diseases in the database"""
-        return list(self.diseases_map.values())
+        return [self.diseases_map[i] for i in self.diseases_map]
 
-# Global instance
-knowledge_base = AgriKnowledgeBase()
+# Global instance; the encoder and index are loaded by knowledge_base.load() (see lifecycle.py)
+knowledge_base = AgriKnowledgeBase(load=False)
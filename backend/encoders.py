@@ -0,0 +1,227 @@
+# backend/encoders.py
+"""
+Sentence encoder used for the knowledge base.
+
+INFERENCE_MODE=local loads the encoder in this process;
+INFERENCE_MODE=remote sends texts to the shared model server instead.
+
+Local encoder backends (KB_ENCODER):
+  "torch" (default)  SentenceTransformer('all-MiniLM-L6-v2') on PyTorch
+  "onnx"             the same model exported to ONNX with int8 weights, run
+                     with onnxruntime and the Rust `tokenizers` tokenizer.
+                     No PyTorch / transformers import: loads in a fraction of
+                     the time and memory, and encodes queries faster on CPU.
+
+Create the ONNX files once (needs torch + sentence-transformers + onnxruntime):
+
+    python encoders.py export --output data/encoder
+
+then run with KB_ENCODER=onnx. `python -m benchmarks.encoder_parity` checks
+that FAISS top-k results match the float model before switching.
+
+The index stays tagged with EMBEDDING_MODEL_NAME, so switching KB_ENCODER
+does not force a rebuild; the query embedding cache is keyed per backend.
+
+Config (env):
+  KB_ENCODER            "torch" (default) or "onnx"
+  KB_ENCODER_DIR        directory with model.onnx + tokenizer.json (default: data/encoder)
+  KB_ENCODER_THREADS    onnxruntime intra-op threads (default: onnxruntime's choice)
+"""
+
+import argparse
+import json
+import os
+from collections import OrderedDict
+from threading import Lock
+
+import numpy as np
+
+from model_client import INFERENCE_MODE, RemoteEncoder, get_client
+
+EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2'
+
+KB_ENCODER = os.getenv("KB_ENCODER", "torch").lower()
+KB_ENCODER_DIR = os.getenv(
+    "KB_ENCODER_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "encoder")
+)
+KB_ENCODER_THREADS = int(os.getenv("KB_ENCODER_THREADS", "0")) or None
+
+ONNX_MODEL_FILE = "model.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+CONFIG_FILE = "encoder_config.json"
+
+
+def encoder_id(backend: str = KB_ENCODER) -> str:
+    """Identifies the vectors an encoder produces (used to key the query cache)."""
+    return EMBEDDING_MODEL_NAME if backend == "torch" else f"{EMBEDDING_MODEL_NAME}+onnx-int8"
+
+
+class OnnxEncoder:
+    """
+    int8 ONNX export of the sentence encoder: tokenize → transformer → mean pooling → L2 normalise,
+    the same pipeline SentenceTransformer runs for all-MiniLM-L6-v2.
+    """
+
+    def __init__(self, model_dir: str = KB_ENCODER_DIR, num_threads: int = KB_ENCODER_THREADS,
+                 token_cache_size: int = 4096):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        with open(os.path.join(model_dir, CONFIG_FILE), "r", encoding="utf-8") as f:
+            config = json.load(f)
+        self.max_seq_length = int(config.get("max_seq_length", 256))
+        self.normalize = bool(config.get("normalize", True))
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(self.max_seq_length)
+        self.tokenizer.no_padding()   # padding is done per batch below
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, ONNX_MODEL_FILE), options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+        # Token ids of recent texts: repeated / near-duplicate queries skip the tokenizer
+        self._token_cache = OrderedDict()
+        self._token_cache_size = token_cache_size
+        self._token_lock = Lock()
+
+    def _token_ids(self, texts):
+        out = [None] * len(texts)
+        missing = []
+        with self._token_lock:
+            for i, text in enumerate(texts):
+                ids = self._token_cache.get(text)
+                if ids is not None:
+                    self._token_cache.move_to_end(text)
+                    out[i] = ids
+                else:
+                    missing.append(i)
+        if missing:
+            encodings = self.tokenizer.encode_batch([texts[i] for i in missing])
+            with self._token_lock:
+                for i, enc in zip(missing, encodings):
+                    out[i] = enc.ids
+                    self._token_cache[texts[i]] = enc.ids
+                while len(self._token_cache) > self._token_cache_size:
+                    self._token_cache.popitem(last=False)
+        return out
+
+    def encode(self, texts, batch_size: int = 64, **kwargs) -> np.ndarray:
+        texts = [texts] if isinstance(texts, str) else list(texts)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        # Sort by length so each batch pads to a similar length
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        results = [None] * len(texts)
+        for start in range(0, len(order), batch_size):
+            idx = order[start:start + batch_size]
+            ids = self._token_ids([texts[i] for i in idx])
+            width = max(len(x) for x in ids)
+            input_ids = np.zeros((len(ids), width), dtype=np.int64)
+            attention = np.zeros((len(ids), width), dtype=np.int64)
+            for row, x in enumerate(ids):
+                input_ids[row, :len(x)] = x
+                attention[row, :len(x)] = 1
+
+            feed = {"input_ids": input_ids, "attention_mask": attention}
+            if "token_type_ids" in self._input_names:
+                feed["token_type_ids"] = np.zeros_like(input_ids)
+            hidden = self.session.run(None, feed)[0]   # (batch, tokens, dim)
+
+            mask = attention[..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            if self.normalize:
+                pooled /= np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+            for row, i in enumerate(idx):
+                results[i] = pooled[row]
+        return np.stack(results).astype(np.float32)
+
+
+def load_local_encoder(backend: str = KB_ENCODER):
+    if backend == "onnx":
+        return OnnxEncoder()
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(EMBEDDING_MODEL_NAME)
+
+
+def load_encoder():
+    """Object with .encode(list_of_texts) → (n, dim) array."""
+    if INFERENCE_MODE == "remote":
+        return RemoteEncoder(get_client())
+    return load_local_encoder()
+
+
+def export_onnx(output_dir: str, quantize: bool = True, opset: int = 14) -> str:
+    """Export the SentenceTransformer to ONNX (+ dynamic int8 quantisation) and save its tokenizer."""
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    os.makedirs(output_dir, exist_ok=True)
+    st = SentenceTransformer(EMBEDDING_MODEL_NAME, device="cpu")
+    transformer = st[0].auto_model.eval()
+    tokenizer = st.tokenizer
+
+    sample = tokenizer(["brown spots on tomato leaves"], return_tensors="pt")
+    input_names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+    float_path = os.path.join(output_dir, "model.float.onnx")
+    dynamic = {n: {0: "batch", 1: "tokens"} for n in input_names}
+    dynamic["last_hidden_state"] = {0: "batch", 1: "tokens"}
+
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(sample[n] for n in input_names),
+            float_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic,
+            opset_version=opset,
+        )
+
+    model_path = os.path.join(output_dir, ONNX_MODEL_FILE)
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(float_path, model_path, weight_type=QuantType.QInt8)
+        os.remove(float_path)
+    else:
+        os.replace(float_path, model_path)
+
+    tokenizer.backend_tokenizer.save(os.path.join(output_dir, TOKENIZER_FILE))
+    normalize = any(type(m).__name__ == "Normalize" for m in st)
+    with open(os.path.join(output_dir, CONFIG_FILE), "w", encoding="utf-8") as f:
+        json.dump({
+            "model": EMBEDDING_MODEL_NAME,
+            "max_seq_length": st.max_seq_length,
+            "pooling": "mean",
+            "normalize": normalize,
+            "quantized": quantize,
+        }, f, indent=2)
+
+    size_mb = os.path.getsize(model_path) / 1e6
+    print(f"✅ Wrote {'int8' if quantize else 'float'} ONNX encoder to {model_path} ({size_mb:.1f} MB)")
+    return model_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sentence encoder tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="export the encoder to (int8) ONNX")
+    export.add_argument("--output", default=KB_ENCODER_DIR)
+    export.add_argument("--no-quantize", action="store_true", help="keep float32 weights")
+    export.add_argument("--opset", type=int, default=14)
+
+    args = parser.parse_args()
+    if args.command == "export":
+        export_onnx(args.output, quantize=not args.no_quantize, opset=args.opset)
+
+
+if __name__ == "__main__":
+    main()
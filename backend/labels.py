@@ -0,0 +1,73 @@
+# backend/labels.py
+"""
+Output classes of the leaf classifier (index → label).
+
+Kept separate from cnn_model.py so the knowledge base and prompt code can
+use the labels without loading the model.
+"""
+
+from typing import Optional
+
+CLASS_NAMES = [
+    "Apple Scab",                                        # 0
+    "Apple Black Rot",                                   # 1
+    "Apple Cedar Apple Rust",                            # 2
+    "Apple Healthy",                                     # 3
+    "Blueberry Healthy",                                 # 4
+    "Cherry Healthy",                                    # 5
+    "Cherry Powdery Mildew",                             # 6
+    "Corn Gray Leaf Spot",                               # 7
+    "Corn Common Rust",                                  # 8
+    "Corn Healthy",                                      # 9
+    "Corn Northern Leaf Blight",                         # 10
+    "Grape Black Rot",                                   # 11
+    "Grape Esca (Black Measles)",                        # 12
+    "Grape Healthy",                                     # 13
+    "Grape Leaf Blight (Isariopsis Leaf Spot)",          # 14
+    "Citrus Greening (Huanglongbing)",                   # 15
+    "Peach Bacterial Spot",                              # 16
+    "Peach Healthy",                                     # 17
+    "Pepper Bacterial Spot",                             # 18
+    "Pepper Healthy",                                    # 19
+    "Potato Early Blight",                               # 20
+    "Potato Healthy",                                    # 21
+    "Potato Late Blight",                                # 22
+    "Raspberry Healthy",                                 # 23
+    "Soybean Healthy",                                   # 24
+    "Squash Powdery Mildew",                             # 25
+    "Strawberry Healthy",                                # 26
+    "Strawberry Leaf Scorch",                            # 27
+    "Tomato Bacterial Spot",                             # 28
+    "Tomato Early Blight",                               # 29
+    "Tomato Healthy",                                    # 30
+    "Tomato Late Blight",                                # 31
+    "Tomato Leaf Mold",                                  # 32
+    "Tomato Septoria Leaf Spot",                         # 33
+    "Tomato Spider Mite (Two-spotted)",                  # 34
+    "Tomato Target Spot",                                # 35
+    "Tomato Mosaic Virus",                               # 36
+    "Tomato Yellow Leaf Curl Virus"                      # 37
+]
+
+# Legacy single-sigmoid model: one output, the probability of class 1
+BINARY_CLASS_NAMES = ["Healthy", "Apple Scab"]
+# ...and the same two labels as CLASS_NAMES indexes (it was trained on apple leaves)
+BINARY_CLASS_INDEX = [CLASS_NAMES.index("Apple Healthy"), CLASS_NAMES.index("Apple Scab")]
+
+
+def class_label(class_index: Optional[int]) -> Optional[str]:
+    """Label for a class index, or None if the index is unknown."""
+    if class_index is None or not 0 <= class_index < len(CLASS_NAMES):
+        return None
+    return CLASS_NAMES[class_index]
+
+
+def is_healthy_class(class_index: Optional[int]) -> bool:
+    label = class_label(class_index)
+    return label is not None and "healthy" in label.lower()
+
+
+def class_crop(class_index: Optional[int]) -> Optional[str]:
+    """Crop part of the label, e.g. "Tomato" for "Tomato Healthy"."""
+    label = class_label(class_index)
+    return label.split()[0] if label else None
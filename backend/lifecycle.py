@@ -0,0 +1,196 @@
+# backend/lifecycle.py
+"""
+Background / lazy initialisation of the heavy subsystems (CNN, knowledge
+base, Gemini client) and the readiness state reported by /live and /ready.
+
+Importing main.py loads no model. Each subsystem is a Component with a
+loader (and an optional warm-up); STARTUP_MODE decides when loaders run:
+  "background" (default)  every loader starts in its own thread at app startup;
+                          the server answers /live at once, /ready when loaded
+  "eager"                 app startup waits until every component is loaded
+  "lazy"                  a component loads on the first request that needs it
+
+A request that needs a component which is still loading waits up to
+STARTUP_WAIT_SECONDS, then gets 503 with Retry-After. A component whose
+loader failed stays "failed" (with the error) until the process restarts.
+
+Config (env):
+  STARTUP_MODE           "background" (default), "eager" or "lazy"
+  STARTUP_WAIT_SECONDS   max time a request waits for a loading component (default: 10)
+  STARTUP_RETRY_AFTER    Retry-After seconds sent while loading (default: 5)
+  STARTUP_WARMUP         "1" (default) runs warm-up inference before a component is ready
+  READY_COMPONENTS       components /ready waits for (default: "cnn,knowledge_base")
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Iterable, Optional
+
+from observability import get_logger
+
+STARTUP_MODE = os.getenv("STARTUP_MODE", "background").lower()
+STARTUP_WAIT_SECONDS = float(os.getenv("STARTUP_WAIT_SECONDS", "10"))
+STARTUP_RETRY_AFTER = int(os.getenv("STARTUP_RETRY_AFTER", "5"))
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "1") == "1"
+READY_COMPONENTS = [c.strip() for c in os.getenv("READY_COMPONENTS", "cnn,knowledge_base").split(",") if c.strip()]
+
+PENDING = "pending"
+LOADING = "loading"
+WARMING_UP = "warming_up"
+READY = "ready"
+FAILED = "failed"
+
+logger = get_logger("lifecycle")
+
+
+class ComponentUnavailableError(RuntimeError):
+    """A request needs a component that is not ready (yet)."""
+
+    def __init__(self, name: str, state: str, error: str = None):
+        self.name = name
+        self.state = state
+        # Worth retrying only while the component is still on its way up
+        self.retry_after = STARTUP_RETRY_AFTER if state in (PENDING, LOADING, WARMING_UP) else None
+        detail = f"{name} not ready ({state})"
+        super().__init__(f"{detail}: {error}" if error else detail)
+
+
+class Component:
+    """One heavy subsystem: loader + optional warm-up, run at most once in a background thread."""
+
+    def __init__(self, name: str, loader: Callable[[], object], warmup: Optional[Callable[[], object]] = None):
+        self.name = name
+        self._loader = loader
+        self._warmup = warmup
+        self.state = PENDING
+        self.error = None
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self._future = Future()
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.state == READY
+
+    def start(self) -> bool:
+        """Start loading in a daemon thread; False if it was already started."""
+        with self._lock:
+            if self.state != PENDING:
+                return False
+            self.state = LOADING
+        threading.Thread(target=self._run, name=f"load-{self.name}", daemon=True).start()
+        return True
+
+    def load(self, timeout: float = None) -> bool:
+        """Start (if needed) and block until loaded or failed; True when ready."""
+        self.start()
+        self._future.result(timeout)
+        return self.ready
+
+    async def wait(self, timeout: float) -> bool:
+        """Start (if needed) and wait up to `timeout` seconds without blocking the event loop."""
+        self.start()
+        if not self._future.done():
+            try:
+                # shield: a timed-out request must not cancel the load itself
+                await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(self._future)), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.ready
+
+    def status(self) -> dict:
+        return {
+            "state": self.state,
+            "error": self.error,
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds,
+        }
+
+    def _run(self):
+        started = time.perf_counter()
+        logger.info("Loading %s...", self.name)
+        try:
+            self._loader()
+        except Exception as e:
+            self.load_seconds = round(time.perf_counter() - started, 3)
+            self.error = f"{type(e).__name__}: {e}"
+            self.state = FAILED
+            logger.error("Loading %s failed after %.1fs: %s", self.name, self.load_seconds, self.error)
+            self._future.set_result(False)
+            return
+        self.load_seconds = round(time.perf_counter() - started, 3)
+
+        if self._warmup is not None and STARTUP_WARMUP:
+            self.state = WARMING_UP
+            started = time.perf_counter()
+            try:
+                self._warmup()
+            except Exception as e:
+                # A failed warm-up only means the first requests are slower
+                logger.warning("Warm-up of %s failed: %s", self.name, e)
+            self.warmup_seconds = round(time.perf_counter() - started, 3)
+
+        self.state = READY
+        logger.info("%s ready (load %.1fs, warm-up %.1fs)", self.name, self.load_seconds, self.warmup_seconds or 0.0)
+        self._future.set_result(True)
+
+
+class ComponentRegistry:
+    def __init__(self, required: Iterable[str] = READY_COMPONENTS, mode: str = STARTUP_MODE):
+        self.required = list(required)
+        self.mode = mode
+        self._components: Dict[str, Component] = {}
+        self.started_at = time.time()
+
+    def add(self, name: str, loader, warmup=None) -> Component:
+        component = Component(name, loader, warmup)
+        self._components[name] = component
+        return component
+
+    def __getitem__(self, name: str) -> Component:
+        return self._components[name]
+
+    def start_all(self):
+        for component in self._components.values():
+            component.start()
+
+    def load_all(self):
+        """Load everything in parallel and block until done (STARTUP_MODE=eager)."""
+        self.start_all()
+        for component in self._components.values():
+            component.load()
+
+    async def startup(self):
+        """App startup hook: what runs now depends on STARTUP_MODE."""
+        if self.mode == "eager":
+            await asyncio.get_running_loop().run_in_executor(None, self.load_all)
+        elif self.mode != "lazy":
+            self.start_all()
+
+    async def require(self, *names: str, timeout: float = STARTUP_WAIT_SECONDS):
+        """Wait (bounded) for the named components; ComponentUnavailableError if one is not ready."""
+        for name in names:
+            component = self._components[name]
+            if not component.ready and not await component.wait(timeout):
+                raise ComponentUnavailableError(name, component.state, component.error)
+
+    def is_ready(self) -> bool:
+        """Every required component loaded; in lazy mode, never-requested ones don't hold readiness back."""
+        for name in self.required:
+            state = self._components[name].state if name in self._components else FAILED
+            if state != READY and not (self.mode == "lazy" and state == PENDING):
+                return False
+        return True
+
+    def status(self) -> dict:
+        return {
+            "ready": self.is_ready(),
+            "mode": self.mode,
+            "uptime_s": round(time.time() - self.started_at, 3),
+            "required": self.required,
+            "components": {name: c.status() for name, c in self._components.items()},
+        }
@@ -0,0 +1,379 @@
+# backend/llm.py
+"""
+Gemini client shared by the chat endpoints.
+
+The GenerativeModel is created once and reused, calls go through the async
+client, and a semaphore caps how many Gemini requests run at the same time
+so a slow LLM cannot pile up unbounded work in the worker.
+
+Every answer has a deadline. Failed calls are retried (bounded, with
+jitter), an optional hedged second request goes out when the first is
+slower than the recent p95, and a circuit breaker stops calling Gemini
+after repeated failures. Callers get LLMUnavailableError in all of these
+cases and answer from the knowledge base instead (prompts.build_fallback_answer).
+
+Config (env):
+  LLM_BACKEND             "gemini" (default) or "fake" – a local stand-in with
+                          configurable latency (benchmarks/fake_gemini.py)
+  GEMINI_API_KEY          API key
+  GEMINI_MODEL            model name (default: gemini-2.5-flash)
+  GEMINI_MAX_CONCURRENCY  max in-flight Gemini calls per worker (default: 8)
+  LLM_DEADLINE_SECONDS    time budget for one answer, retries included (default: 12)
+  LLM_FIRST_TOKEN_SECONDS streaming: max wait for the first chunk (default: 6)
+  LLM_MAX_RETRIES         extra attempts after a failed call (default: 1)
+  LLM_RETRY_BASE_MS       backoff base; full jitter, doubled per retry (default: 200)
+  LLM_HEDGE               "1" to send a hedged second request (default: "0")
+  LLM_HEDGE_MIN_MS        lower bound for the hedge delay (default: 1000)
+  LLM_BREAKER_FAILURES    consecutive failures that open the breaker (default: 5)
+  LLM_BREAKER_COOLDOWN    seconds the breaker stays open before a trial call (default: 30)
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import deque
+
+from observability import get_logger, observe
+
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini").lower()
+
+# Uses env variable if set, else your existing key string
+GEMINI_API_KEY = os.getenv(
+    "GEMINI_API_KEY",
+    "---------"  # your current fallback
+)
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+
+LLM_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", "12"))
+LLM_FIRST_TOKEN_SECONDS = float(os.getenv("LLM_FIRST_TOKEN_SECONDS", "6"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "1"))
+LLM_RETRY_BASE_MS = float(os.getenv("LLM_RETRY_BASE_MS", "200"))
+LLM_HEDGE = os.getenv("LLM_HEDGE", "0") == "1"
+LLM_HEDGE_MIN_MS = float(os.getenv("LLM_HEDGE_MIN_MS", "1000"))
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))
+
+logger = get_logger("llm")
+
+_model = None
+_model_lock = threading.Lock()
+_semaphore = asyncio.Semaphore(GEMINI_MAX_CONCURRENCY)
+
+
+def is_configured() -> bool:
+    return LLM_BACKEND == "fake" or GEMINI_API_KEY != "YOUR_API_KEY"
+
+
+def get_model():
+    """Create the GenerativeModel on first use, then reuse it (the SDK is imported here, not at startup)."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                if LLM_BACKEND == "fake":
+                    from benchmarks.fake_gemini import FakeGenerativeModel
+                    _model = FakeGenerativeModel.from_env()
+                else:
+                    import google.generativeai as genai
+
+                    if GEMINI_API_KEY != "YOUR_API_KEY":
+                        genai.configure(api_key=GEMINI_API_KEY)
+                    _model = genai.GenerativeModel(GEMINI_MODEL)
+    return _model
+
+
+class LLMUnavailableError(RuntimeError):
+    """No Gemini answer in time: breaker open, deadline passed or all attempts failed."""
+
+
+TRIAL = "trial"   # CircuitBreaker.allow() result for the half-open trial call (truthy)
+
+
+class CircuitBreaker:
+    """
+    closed → open after `failure_threshold` consecutive failures;
+    open → half-open after `cooldown` seconds, letting one trial call through;
+    half-open → closed on success, open again on failure.
+    """
+
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 30.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self._state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self.opened = 0
+
+    def allow(self):
+        """False if the call must not go out; TRIAL for the single half-open trial call, else True."""
+        with self._lock:
+            if self._state == "closed":
+                return True
+            if self._state == "open" and time.monotonic() - self._opened_at >= self.cooldown:
+                self._state = "half_open"
+                self._trial_in_flight = False
+            if self._state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return TRIAL
+            return False
+
+    def release_trial(self):
+        """The trial call ended without an outcome (e.g. cancelled): let the next call be the trial."""
+        with self._lock:
+            if self._state == "half_open":
+                self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self._state = "closed"
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == "half_open" or self._failures >= self.failure_threshold:
+                if self._state != "open":
+                    self.opened += 1
+                    logger.warning("Gemini circuit breaker opened after %d failures", self._failures)
+                self._state = "open"
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"state": self._state, "consecutive_failures": self._failures, "times_opened": self.opened}
+
+
+class LatencyTracker:
+    """Recent successful call durations; the p95 sets the hedge delay."""
+
+    def __init__(self, size: int = 200):
+        self._values = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._values.append(seconds)
+
+    def percentile(self, pct: float):
+        with self._lock:
+            values = sorted(self._values)
+        if len(values) < 20:
+            return None
+        return values[min(len(values) - 1, int(pct / 100.0 * len(values)))]
+
+    def hedge_delay(self) -> float:
+        p95 = self.percentile(95)
+        return max(LLM_HEDGE_MIN_MS / 1000.0, p95 or 0.0)
+
+
+breaker = CircuitBreaker(LLM_BREAKER_FAILURES, LLM_BREAKER_COOLDOWN)
+latency = LatencyTracker()
+_counters = {"calls": 0, "retries": 0, "hedges": 0, "hedge_wins": 0, "timeouts": 0,
+             "failures": 0, "rejected": 0}
+
+
+def stats() -> dict:
+    """Counters for /chat/stats: breaker state, retries, hedges, timeouts."""
+    p95 = latency.percentile(95)
+    return {**_counters, "breaker": breaker.stats(), "p95_ms": p95 * 1000.0 if p95 is not None else None}
+
+
+def _backoff(attempt: int) -> float:
+    """Full jitter: uniform in [0, base * 2^(attempt-1)]."""
+    return random.uniform(0, LLM_RETRY_BASE_MS / 1000.0 * (2 ** (attempt - 1)))
+
+
+async def _call_once(prompt: str) -> str:
+    async with _semaphore:
+        start = time.perf_counter()
+        res = await get_model().generate_content_async(prompt)
+        text = res.text
+        elapsed = time.perf_counter() - start
+    latency.record(elapsed)
+    # Non-streaming: the first token arrives with the full answer
+    observe("llm_first_token", elapsed)
+    observe("llm_total", elapsed)
+    return text
+
+
+async def _hedged_call(prompt: str) -> str:
+    """One attempt; with LLM_HEDGE, a second identical request races it after the hedge delay."""
+    primary = asyncio.ensure_future(_call_once(prompt))
+    if not LLM_HEDGE:
+        return await primary
+
+    tasks = [primary]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=latency.hedge_delay())
+        if not done:
+            _counters["hedges"] += 1
+            tasks.append(asyncio.ensure_future(_call_once(prompt)))
+
+        pending = set(tasks)
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is not primary:
+                        _counters["hedge_wins"] += 1
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+async def generate(prompt: str, timeout: float = LLM_DEADLINE_SECONDS) -> str:
+    """
+    Gemini answer within `timeout` seconds, capped by GEMINI_MAX_CONCURRENCY.
+    Raises LLMUnavailableError when no answer can be produced in time.
+    """
+    allowed = breaker.allow()
+    if not allowed:
+        _counters["rejected"] += 1
+        raise LLMUnavailableError("Gemini circuit breaker is open")
+    trial = allowed == TRIAL
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    attempt = 0
+    try:
+        while True:
+            _counters["calls"] += 1
+            try:
+                text = await asyncio.wait_for(_hedged_call(prompt), max(0.0, deadline - loop.time()))
+                breaker.record_success()
+                return text
+            except asyncio.TimeoutError:
+                _counters["timeouts"] += 1
+                breaker.record_failure()
+                raise LLMUnavailableError(f"Gemini did not answer within {timeout:.1f}s")
+            except Exception as e:
+                _counters["failures"] += 1
+                breaker.record_failure()
+                attempt += 1
+                wait = _backoff(attempt)
+                allowed = attempt <= LLM_MAX_RETRIES and loop.time() + wait < deadline and breaker.allow()
+                if not allowed:
+                    raise LLMUnavailableError(f"Gemini call failed: {e}") from e
+                trial = trial or allowed == TRIAL
+                _counters["retries"] += 1
+                logger.info("Gemini call failed (%s), retry %d in %.0f ms", e, attempt, wait * 1000.0)
+                await asyncio.sleep(wait)
+    finally:
+        # Cancelled (client gone, hedge or outer timeout): the trial must not stay in flight forever
+        if trial:
+            breaker.release_trial()
+
+
+async def _first_chunk(prompt: str, deadline: float):
+    """Open a stream and wait for its first text chunk → (iterator, text)."""
+    loop = asyncio.get_running_loop()
+    first_deadline = min(deadline, loop.time() + LLM_FIRST_TOKEN_SECONDS)
+    res = await asyncio.wait_for(
+        get_model().generate_content_async(prompt, stream=True), max(0.0, first_deadline - loop.time())
+    )
+    chunks = res.__aiter__()
+    while True:
+        chunk = await asyncio.wait_for(_next_chunk(chunks), max(0.0, first_deadline - loop.time()))
+        if chunk is _END:
+            return chunks, ""
+        text = _chunk_text(chunk)
+        if text:
+            return chunks, text
+
+
+_END = object()
+
+
+async def _next_chunk(chunks):
+    """Next chunk of a stream, or _END."""
+    try:
+        return await chunks.__anext__()
+    except StopAsyncIteration:
+        return _END
+
+
+def _chunk_text(chunk) -> str:
+    try:
+        return chunk.text
+    except ValueError:
+        # Chunk without text parts (e.g. safety metadata only)
+        return ""
+
+
+async def stream(prompt: str, timeout: float = LLM_DEADLINE_SECONDS):
+    """
+    Streaming Gemini call. Yields text chunks as they arrive.
+    Holds a concurrency slot until the stream is finished.
+
+    Retries only happen before the first chunk (nothing has been sent yet);
+    raises LLMUnavailableError if no first chunk arrives in time.
+    A deadline hit mid-answer ends the stream with what was sent so far.
+    """
+    allowed = breaker.allow()
+    if not allowed:
+        _counters["rejected"] += 1
+        raise LLMUnavailableError("Gemini circuit breaker is open")
+    trial = allowed == TRIAL
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    async with _semaphore:
+        start = time.perf_counter()
+        try:
+            attempt = 0
+            while True:
+                _counters["calls"] += 1
+                try:
+                    chunks, text = await _first_chunk(prompt, deadline)
+                    break
+                except asyncio.TimeoutError:
+                    _counters["timeouts"] += 1
+                    breaker.record_failure()
+                    raise LLMUnavailableError("Gemini did not start answering in time")
+                except Exception as e:
+                    _counters["failures"] += 1
+                    breaker.record_failure()
+                    attempt += 1
+                    wait = _backoff(attempt)
+                    allowed = attempt <= LLM_MAX_RETRIES and loop.time() + wait < deadline and breaker.allow()
+                    if not allowed:
+                        raise LLMUnavailableError(f"Gemini call failed: {e}") from e
+                    trial = trial or allowed == TRIAL
+                    _counters["retries"] += 1
+                    await asyncio.sleep(wait)
+
+            observe("llm_first_token", time.perf_counter() - start)
+            breaker.record_success()
+            if not text:
+                return
+            yield text
+
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(_next_chunk(chunks), max(0.0, deadline - loop.time()))
+                except asyncio.TimeoutError:
+                    _counters["timeouts"] += 1
+                    logger.warning("Gemini stream cut at the %.1fs deadline", timeout)
+                    break
+                if chunk is _END:
+                    break
+                text = _chunk_text(chunk)
+                if text:
+                    yield text
+        finally:
+            # Client disconnected (generator closed / cancelled) before the trial had an outcome
+            if trial:
+                breaker.release_trial()
+            observe("llm_total", time.perf_counter() - start)
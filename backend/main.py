@@ -1,13 +1,28 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, Header, Request, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
-import google.generativeai as genai
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+import asyncio
+import hmac
 import os
+import time
 
-from cnn_model import predict_image
-from models import ChatRequest, ChatResponse
+import admission
+import llm
+from admission import PRIORITY_HIGH, PRIORITY_NORMAL, AdmissionRejected, client_id, limiters, rate_limiter
+from compute import run_in_thread, shutdown as shutdown_compute
+from cnn_model import predict_image_async, cached_prediction, get_batch_stats, get_cache_stats, get_queue_depth
+from cnn_model import load_model as load_cnn_model, warm_up as warm_up_cnn
+from caches import AnswerCache, LRUCache, normalize_query
+from lifecycle import STARTUP_WAIT_SECONDS, ComponentRegistry, ComponentUnavailableError
+from models import ChatRequest, ChatResponse, DiagnoseResponse
+from observability import ServerTimingMiddleware, get_logger, register_gauge, render_metrics, timed
+from preprocessing import MAX_UPLOAD_BYTES, ImageTooLargeError, InvalidImageError
+from prompts import build_fallback_answer, build_prompt
+from responses import chat_body, dumps, json_response
 from database import knowledge_base
 
 app = FastAPI(title="AgriAssist API", version="3.0")
+logger = get_logger("api")
 
 # -------------------------------------------------
 # CORS
@@ -18,52 +33,287 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
+# Per-route latency histograms; Server-Timing header with SERVER_TIMING=1
+app.add_middleware(ServerTimingMiddleware)
+
 
 # -------------------------------------------------
-# Gemini Configuration
+# Retrieval
 # -------------------------------------------------
-# Uses env variable if set, else your existing key string
-GEMINI_API_KEY = os.getenv(
-    "GEMINI_API_KEY",
-    "---------"  # your current fallback
+# CLASS_CONTEXT_EXTRAS: when an image class is known, its disease record(s)
+# come from an O(1) lookup. Extra semantic results are added:
+#   "cached" (default) – only if the question's embedding is already cached
+#   "always"           – always run the embedder + FAISS search
+#   "never"            – class records only
+CLASS_CONTEXT_EXTRAS = os.getenv("CLASS_CONTEXT_EXTRAS", "cached").lower()
+# KB_PROMPT_PASSAGES: corpus passages (bulletins / advisories) added to the prompt
+KB_PROMPT_PASSAGES = int(os.getenv("KB_PROMPT_PASSAGES", "2"))
+
+
+async def _retrieve(user_msg: str, cnn_pred, n_results: int = 3):
+    """
+    Context for one chat turn → (diseases, corpus passages, query_embedding or None).
+    An image diagnosis keeps the transformer off the critical path.
+    """
+    primary = knowledge_base.diseases_for_class(cnn_pred)
+    if not primary:
+        # No usable image class: full semantic search (embedding + FAISS in a worker thread)
+        return await run_in_thread(knowledge_base.search_all, user_msg, n_results, KB_PROMPT_PASSAGES)
+
+    query_embedding = None
+    extras = []
+    passages = []
+    if CLASS_CONTEXT_EXTRAS == "always":
+        extras, passages, query_embedding = await run_in_thread(
+            knowledge_base.search_all, user_msg, n_results, KB_PROMPT_PASSAGES
+        )
+    elif CLASS_CONTEXT_EXTRAS == "cached":
+        query_embedding = knowledge_base.cached_query_embedding(user_msg)
+        if query_embedding is not None:
+            # FAISS search (IVF / HNSW on a large corpus) stays off the event loop too
+            extras, passages = await run_in_thread(
+                knowledge_base.retrieve, query_embedding, n_results, KB_PROMPT_PASSAGES
+            )
+
+    return _merge_diseases(primary, extras, n_results), passages, query_embedding
+
+
+def _merge_diseases(primary, extras, n_results: int):
+    """Class records first, then semantic hits not already included (max n_results)."""
+    results = list(primary)
+    for disease in extras:
+        if len(results) >= n_results:
+            break
+        if all(disease.id != d.id for d in results):
+            results.append(disease)
+    return results
+
+
+# -------------------------------------------------
+# Answer cache (skips Gemini for near-duplicate questions)
+# -------------------------------------------------
+#   ANSWER_CACHE_ENABLED    "1" (default) / "0"
+#   ANSWER_CACHE_SIZE       max stored answers
+#   ANSWER_CACHE_TTL        seconds an answer stays valid
+#   ANSWER_CACHE_THRESHOLD  min cosine similarity between questions
+# Questions about an image class are keyed on the normalised question text
+# instead of its embedding, so that path never runs the encoder before Gemini.
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "1") == "1"
+answer_cache = AnswerCache(
+    max_entries=int(os.getenv("ANSWER_CACHE_SIZE", "1000")),
+    ttl_seconds=float(os.getenv("ANSWER_CACHE_TTL", "86400")),
+    threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95")),
 )
+class_answer_cache = LRUCache(max_entries=answer_cache.max_entries)
+
+
+def _class_answer_key(user_msg: str, lang: str, cnn_pred):
+    return (normalize_query(user_msg), (lang or "English").strip().lower(), cnn_pred,
+            knowledge_base.data_fingerprint())
 
-if GEMINI_API_KEY != "YOUR_API_KEY":
-    genai.configure(api_key=GEMINI_API_KEY)
+
+def _cached_answer(user_msg: str, query_embedding, lang, cnn_pred):
+    if not ANSWER_CACHE_ENABLED:
+        return None
+    if cnn_pred is not None:
+        entry = class_answer_cache.get(_class_answer_key(user_msg, lang, cnn_pred))
+        if entry is None:
+            return None
+        response, created = entry
+        return response if time.monotonic() - created <= answer_cache.ttl_seconds else None
+    if query_embedding is None:
+        return None
+    return answer_cache.lookup(query_embedding, lang, cnn_pred, knowledge_base.data_fingerprint())
+
+
+def _remember_answer(user_msg: str, query_embedding, lang, cnn_pred, response: ChatResponse):
+    if not ANSWER_CACHE_ENABLED or not llm.is_configured():
+        return
+    if cnn_pred is not None:
+        class_answer_cache.put(_class_answer_key(user_msg, lang, cnn_pred), (response, time.monotonic()))
+    elif query_embedding is not None:
+        answer_cache.store(query_embedding, lang, cnn_pred, response, knowledge_base.data_fingerprint())
+
+
+# -------------------------------------------------
+# Lifecycle
+# -------------------------------------------------
+# Importing this module loads no model: the CNN, the knowledge base (encoder
+# + FAISS) and the Gemini client load in the background or on first use,
+# depending on STARTUP_MODE (see lifecycle.py). /live and /ready report progress.
+components = ComponentRegistry()
+components.add("cnn", load_cnn_model, warmup=warm_up_cnn)
+components.add("knowledge_base", knowledge_base.load, warmup=knowledge_base.warm_up)
+components.add("llm", lambda: llm.get_model() if llm.is_configured() else None)
+
+
+async def _require(*names: str):
+    """Wait (bounded) for the components a request needs; 503 + Retry-After while they load."""
+    try:
+        await components.require(*names)
+    except ComponentUnavailableError as e:
+        headers = {"Retry-After": str(e.retry_after)} if e.retry_after else None
+        raise HTTPException(status_code=503, detail=str(e), headers=headers)
+
+
+# KB_AUTO_RELOAD_SECONDS: if > 0, every worker checks knowledge_data.json
+# this often and hot-swaps an updated index when the file changed. This is
+# how an update reaches all uvicorn/gunicorn workers: /admin/reload-knowledge
+# only reloads the one worker that happened to receive the request.
+KB_AUTO_RELOAD_SECONDS = float(os.getenv("KB_AUTO_RELOAD_SECONDS", "0"))
+
+
+async def _auto_reload_knowledge():
+    while True:
+        await asyncio.sleep(KB_AUTO_RELOAD_SECONDS)
+        if not components["knowledge_base"].ready:
+            continue
+        try:
+            await run_in_thread(knowledge_base.reload_if_stale)
+        except Exception as e:
+            logger.error("Knowledge base auto-reload failed: %s", e)
+
+
+@app.on_event("startup")
+async def on_startup():
+    await components.startup()
+    if KB_AUTO_RELOAD_SECONDS > 0:
+        asyncio.create_task(_auto_reload_knowledge())
+
+
+@app.on_event("shutdown")
+def on_shutdown():
+    shutdown_compute()
+    knowledge_base.save_query_cache()
+
+
+# -------------------------------------------------
+# Admission control (see admission.py)
+# -------------------------------------------------
+# Cache hits and health / stats endpoints never take a slot; everything
+# else waits (bounded) in its endpoint's limiter or gets 503 + Retry-After.
+def _rejected(e: AdmissionRejected) -> HTTPException:
+    return HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+
+def _rate_limit(request: Request):
+    """Per-client token bucket; no-op unless RATE_LIMIT_PER_SECOND is set."""
+    try:
+        rate_limiter.check(client_id(request))
+    except AdmissionRejected as e:
+        raise _rejected(e)
+
+
+async def _admit(pool: str, priority: int = PRIORITY_NORMAL):
+    """Slot in the endpoint's limiter → release callable."""
+    try:
+        return await limiters[pool].acquire(priority)
+    except AdmissionRejected as e:
+        raise _rejected(e)
+
+
+async def _release_after(events, release):
+    """Hold the admission slot until the stream has finished (or the client went away)."""
+    try:
+        async for event in events:
+            yield event
+    finally:
+        release()
+
+
+def _chat_priority(cached_embedding, cnn_pred) -> int:
+    """Requests that skip the encoder (known image class or cached embedding) are admitted first."""
+    if cached_embedding is not None or knowledge_base.diseases_for_class(cnn_pred):
+        return PRIORITY_HIGH
+    return PRIORITY_NORMAL
 
 
 # -------------------------------------------------
 # CNN Prediction Endpoint
 # -------------------------------------------------
+async def _read_upload(file: UploadFile) -> bytes:
+    """Read at most one byte past the limit, never the whole oversized body."""
+    with timed("upload_read"):
+        img_bytes = await file.read(MAX_UPLOAD_BYTES + 1)
+    if len(img_bytes) > MAX_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Image too large (limit {MAX_UPLOAD_BYTES} bytes)",
+        )
+    return img_bytes
+
+
 @app.post("/predict-cnn")
-async def predict_cnn(file: UploadFile = File(...)):
+async def predict_cnn(request: Request, file: UploadFile = File(...)):
     """
     1. Receive leaf image from frontend.
     2. Use shared CNN model (cnn_model.py) to predict.
-    3. Return numeric prediction + confidence.
-       - For now: 0 = Healthy leaf, 1 = Apple Scab
-       - Frontend converts to text like "Apple Scab detected".
+       Concurrent uploads are micro-batched into one forward pass.
+    3. Return {"prediction", "class_index", "class_name", "confidence"}:
+       - multi-class model: class index into labels.CLASS_NAMES (38 classes)
+       - legacy binary model: 0 = Healthy, 1 = Apple Scab (labels.BINARY_CLASS_NAMES)
+       "class_index" is the labels.CLASS_NAMES index for either model; /chat takes that one.
+    Repeated uploads are answered from the prediction cache without an admission slot.
     """
+    _rate_limit(request)
+    await _require("cnn")
     try:
-        img_bytes = await file.read()
-        result = predict_image(img_bytes)
+        img_bytes = await _read_upload(file)
+        result = cached_prediction(img_bytes)
+        if result is None:
+            release = await _admit("predict")
+            try:
+                result = await predict_image_async(img_bytes)
+            finally:
+                release()
 
         if "error" in result:
             raise HTTPException(status_code=500, detail=result["error"])
 
-        # result: { "prediction": 0/1, "confidence": float }
+        # result: { "prediction": int, "class_name": str, "confidence": float }
         return result
 
+    except HTTPException:
+        raise
+    except ImageTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except InvalidImageError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/predict-cnn/stats")
+def predict_cnn_stats():
+    """
+    - batching: stats for tuning CNN_MAX_BATCH_SIZE / CNN_MAX_WAIT_MS
+      (queue depth, batch size histogram, queue-wait percentiles)
+    - prediction_cache: duplicate-upload cache counters
+    """
+    return {
+        "batching": get_batch_stats(),
+        "prediction_cache": get_cache_stats(),
+    }
+
+
 # -------------------------------------------------
 # Chat Endpoint (RAG + Gemini)
 # -------------------------------------------------
+async def _generate_reply(prompt: str, lang: str, cnn_pred, rag_results):
+    """Gemini reply → (text, is_fallback); knowledge-base answer if Gemini is down or too slow."""
+    if not llm.is_configured():
+        return "Please setup Gemini API key.", False
+    try:
+        return await llm.generate(prompt), False
+    except llm.LLMUnavailableError as e:
+        logger.warning("Answering from the knowledge base: %s", e)
+        return build_fallback_answer(cnn_pred, rag_results, lang), True
+
+
 @app.post("/chat", response_model=ChatResponse)
-async def chat_with_assistant(request: ChatRequest):
+async def chat_with_assistant(request: ChatRequest, http_request: Request):
     """
     Conversational RAG + LLM:
     - Uses user question
@@ -73,94 +323,368 @@ async def chat_with_assistant(request: ChatRequest):
     - If question is not about agriculture, reply:
       "Please ask something related to agriculture."
     """
+    _rate_limit(http_request)
+    await _require("knowledge_base")
     user_msg = request.message
     lang = request.language or "English"
-    cnn_pred = request.cnn_prediction  # can be None, 0, or 1 (for now)
+    cnn_pred = request.cnn_prediction  # None or class index from /predict-cnn
 
-    # 1) RAG Search (may return empty list)
-    rag_results = knowledge_base.search_diseases(user_msg, n_results=3)
+    # Answer cache hit without running the encoder: no admission slot needed
+    cached_embedding = knowledge_base.cached_query_embedding(user_msg)
+    cached = _cached_answer(user_msg, cached_embedding, lang, cnn_pred)
+    if cached is not None:
+        return _chat_json(http_request, cached.response, cached.source_diseases, cached.language)
 
-    # 2) Build short context text from retrieved diseases
-    context_parts = []
-    for d in rag_results:
-        context_parts.append(
-            f"Crop: {d.crop}. Disease: {d.disease_name}. "
-            f"Symptoms: {d.symptoms}. Solution: {d.solution}. Prevention: {d.prevention}."
-        )
-    context_text = " ".join(context_parts)
+    release = await _admit("chat", _chat_priority(cached_embedding, cnn_pred))
+    try:
+        response = await _chat_reply(user_msg, lang, cnn_pred)
+    finally:
+        release()
+    return _chat_json(http_request, response.response, response.source_diseases, response.language)
 
-    if not context_text:
-        context_text = (
-            "No specific disease information was found in the database for this query. "
-            "You must still answer using your general agriculture knowledge."
-        )
 
-    # 3) CNN hint based on image result (binary for now)
-    if cnn_pred == 1:
-        cnn_text = (
-            "The leaf image suggests Apple Scab disease. "
-            "Focus on Apple Scab treatment and prevention for the answer."
-        )
-    elif cnn_pred == 0:
-        cnn_text = (
-            "The leaf image suggests a healthy plant. "
-            "Explain general good practices and early prevention tips."
-        )
-    else:
-        cnn_text = (
-            "No image analysis was used. Answer using only the question and database information."
+def _chat_json(request: Request, reply: str, diseases, language: str, **extra) -> Response:
+    """
+    Chat body built from the diseases' pre-serialised JSON (see responses.py):
+    returning a Response skips FastAPI's response_model validation + encoding.
+    """
+    body = chat_body(reply, knowledge_base.disease_fragments(diseases), language, **extra)
+    return json_response(body, request.headers.get("accept-encoding"))
+
+
+async def _chat_reply(user_msg: str, lang: str, cnn_pred) -> ChatResponse:
+    # 1) RAG: class lookup for image diagnoses, semantic search otherwise (may return empty list)
+    rag_results, passages, query_embedding = await _retrieve(user_msg, cnn_pred)
+
+    # Same question (by meaning), language and image class answered before?
+    cached = _cached_answer(user_msg, query_embedding, lang, cnn_pred)
+    if cached is not None:
+        return cached
+
+    # 2) Prompt for Gemini (context + image hint + rules)
+    with timed("prompt_build"):
+        prompt = build_prompt(user_msg, lang, cnn_pred, rag_results, passages)
+
+    # 3) Gemini Response (knowledge-base answer if Gemini is down or too slow)
+    try:
+        reply, fallback = await _generate_reply(prompt, lang, cnn_pred, rag_results)
+
+        response = ChatResponse(
+            response=reply,
+            source_diseases=rag_results,
+            language=lang,
         )
+        if not fallback:
+            _remember_answer(user_msg, query_embedding, lang, cnn_pred, response)
+        return response
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/chat/stats")
+def chat_stats():
+    """Query embedding / answer cache counters and Gemini client health (breaker, retries, hedges)."""
+    return {
+        "query_embedding_cache": knowledge_base.query_cache.stats(),
+        "answer_cache": answer_cache.stats(),
+        "class_answer_cache": class_answer_cache.stats(),
+        "llm": llm.stats(),
+    }
 
-    # 4) Prompt for Gemini
-    prompt = f"""
-You are AgriAssist, an agriculture assistant for farmers.
 
-User language: {lang}
-Image analysis: {cnn_text}
-Database information: {context_text}
+# -------------------------------------------------
+# Streaming Chat Endpoint (Server-Sent Events)
+# -------------------------------------------------
+def _sse(event: str, data) -> bytes:
+    """Format one Server-Sent Event."""
+    return _sse_raw(event, dumps(data))
+
 
-User question: {user_msg}
+def _sse_raw(event: str, payload: bytes) -> bytes:
+    """Server-Sent Event around ready-made (single-line) JSON bytes."""
+    return b"event: " + event.encode() + b"\ndata: " + payload + b"\n\n"
 
-VERY IMPORTANT RULES:
 
-1. DOMAIN LIMIT:
-   - Only answer questions related to agriculture, crops, soil, water for farming, plant diseases, pesticides, fertilizers, weather for crops, and farm practices.
-   - If the question is NOT about agriculture or farming, reply exactly:
-     "Please ask something related to agriculture."
-   - Do NOT answer about politics, movies, coding, gossip, finance, or any other non-agriculture topic.
+def _sources_event(diseases) -> bytes:
+    return _sse_raw("sources", b"[" + b",".join(knowledge_base.disease_fragments(diseases)) + b"]")
 
-2. USE DATABASE AND IMAGE:
-   - If database information mentions a disease, use it as the main reference.
-   - If image analysis says Apple Scab, assume the plant has Apple Scab unless the question is clearly different.
-   - If database information is empty, still answer using your general agriculture knowledge.
 
-3. ANSWER STYLE:
-   - Reply in {lang}.
-   - Use very simple words suitable for farmers.
-   - Use 3 to 5 short sentences only.
-   - No technical or scientific jargon.
-   - Give direct, practical steps (what to do now, what to avoid, how to prevent).
-   - If you are not fully sure, write one sentence like:
-     "For exact advice, please also ask a local agriculture expert."
+async def _answer_events(prompt, cached, user_msg, query_embedding, lang, cnn_pred, rag_results):
+    """sources / token / done (or error) events for one answer."""
+    if cached is not None:
+        yield _sources_event(cached.source_diseases)
+        yield _sse("token", {"text": cached.response})
+        yield _sse("done", {"response": cached.response, "language": cached.language})
+        return
 
-Now give your final answer for the farmer.
-"""
+    yield _sources_event(rag_results)
 
-    # 5) Gemini Response
+    parts = []
+    failed = False
     try:
-        if GEMINI_API_KEY != "YOUR_API_KEY":
-            gemini_model = genai.GenerativeModel("gemini-2.5-flash")
-            res = gemini_model.generate_content(prompt)
-            reply = res.text
+        if llm.is_configured():
+            async for text in llm.stream(prompt):
+                parts.append(text)
+                yield _sse("token", {"text": text})
         else:
-            reply = "Please setup Gemini API key."
+            parts.append("Please setup Gemini API key.")
+            yield _sse("token", {"text": parts[-1]})
+    except llm.LLMUnavailableError as e:
+        # Raised before the first token, so nothing has been sent yet
+        logger.warning("Answering from the knowledge base: %s", e)
+        failed = True   # don't cache the fallback
+        parts = [build_fallback_answer(cnn_pred, rag_results, lang)]
+        yield _sse("token", {"text": parts[0]})
+    except Exception as e:
+        failed = True
+        yield _sse("error", {"detail": str(e)})
 
-        return ChatResponse(
-            response=reply,
-            source_diseases=rag_results,
-            language=lang,
+    reply = "".join(parts)
+    if not failed:
+        _remember_answer(
+            user_msg, query_embedding, lang, cnn_pred,
+            ChatResponse(response=reply, source_diseases=rag_results, language=lang),
         )
+    yield _sse("done", {"response": reply, "language": lang})
+
+
+def _sse_response(events) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",   # don't let nginx buffer the stream
+        },
+    )
 
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest, http_request: Request):
+    """
+    Same as /chat, but streams the answer as Server-Sent Events:
+    - "sources": retrieved diseases, sent as soon as RAG search finishes
+    - "token":   {"text": "..."} for every Gemini chunk
+    - "done":    {"response": <full text>, "language": <lang>}
+    - "error":   {"detail": "..."} if Gemini fails mid-stream
+    If Gemini is unavailable before the first token, the knowledge-base
+    fallback answer is sent as a single token instead.
+    """
+    _rate_limit(http_request)
+    await _require("knowledge_base")
+    user_msg = request.message
+    lang = request.language or "English"
+    cnn_pred = request.cnn_prediction
+
+    cached_embedding = knowledge_base.cached_query_embedding(user_msg)
+    cached = _cached_answer(user_msg, cached_embedding, lang, cnn_pred)
+    if cached is not None:
+        return _sse_response(_answer_events(None, cached, user_msg, cached_embedding, lang, cnn_pred, []))
+
+    # The slot is held until the last event has been sent
+    release = await _admit("chat", _chat_priority(cached_embedding, cnn_pred))
+    try:
+        rag_results, passages, query_embedding = await _retrieve(user_msg, cnn_pred)
+        cached = _cached_answer(user_msg, query_embedding, lang, cnn_pred)
+        prompt = None
+        if cached is None:
+            with timed("prompt_build"):
+                prompt = build_prompt(user_msg, lang, cnn_pred, rag_results, passages)
+    except BaseException:
+        release()
+        raise
+
+    return _sse_response(_release_after(
+        _answer_events(prompt, cached, user_msg, query_embedding, lang, cnn_pred, rag_results), release,
+    ))
+
+
+# -------------------------------------------------
+# Diagnose Endpoint (image + question in one request)
+# -------------------------------------------------
+DEFAULT_DIAGNOSE_QUESTION = "What is wrong with my plant and what should I do?"
+
+
+@app.post("/diagnose", response_model=DiagnoseResponse)
+async def diagnose(
+    request: Request,
+    file: UploadFile = File(...),
+    message: str = Form(""),
+    language: str = Form("English"),
+    stream: bool = Form(False),
+):
+    """
+    /predict-cnn + /chat in one multipart request (one round trip on mobile networks).
+
+    CNN inference and text retrieval (query embedding + FAISS) run at the same
+    time; the class-specific disease records are merged in front of the
+    semantic hits before the prompt is built.
+
+    stream=false → {"prediction", "response", "source_diseases", "language"}
+    stream=true  → Server-Sent Events: "prediction" first, then the same
+                   events as /chat/stream
+    """
+    _rate_limit(request)
+    await _require("knowledge_base")
+    # A CNN that failed to load is tolerated: the question is answered from text retrieval
+    await components["cnn"].wait(STARTUP_WAIT_SECONDS)
+    img_bytes = await _read_upload(file)
+    user_msg = message.strip() or DEFAULT_DIAGNOSE_QUESTION
+    lang = language or "English"
+
+    # Always does CNN + retrieval work: one slot in the chat limiter, held to the end of the answer
+    release = await _admit("chat")
+    try:
+        response = await _diagnose(request, img_bytes, user_msg, lang, stream, release)
+    except BaseException:
+        release()
+        raise
+    if not stream:
+        release()
+    return response
+
+
+async def _diagnose(request: Request, img_bytes: bytes, user_msg: str, lang: str, stream: bool, release):
+    try:
+        prediction, (extras, passages, query_embedding) = await asyncio.gather(
+            predict_image_async(img_bytes),
+            run_in_thread(knowledge_base.search_all, user_msg, 3, KB_PROMPT_PASSAGES),
+        )
+    except ImageTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except InvalidImageError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    # Without a CNN the question is still answered from text retrieval alone
+    # class_index, not prediction: the legacy binary model's 0 / 1 aren't CLASS_NAMES indexes
+    cnn_pred = None if "error" in prediction else prediction.get("class_index")
+    rag_results = _merge_diseases(knowledge_base.diseases_for_class(cnn_pred), extras, 3)
+
+    cached = _cached_answer(user_msg, query_embedding, lang, cnn_pred)
+    prompt = None
+    if cached is None:
+        with timed("prompt_build"):
+            prompt = build_prompt(user_msg, lang, cnn_pred, rag_results, passages)
+
+    if stream:
+        async def events():
+            yield _sse("prediction", prediction)
+            async for event in _answer_events(prompt, cached, user_msg, query_embedding, lang, cnn_pred,
+                                              rag_results):
+                yield event
+
+        return _sse_response(_release_after(events(), release))
+
+    if cached is not None:
+        return _chat_json(request, cached.response, cached.source_diseases, cached.language, prediction=prediction)
+
+    try:
+        reply, fallback = await _generate_reply(prompt, lang, cnn_pred, rag_results)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if not fallback:
+        _remember_answer(
+            user_msg, query_embedding, lang, cnn_pred,
+            ChatResponse(response=reply, source_diseases=rag_results, language=lang),
+        )
+    return _chat_json(request, reply, rag_results, lang, prediction=prediction)
+
+
+# -------------------------------------------------
+# Metrics (Prometheus text format)
+# -------------------------------------------------
+register_gauge(
+    "agriassist_cnn_queue_depth", "Images waiting for the CNN micro-batcher (all model servers in pool mode).",
+    lambda: {(): get_queue_depth()},
+)
+register_gauge(
+    "agriassist_cache_entries", "Entries per cache.",
+    lambda: {
+        ("prediction",): get_cache_stats()["entries"],
+        ("query_embedding",): knowledge_base.query_cache.stats()["entries"],
+        ("answer",): answer_cache.stats()["entries"],
+        ("class_answer",): class_answer_cache.stats()["entries"],
+    },
+    ("cache",),
+)
+register_gauge(
+    "agriassist_cache_hit_ratio", "Hit ratio per cache since start.",
+    lambda: {
+        ("prediction",): get_cache_stats()["hit_rate"],
+        ("query_embedding",): knowledge_base.query_cache.stats()["hit_rate"],
+        ("answer",): answer_cache.stats()["hit_rate"],
+        ("class_answer",): class_answer_cache.stats()["hit_rate"],
+    },
+    ("cache",),
+)
+register_gauge(
+    "agriassist_admission_active", "Requests holding an admission slot.",
+    lambda: {(name,): limiter.active for name, limiter in limiters.items()},
+    ("pool",),
+)
+register_gauge(
+    "agriassist_admission_queued", "Requests waiting for an admission slot.",
+    lambda: {(name,): limiter.stats()["queued"] for name, limiter in limiters.items()},
+    ("pool",),
+)
+register_gauge(
+    "agriassist_admission_rejected", "Requests turned away since start (503 overloaded, 429 rate limited).",
+    lambda: {
+        **{(name, "503"): s["rejected_full"] + s["rejected_timeout"]
+           for name, s in ((name, limiter.stats()) for name, limiter in limiters.items())},
+        ("all", "429"): rate_limiter.rejected,
+    },
+    ("pool", "status"),
+)
+
+
+@app.get("/admission/stats")
+def admission_stats():
+    """Slots in use, queue lengths, rejections and rate-limit counters per endpoint class."""
+    return admission.stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """
+    Stage latency histograms (agriassist_stage_seconds{stage=...}),
+    per-route request latency and queue / cache gauges for Prometheus.
+    """
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+# -------------------------------------------------
+# Admin
+# -------------------------------------------------
+# ADMIN_TOKEN: secret expected in the X-Admin-Token header; admin endpoints
+# answer 403 while it is unset (CORS allows every origin, so no open admin API).
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+
+def _check_admin(token):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin API disabled (ADMIN_TOKEN is not set)")
+    if not token or not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@app.post("/admin/reload-knowledge")
+async def reload_knowledge(force: bool = False, x_admin_token: str = Header(None)):
+    """
+    Re-read data/knowledge_data.json and hot-swap the FAISS index in this worker.
+    Only added/changed records are re-embedded (force=true rebuilds everything).
+
+    Per worker: with several workers, the others pick the change up through
+    KB_AUTO_RELOAD_SECONDS polling. Requires the X-Admin-Token header.
+    """
+    _check_admin(x_admin_token)
+    await _require("knowledge_base")
+    try:
+        return await run_in_thread(knowledge_base.reload, force)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -175,3 +699,20 @@ def home():
     Can also be used by frontend to show 'Online' status.
     """
     return {"status": "healthy"}
+
+
+@app.get("/live")
+def live():
+    """Liveness: the process is up and serving HTTP (models may still be loading)."""
+    return {"status": "alive", "uptime_s": components.status()["uptime_s"]}
+
+
+@app.get("/ready")
+def ready():
+    """
+    Readiness: 200 once every READY_COMPONENTS entry is loaded and warmed up,
+    503 before that (or when one failed). The body has each component's
+    state, load / warm-up seconds and error.
+    """
+    status = components.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
@@ -0,0 +1,197 @@
+# backend/model_client.py
+"""
+Client side of the shared model server (see model_server.py).
+
+With INFERENCE_MODE=remote the API workers don't load TensorFlow or the
+sentence encoder. They decode images themselves (CPU work that scales with
+workers) and send uint8 pixels / query texts to the model server over a
+Unix socket. The server batches requests from all workers together.
+
+One connection per worker process carries many in-flight requests: every
+request gets an id, a reader thread resolves the matching Future.
+
+Config (env):
+  INFERENCE_MODE          "local" (default, models in every worker) or "remote"
+  MODEL_SERVER_SOCKET     socket path(s), comma-separated for a pool of servers
+                          (default: /tmp/agriassist-models.sock)
+  MODEL_SERVER_AUTHKEY    shared secret for the connection handshake (required in
+                          remote mode: the server unpickles what clients send)
+  MODEL_SERVER_TIMEOUT    seconds to wait for one reply (default: 30)
+"""
+
+import itertools
+import os
+import threading
+from concurrent.futures import Future, InvalidStateError
+from multiprocessing.connection import Client
+from typing import List
+
+import numpy as np
+
+from observability import get_logger
+
+INFERENCE_MODE = os.getenv("INFERENCE_MODE", "local").lower()
+MODEL_SERVER_SOCKET = os.getenv("MODEL_SERVER_SOCKET", "/tmp/agriassist-models.sock")
+MODEL_SERVER_AUTHKEY = os.getenv("MODEL_SERVER_AUTHKEY", "").encode()
+MODEL_SERVER_TIMEOUT = float(os.getenv("MODEL_SERVER_TIMEOUT", "30"))
+
+logger = get_logger("model_client")
+
+
+class ModelServerError(RuntimeError):
+    """The model server is unreachable or returned an error."""
+
+
+def require_authkey():
+    """No built-in secret: server and clients both refuse to run without MODEL_SERVER_AUTHKEY."""
+    if not MODEL_SERVER_AUTHKEY:
+        raise ModelServerError("MODEL_SERVER_AUTHKEY is not set: choose a shared secret for the model "
+                               "server and every API worker (e.g. python -c 'import secrets; "
+                               "print(secrets.token_hex(32))')")
+
+
+class ModelConnection:
+    """One multiplexed connection to one model server."""
+
+    def __init__(self, address: str, authkey: bytes = MODEL_SERVER_AUTHKEY):
+        self.address = address
+        self.authkey = authkey
+        self._conn = None
+        self._reader = None
+        self._pending = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()        # guards _conn / _pending
+        self._send_lock = threading.Lock()
+
+    def submit(self, op: str, payload=None) -> Future:
+        """Send one request; the Future resolves with the server's reply."""
+        fut = Future()
+        with self._lock:
+            conn = self._connect_locked()
+            request_id = next(self._ids)
+            self._pending[request_id] = fut
+        try:
+            with self._send_lock:
+                conn.send((request_id, op, payload))
+        except (OSError, EOFError, ValueError) as e:
+            self._fail_all(conn, e)
+        return fut
+
+    def call(self, op: str, payload=None, timeout: float = MODEL_SERVER_TIMEOUT):
+        return self.submit(op, payload).result(timeout)
+
+    def close(self):
+        with self._lock:
+            conn, self._conn = self._conn, None
+        if conn is not None:
+            conn.close()
+
+    # ---------- internals ----------
+    def _connect_locked(self):
+        if self._conn is None:
+            try:
+                self._conn = Client(self.address, family="AF_UNIX", authkey=self.authkey)
+            except (OSError, EOFError) as e:
+                raise ModelServerError(f"Model server not reachable at {self.address}: {e}") from e
+            self._reader = threading.Thread(
+                target=self._read_loop, args=(self._conn,), name="model-client", daemon=True
+            )
+            self._reader.start()
+            logger.info("Connected to model server at %s", self.address)
+        return self._conn
+
+    def _read_loop(self, conn):
+        try:
+            while True:
+                request_id, ok, result = conn.recv()
+                with self._lock:
+                    fut = self._pending.pop(request_id, None)
+                if fut is None or fut.cancelled():
+                    continue   # the caller gave up (timeout / cancelled request)
+                try:
+                    if ok:
+                        fut.set_result(result)
+                    else:
+                        fut.set_exception(ModelServerError(result))
+                except InvalidStateError:
+                    pass   # cancelled between the check and set_result
+        except Exception as e:
+            # Connection lost or an unreadable reply: fail what is in flight, reconnect on next submit
+            self._fail_all(conn, e)
+
+    def _fail_all(self, conn, error):
+        """Connection lost: fail everything in flight, reconnect on next submit."""
+        with self._lock:
+            if self._conn is conn:
+                self._conn = None
+            pending, self._pending = self._pending, {}
+        try:
+            conn.close()
+        except OSError:
+            pass
+        if pending:
+            logger.warning("Model server connection lost (%s), failing %d requests", error, len(pending))
+        for fut in pending.values():
+            try:
+                fut.set_exception(ModelServerError(f"Model server connection lost: {error}"))
+            except InvalidStateError:
+                pass   # already cancelled by its caller
+
+
+class ModelClient:
+    """Round-robin over one or more model servers."""
+
+    def __init__(self, addresses: List[str]):
+        self._connections = [ModelConnection(a) for a in addresses]
+        self._next = itertools.cycle(range(len(self._connections)))
+        self._lock = threading.Lock()
+
+    def _pick(self) -> ModelConnection:
+        with self._lock:
+            return self._connections[next(self._next)]
+
+    def submit(self, op: str, payload=None) -> Future:
+        return self._pick().submit(op, payload)
+
+    def call(self, op: str, payload=None, timeout: float = MODEL_SERVER_TIMEOUT):
+        return self._pick().call(op, payload, timeout)
+
+    def stats(self) -> List[dict]:
+        """Stats from every server in the pool."""
+        return [c.call("stats") for c in self._connections]
+
+    def versions(self) -> tuple:
+        """Model version of every server in the pool (changes when a server loads another model)."""
+        return tuple(c.call("version") for c in self._connections)
+
+    def close(self):
+        for c in self._connections:
+            c.close()
+
+
+class RemoteEncoder:
+    """SentenceTransformer stand-in: .encode(texts) runs on the model server."""
+
+    def __init__(self, client: ModelClient):
+        self._client = client
+
+    def encode(self, texts, **kwargs) -> np.ndarray:
+        texts = list(texts)
+        # Index builds send thousands of chunks at once: no reply deadline for those
+        timeout = MODEL_SERVER_TIMEOUT if len(texts) <= 64 else None
+        return np.asarray(self._client.call("embed", texts, timeout), dtype=np.float32)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> ModelClient:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                addresses = [a.strip() for a in MODEL_SERVER_SOCKET.split(",") if a.strip()]
+                require_authkey()
+                _client = ModelClient(addresses)
+    return _client
@@ -0,0 +1,238 @@
+# backend/model_server.py
+"""
+Shared model server: one process per host (or a small pool) owns the CNN
+and the sentence encoder and serves every API worker over a Unix socket.
+
+API workers started with INFERENCE_MODE=remote load neither TensorFlow nor
+SentenceTransformer (see model_client.py). Images from all workers go
+through this process's micro-batcher, so batches fill up across workers;
+query texts are batched the same way before hitting the encoder.
+
+    python model_server.py --socket /tmp/agriassist-models.sock
+    INFERENCE_MODE=remote uvicorn main:app --workers 4
+
+A pool: start several servers on different sockets and list them all in
+MODEL_SERVER_SOCKET (comma-separated); workers spread requests round-robin.
+
+The socket is created owner-only (0600) and every connection must pass the
+MODEL_SERVER_AUTHKEY handshake: requests are pickled, so the server does not
+start without an explicit key.
+
+Config (env, besides the CNN_* / model settings used by cnn_model.py):
+  MODEL_SERVER_AUTHKEY   shared secret, required (same value for the API workers)
+  EMBED_MAX_BATCH_SIZE   max texts per encoder call (default: 64)
+  EMBED_MAX_WAIT_MS      how long the first text waits for company (default: 2)
+"""
+
+import argparse
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing.connection import Listener
+from multiprocessing import AuthenticationError
+
+# This process *is* the model server: always load the models locally
+os.environ["INFERENCE_MODE"] = "local"
+
+import numpy as np  # noqa: E402
+
+import cnn_model  # noqa: E402
+from encoders import load_local_encoder  # noqa: E402
+from model_client import MODEL_SERVER_AUTHKEY, MODEL_SERVER_SOCKET, ModelServerError, require_authkey  # noqa: E402
+from observability import get_logger, timed  # noqa: E402
+
+EMBED_MAX_BATCH_SIZE = int(os.getenv("EMBED_MAX_BATCH_SIZE", "64"))
+EMBED_MAX_WAIT_MS = float(os.getenv("EMBED_MAX_WAIT_MS", "2"))
+
+logger = get_logger("model_server")
+
+
+class TextBatcher:
+    """Groups encode() calls from all connections into one encoder call."""
+
+    def __init__(self, encoder, max_batch_size: int = 64, max_wait_ms: float = 2.0):
+        self._encoder = encoder
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._batches = 0
+        self._texts = 0
+        threading.Thread(target=self._run, name="embed-batcher", daemon=True).start()
+
+    def submit(self, texts) -> Future:
+        fut = Future()
+        self._queue.put((list(texts), fut))
+        return fut
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "requests": self._requests,
+                "batches": self._batches,
+                "texts": self._texts,
+                "avg_texts_per_batch": (self._texts / self._batches) if self._batches else 0.0,
+            }
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            size = len(batch[0][0])
+            deadline = time.perf_counter() + self.max_wait
+            while size < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(item)
+                size += len(item[0])
+            self._process(batch)
+
+    def _process(self, batch):
+        texts = [t for request_texts, _ in batch for t in request_texts]
+        try:
+            with timed("embed"):
+                vectors = np.asarray(self._encoder.encode(texts), dtype=np.float32)
+        except Exception as e:
+            for _, fut in batch:
+                fut.set_exception(e)
+            return
+
+        start = 0
+        for request_texts, fut in batch:
+            fut.set_result(vectors[start:start + len(request_texts)])
+            start += len(request_texts)
+        with self._lock:
+            self._requests += len(batch)
+            self._batches += 1
+            self._texts += len(texts)
+
+
+class ModelServer:
+    def __init__(self, address: str, authkey: bytes, text_batcher: TextBatcher):
+        self.address = address
+        self.authkey = authkey
+        self.text_batcher = text_batcher
+        self._connections = 0
+        self._lock = threading.Lock()
+
+    def serve_forever(self):
+        if os.path.exists(self.address):
+            os.unlink(self.address)   # stale socket from a previous run
+        # Created 0600 from the start: a chmod after bind would leave a window open to other users
+        old_umask = os.umask(0o177)
+        try:
+            listener = Listener(self.address, family="AF_UNIX", authkey=self.authkey)
+        finally:
+            os.umask(old_umask)
+        logger.info("Model server listening on %s", self.address)
+        try:
+            while True:
+                try:
+                    conn = listener.accept()
+                except (AuthenticationError, OSError, EOFError) as e:
+                    logger.warning("Rejected connection: %s", e)
+                    continue
+                threading.Thread(target=self._serve_connection, args=(conn,), daemon=True).start()
+        finally:
+            listener.close()
+            if os.path.exists(self.address):
+                os.unlink(self.address)
+
+    def stats(self) -> dict:
+        with self._lock:
+            connections = self._connections
+        return {
+            "connections": connections,
+            "model_version": cnn_model.model_version(),
+            "batching": cnn_model.get_batch_stats(),
+            "embedding": self.text_batcher.stats(),
+        }
+
+    # ---------- per connection ----------
+    def _serve_connection(self, conn):
+        with self._lock:
+            self._connections += 1
+        replies = queue.Queue()
+        writer = threading.Thread(target=self._write_loop, args=(conn, replies), daemon=True)
+        writer.start()
+        try:
+            while True:
+                request_id, op, payload = conn.recv()
+                self._dispatch(request_id, op, payload, replies)
+        except (EOFError, OSError):
+            pass
+        finally:
+            replies.put(None)
+            with self._lock:
+                self._connections -= 1
+
+    @staticmethod
+    def _write_loop(conn, replies):
+        """Sends replies in order; batcher threads never block on a slow socket."""
+        while True:
+            reply = replies.get()
+            if reply is None:
+                break
+            try:
+                conn.send(reply)
+            except (OSError, ValueError):
+                break
+        conn.close()
+
+    def _dispatch(self, request_id, op, payload, replies):
+        def reply_when_done(fut: Future):
+            error = fut.exception()
+            if error is None:
+                replies.put((request_id, True, fut.result()))
+            else:
+                replies.put((request_id, False, f"{type(error).__name__}: {error}"))
+
+        if op == "predict":
+            if cnn_model.cnn_model is None:
+                replies.put((request_id, False, "Model not loaded"))
+                return
+            cnn_model.batcher.submit(payload).add_done_callback(reply_when_done)
+        elif op == "embed":
+            self.text_batcher.submit(payload).add_done_callback(reply_when_done)
+        elif op == "stats":
+            replies.put((request_id, True, self.stats()))
+        elif op == "version":
+            replies.put((request_id, True, cnn_model.model_version()))
+        elif op == "ping":
+            replies.put((request_id, True, "pong"))
+        else:
+            replies.put((request_id, False, f"Unknown op: {op}"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--socket", default=MODEL_SERVER_SOCKET.split(",")[0].strip())
+    args = parser.parse_args()
+    try:
+        require_authkey()
+    except ModelServerError as e:
+        raise SystemExit(f"❌ {e}")
+
+    try:
+        cnn_model.load_model()
+        cnn_model.warm_up()
+    except Exception as e:
+        # Still serve embeddings; predict requests get "Model not loaded"
+        logger.error("Error loading CNN model: %s", e)
+    encoder = load_local_encoder()
+    server = ModelServer(args.socket, MODEL_SERVER_AUTHKEY,
+                         TextBatcher(encoder, EMBED_MAX_BATCH_SIZE, EMBED_MAX_WAIT_MS))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
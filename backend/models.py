@@ -22,10 +22,14 @@ class Disease(BaseModel):
 class ChatRequest(BaseModel):
     message: str
     language: str = "English"
-    cnn_prediction: Optional[int] = None   # 0=Healthy, 1=Diseased (for now)
+    cnn_prediction: Optional[int] = None   # "class_index" from /predict-cnn (labels.CLASS_NAMES)
 
 # Backend → Frontend Chat Response
 class ChatResponse(BaseModel):
     response: str
     source_diseases: List[Disease]
     language: str
+
+# Backend → Frontend /diagnose Response (image prediction + answer)
+class DiagnoseResponse(ChatResponse):
+    prediction: Optional[dict] = None   # same shape as /predict-cnn ({"prediction", "class_index", "class_name", "confidence"} or {"error"})
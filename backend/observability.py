@@ -0,0 +1,240 @@
+# backend/observability.py
+"""
+Logging, per-stage latency histograms and the Server-Timing header.
+
+- get_logger(): stdlib logging, level from LOG_LEVEL, plain text or JSON lines.
+- timed("stage") / observe("stage", seconds): feed the stage histogram that
+  /metrics exposes in Prometheus text format, and record the duration for
+  the current request's Server-Timing header.
+- ServerTimingMiddleware: ASGI middleware that tracks request durations per
+  route and, with SERVER_TIMING=1, adds a Server-Timing header.
+
+Stages: upload_read, decode, cnn_wait, cnn_inference, embed, faiss_search,
+prompt_build, llm_first_token, llm_total.
+
+Config (env):
+  LOG_LEVEL       DEBUG / INFO (default) / WARNING / ERROR
+  LOG_FORMAT      "text" (default) or "json"
+  SERVER_TIMING   "1" to add a Server-Timing header to responses (default "0")
+"""
+
+import bisect
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0") == "1"
+
+# Seconds; covers sub-millisecond cache hits up to slow LLM answers
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+# -------------------------------------------------
+# Logging
+# -------------------------------------------------
+class _JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+_configured = False
+_config_lock = threading.Lock()
+
+
+def _configure_logging():
+    global _configured
+    with _config_lock:
+        if _configured:
+            return
+        handler = logging.StreamHandler()
+        if LOG_FORMAT == "json":
+            handler.setFormatter(_JsonFormatter())
+        else:
+            handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)-7s %(name)s: %(message)s"))
+        root = logging.getLogger("agriassist")
+        root.addHandler(handler)
+        root.setLevel(LOG_LEVEL)
+        root.propagate = False
+        _configured = True
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger under the "agriassist" namespace, configured on first use."""
+    _configure_logging()
+    return logging.getLogger(f"agriassist.{name}")
+
+
+# -------------------------------------------------
+# Metrics
+# -------------------------------------------------
+class Histogram:
+    """Thread-safe cumulative histogram with Prometheus text output."""
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[tuple, list] = {}   # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            if idx < len(self.buckets):
+                series[idx] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        for labels, series in sorted(snapshot.items()):
+            base = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labelnames, labels))
+            sep = "," if base else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{base}{sep}le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{base}{sep}le="+Inf"}} {series[-1]}')
+            suffix = f"{{{base}}}" if base else ""
+            lines.append(f"{self.name}_sum{suffix} {series[-2]}")
+            lines.append(f"{self.name}_count{suffix} {series[-1]}")
+        return lines
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+STAGE_SECONDS = Histogram(
+    "agriassist_stage_seconds", "Latency of one processing stage.", ("stage",)
+)
+REQUEST_SECONDS = Histogram(
+    "agriassist_http_request_seconds", "HTTP request latency until the response is complete.",
+    ("method", "route", "status"),
+)
+
+# name -> (help, callback returning {label tuple or (): value})
+_gauges: Dict[str, Tuple[str, Tuple[str, ...], Callable[[], Dict[tuple, float]]]] = {}
+
+
+def register_gauge(name: str, help_text: str, callback: Callable[[], Dict[tuple, float]],
+                   labelnames: Tuple[str, ...] = ()):
+    """Gauge read at scrape time, e.g. queue depth or cache size."""
+    _gauges[name] = (help_text, labelnames, callback)
+
+
+def render_metrics() -> str:
+    """All metrics in Prometheus text exposition format."""
+    lines = STAGE_SECONDS.render() + REQUEST_SECONDS.render()
+    for name, (help_text, labelnames, callback) in sorted(_gauges.items()):
+        try:
+            values = callback()
+        except Exception:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        for labels, value in sorted(values.items()):
+            base = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(labelnames, labels))
+            lines.append(f"{name}{{{base}}} {float(value)}" if base else f"{name} {float(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# -------------------------------------------------
+# Stage timing
+# -------------------------------------------------
+# Per-request {stage: seconds}; None outside a request (startup, batch worker)
+_request_timings: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar(
+    "request_timings", default=None
+)
+
+
+def observe(stage: str, seconds: float):
+    """Record one stage duration in the histogram and the current request."""
+    STAGE_SECONDS.observe(seconds, stage)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def timed(stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - start)
+
+
+def server_timing_header(timings: Dict[str, float], total: Optional[float] = None) -> str:
+    parts = [f"{stage};dur={seconds * 1000.0:.1f}" for stage, seconds in timings.items()]
+    if total is not None:
+        parts.append(f"total;dur={total * 1000.0:.1f}")
+    return ", ".join(parts)
+
+
+class ServerTimingMiddleware:
+    """
+    Plain ASGI middleware (works with streaming responses):
+    opens a per-request timing scope, observes REQUEST_SECONDS per route and,
+    if enabled, adds a Server-Timing header with the stages done so far.
+    """
+
+    def __init__(self, app, enabled: bool = SERVER_TIMING):
+        self.app = app
+        self.enabled = enabled
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        timings: Dict[str, float] = {}
+        token = _request_timings.set(timings)
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                if self.enabled:
+                    header = server_timing_header(timings, time.perf_counter() - start)
+                    message = dict(message)
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"server-timing", header.encode("latin-1"))
+                    ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_timings.reset(token)
+            route = scope.get("route")
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                scope.get("method", ""),
+                getattr(route, "path", "unmatched"),
+                str(status["code"]),
+            )
@@ -0,0 +1,103 @@
+# backend/preprocessing.py
+"""
+Image decoding + preprocessing for the leaf classifier.
+
+Kept free of TensorFlow so it can run in worker processes (COMPUTE_EXECUTOR=process)
+and in the offline tools without loading the model.
+
+Fast path:
+- JPEG: `Image.draft` lets libjpeg decode at 1/2, 1/4 or 1/8 scale (DCT domain),
+  so a 12 MP phone photo is never fully decoded just to become 150x150.
+- Other formats: `resize(..., reducing_gap=...)` first shrinks with cheap
+  integer-factor box reduction, then does the final resample.
+- Output is float32 from the start (no float64 temporary), and can be written
+  into a caller-provided buffer (the CNN batcher passes its own batch buffer).
+
+Limits (env):
+  MAX_UPLOAD_BYTES   reject uploads larger than this (default 15 MB)
+  MAX_IMAGE_PIXELS   reject images with more pixels than this (default 50 MP)
+  FAST_DECODE        "1" (default) to use draft/reduce decoding, "0" for full decode
+"""
+
+import io
+import os
+
+import numpy as np
+from PIL import Image
+
+# Image size used during training
+IMG_SIZE = (150, 150)
+
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(15 * 1024 * 1024)))
+MAX_IMAGE_PIXELS = int(os.getenv("MAX_IMAGE_PIXELS", str(50_000_000)))
+FAST_DECODE = os.getenv("FAST_DECODE", "1") == "1"
+
+# PIL's own decompression-bomb guard, aligned with our limit
+Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+
+_SCALE = np.float32(1.0 / 255.0)
+
+
+class ImageTooLargeError(ValueError):
+    """Upload exceeds MAX_UPLOAD_BYTES or MAX_IMAGE_PIXELS."""
+
+
+class InvalidImageError(ValueError):
+    """Upload could not be decoded as an image."""
+
+
+def load_pixels(image_bytes, size=IMG_SIZE) -> np.ndarray:
+    """Decode image bytes → (H, W, 3) uint8 array resized to `size`."""
+    if len(image_bytes) > MAX_UPLOAD_BYTES:
+        raise ImageTooLargeError(
+            f"Image is {len(image_bytes)} bytes, limit is {MAX_UPLOAD_BYTES} bytes"
+        )
+
+    try:
+        img = Image.open(io.BytesIO(image_bytes))
+        width, height = img.size
+    except (Image.DecompressionBombError, Image.DecompressionBombWarning) as e:
+        # PIL refuses > 2x its limit in open() (the warning, between 1x and 2x, raises only under -W error)
+        raise ImageTooLargeError(str(e)) from e
+    except Exception as e:
+        raise InvalidImageError(f"Could not read image: {e}") from e
+
+    # Header-only check: nothing has been decoded yet
+    if width * height > MAX_IMAGE_PIXELS:
+        raise ImageTooLargeError(
+            f"Image is {width}x{height} pixels, limit is {MAX_IMAGE_PIXELS} pixels"
+        )
+
+    try:
+        if FAST_DECODE:
+            # JPEG only; a no-op for other formats. Picks the smallest
+            # DCT scale that is still >= size.
+            img.draft("RGB", size)
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        img = img.resize(size, reducing_gap=3.0 if FAST_DECODE else None)
+        return np.asarray(img, dtype=np.uint8)
+    except (Image.DecompressionBombError, Image.DecompressionBombWarning) as e:
+        raise ImageTooLargeError(str(e)) from e
+    except Exception as e:
+        raise InvalidImageError(f"Could not decode image: {e}") from e
+
+
+def to_model_input(pixels: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+    """Scale uint8 pixels to float32 [0, 1], writing into `out` if given."""
+    if out is None:
+        out = np.empty(pixels.shape, dtype=np.float32)
+    np.multiply(pixels, _SCALE, out=out, casting="unsafe")
+    return out
+
+
+def preprocess_image(image_bytes, out: np.ndarray = None) -> np.ndarray:
+    """
+    Convert uploaded image bytes → (1, H, W, 3) float32 array for the model.
+    Pass `out` (shape (1, H, W, 3), float32) to reuse a preallocated buffer.
+    """
+    pixels = load_pixels(image_bytes)
+    if out is None:
+        out = np.empty((1,) + pixels.shape, dtype=np.float32)
+    to_model_input(pixels, out[0])
+    return out
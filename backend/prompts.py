@@ -0,0 +1,244 @@
+# backend/prompts.py
+"""
+Prompt construction for the chat endpoints (/chat and /chat/stream).
+
+The instruction block is parsed into a template once at import; per request
+only the context and the values are filled in.
+
+Config (env):
+  RAG_CONTEXT_TOKENS  approx. token budget for retrieved context (default: 500)
+"""
+
+import os
+import re
+from string import Formatter
+from typing import Iterator, List, Optional, Tuple
+
+from labels import class_crop, class_label, is_healthy_class
+from models import Disease
+
+RAG_CONTEXT_TOKENS = int(os.getenv("RAG_CONTEXT_TOKENS", "500"))
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_NON_WORD = re.compile(r"[^\w]+")
+
+NO_CONTEXT_TEXT = (
+    "No specific disease information was found in the database for this query. "
+    "You must still answer using your general agriculture knowledge."
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English text)."""
+    return len(text) // 4 + 1
+
+
+def _sentences(text: str) -> List[str]:
+    out = []
+    for sentence in _SENTENCE_END.split(text or ""):
+        sentence = sentence.strip()
+        if sentence:
+            out.append(sentence if sentence[-1] in ".!?" else sentence + ".")
+    return out
+
+
+def _context_items(diseases: List[Disease], passages: Optional[List[dict]]) -> Iterator[Tuple[str, list, bool]]:
+    """(header, [(field label, text)], header informative on its own) per document, most relevant first."""
+    for d in diseases:
+        yield (f"Crop: {d.crop}. Disease: {d.disease_name}.",
+               [("Symptoms", d.symptoms), ("Solution", d.solution), ("Prevention", d.prevention)], True)
+    for p in passages or []:
+        title = f" {p['title']}:" if p.get("title") else ""
+        yield f"Advisory ({p['source']}):{title}", [("", p["text"])], False
+
+
+def _fit(header: str, fields: list, budget: int) -> Tuple[Optional[str], bool]:
+    """Header plus as many sentences as fit in budget → (text or None, complete?)."""
+    if estimate_tokens(header) > budget:
+        return None, False
+    out = header
+    for label, sentences in fields:
+        prefix = f" {label}: " if label else " "
+        for i, sentence in enumerate(sentences):
+            piece = (prefix if i == 0 else " ") + sentence
+            if estimate_tokens(out + piece) > budget:
+                return out, False
+            out += piece
+    return out, True
+
+
+def build_context_text(diseases: List[Disease], passages: Optional[List[dict]] = None,
+                       max_tokens: int = RAG_CONTEXT_TOKENS) -> str:
+    """
+    Context text from retrieved diseases and corpus passages (in relevance order).
+
+    Sentences already used are skipped (e.g. the same prevention advice in two
+    records, or an advisory repeating a record), and the text is cut at
+    max_tokens so a long record can't blow up prompt size and LLM latency.
+    """
+    seen = set()
+    context_parts = []
+    remaining = max_tokens
+    for header, raw_fields, named in _context_items(diseases, passages):
+        fields = []
+        for label, text in raw_fields:
+            fresh = []
+            for sentence in _sentences(text):
+                key = _NON_WORD.sub(" ", sentence.lower()).strip()
+                if key and key not in seen:
+                    seen.add(key)
+                    fresh.append(sentence)
+            if fresh:
+                fields.append((label, fresh))
+        if not fields and not named:
+            continue
+
+        # A disease whose details were all seen still names its crop
+        text, complete = _fit(header, fields, remaining)
+        if text is not None:
+            context_parts.append(text)
+            remaining -= estimate_tokens(text)
+        if not complete:
+            break
+
+    return " ".join(context_parts) or NO_CONTEXT_TEXT
+
+
+def build_cnn_text(cnn_pred: Optional[int]) -> str:
+    """CNN hint based on image result (class index from /predict-cnn)."""
+    label = class_label(cnn_pred)
+    if label is None:
+        return (
+            "No image analysis was used. Answer using only the question and database information."
+        )
+    if is_healthy_class(cnn_pred):
+        return (
+            f"The leaf image suggests a healthy {class_crop(cnn_pred)} plant. "
+            "Explain general good practices and early prevention tips."
+        )
+    return (
+        f"The leaf image suggests {label} disease. "
+        f"Focus on {label} treatment and prevention for the answer."
+    )
+
+
+class PromptTemplate:
+    """str.format-style template split into literal chunks once; render() is a single join."""
+
+    def __init__(self, template: str):
+        self._parts = [(literal, field) for literal, field, _, _ in Formatter().parse(template)]
+        self.fields = {field for _, field in self._parts if field is not None}
+
+    def render(self, **values) -> str:
+        out = []
+        for literal, field in self._parts:
+            out.append(literal)
+            if field is not None:
+                out.append(str(values[field]))
+        return "".join(out)
+
+
+CHAT_PROMPT = PromptTemplate("""
+You are AgriAssist, an agriculture assistant for farmers.
+
+User language: {lang}
+Image analysis: {cnn_text}
+Database information: {context_text}
+
+User question: {user_msg}
+
+VERY IMPORTANT RULES:
+
+1. DOMAIN LIMIT:
+   - Only answer questions related to agriculture, crops, soil, water for farming, plant diseases, pesticides, fertilizers, weather for crops, and farm practices.
+   - If the question is NOT about agriculture or farming, reply exactly:
+     "Please ask something related to agriculture."
+   - Do NOT answer about politics, movies, coding, gossip, finance, or any other non-agriculture topic.
+
+2. USE DATABASE AND IMAGE:
+   - If database information mentions a disease, use it as the main reference.
+   - If image analysis names a disease, assume the plant has that disease unless the question is clearly different.
+   - If database information is empty, still answer using your general agriculture knowledge.
+
+3. ANSWER STYLE:
+   - Reply in {lang}.
+   - Use very simple words suitable for farmers.
+   - Use 3 to 5 short sentences only.
+   - No technical or scientific jargon.
+   - Give direct, practical steps (what to do now, what to avoid, how to prevent).
+   - If you are not fully sure, write one sentence like:
+     "For exact advice, please also ask a local agriculture expert."
+
+Now give your final answer for the farmer.
+""")
+
+
+def build_prompt(user_msg: str, lang: str, cnn_pred: Optional[int], diseases: List[Disease],
+                 passages: Optional[List[dict]] = None) -> str:
+    """Full Gemini prompt for one chat turn."""
+    return CHAT_PROMPT.render(
+        lang=lang,
+        cnn_text=build_cnn_text(cnn_pred),
+        context_text=build_context_text(diseases, passages),
+        user_msg=user_msg,
+    )
+
+
+def _first_sentences(text: str, n: int = 2) -> str:
+    return " ".join(_sentences(text)[:n])
+
+
+# Shown before the (English) fallback answer when another language was asked for
+FALLBACK_NOTICES = {
+    "hindi": "AI सहायक अभी उपलब्ध नहीं है। हमारे डेटाबेस से सलाह (अंग्रेज़ी में):",
+    "tamil": "AI உதவியாளர் தற்போது கிடைக்கவில்லை. எங்கள் தரவுத்தளத்திலிருந்து ஆலோசனை (ஆங்கிலத்தில்):",
+    "telugu": "AI సహాయకుడు ప్రస్తుతం అందుబాటులో లేదు. మా డేటాబేస్ నుండి సలహా (ఆంగ్లంలో):",
+    "malayalam": "AI സഹായി ഇപ്പോൾ ലഭ്യമല്ല. ഞങ്ങളുടെ ഡാറ്റാബേസിൽ നിന്നുള്ള ഉപദേശം (ഇംഗ്ലീഷിൽ):",
+    "kannada": "AI ಸಹಾಯಕ ಈಗ ಲಭ್ಯವಿಲ್ಲ. ನಮ್ಮ ಡೇಟಾಬೇಸ್‌ನಿಂದ ಸಲಹೆ (ಇಂಗ್ಲಿಷ್‌ನಲ್ಲಿ):",
+    "gujarati": "AI સહાયક હાલમાં ઉપલબ્ધ નથી. અમારા ડેટાબેઝમાંથી સલાહ (અંગ્રેજીમાં):",
+    "marathi": "AI सहाय्यक सध्या उपलब्ध नाही. आमच्या डेटाबेसमधील सल्ला (इंग्रजीमध्ये):",
+}
+DEFAULT_FALLBACK_NOTICE = "The AI assistant is unavailable right now. Advice from our database (in English):"
+
+
+def build_fallback_answer(cnn_pred: Optional[int], diseases: List[Disease], lang: str = "English") -> str:
+    """
+    Instant answer from the retrieved Disease records, used when Gemini is
+    unavailable or too slow. Built locally in English; for any other `lang`
+    a notice in that language (or in English, if unknown) comes first.
+    """
+    answer = _fallback_text(cnn_pred, diseases)
+    language = (lang or "English").strip().lower()
+    if language == "english":
+        return answer
+    return f"{FALLBACK_NOTICES.get(language, DEFAULT_FALLBACK_NOTICE)}\n\n{answer}"
+
+
+def _fallback_text(cnn_pred: Optional[int], diseases: List[Disease]) -> str:
+    label = class_label(cnn_pred)
+    if not diseases:
+        if label is not None and is_healthy_class(cnn_pred):
+            return (
+                f"The leaf image suggests a healthy {class_crop(cnn_pred)} plant. "
+                "Keep watering at the base, remove old leaves and check the crop every week. "
+                "Our assistant is busy right now, please ask again in a moment for more advice."
+            )
+        return (
+            "Our assistant is busy right now and we found no matching advice for this question. "
+            "Please try again in a moment, or ask a local agriculture expert."
+        )
+
+    d = diseases[0]
+    parts = [f"{d.crop} – {d.disease_name}."]
+    if d.solution:
+        parts.append(f"What to do now: {_first_sentences(d.solution)}")
+    if d.prevention:
+        parts.append(f"To prevent it: {_first_sentences(d.prevention)}")
+    if d.pesticides:
+        names = ", ".join(p.name for p in d.pesticides[:3])
+        parts.append(f"Products that can help: {names}.")
+    others = [f"{o.disease_name} ({o.crop})" for o in diseases[1:3]]
+    if others:
+        parts.append(f"It could also be {' or '.join(others)}.")
+    parts.append("For exact advice, please also ask a local agriculture expert.")
+    return " ".join(parts)
@@ -0,0 +1,251 @@
+# backend/record_store.py
+"""
+Offset-indexed, pickle-free storage for Disease records and corpus passages.
+
+File layout:
+    8 bytes   magic  b"AGRIREC1"
+    4 bytes   header length N (little-endian uint32)
+    N bytes   header JSON: {"ids": [...], "offsets": [...], "lengths": [...]}
+    ...       record bodies: one UTF-8 JSON object per record, back to back
+
+The file is opened with mmap, so several workers on one host share the same
+pages through the OS cache. Records are parsed (into `Disease` objects for
+DiseaseStore, plain dicts for RecordStore) only when first looked up by id.
+
+VectorOwners maps FAISS vector ids to document ids with one int32 array
+(saved as .npy, opened with mmap) instead of a per-vector dict.
+"""
+
+import json
+import mmap
+import os
+import struct
+import threading
+import uuid
+from collections.abc import Mapping
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+from models import Disease
+
+MAGIC = b"AGRIREC1"
+_HEADER_LEN = struct.Struct("<I")
+
+
+def disease_to_dict(disease) -> dict:
+    """Plain dict for a Disease (pydantic v1 or v2) or an already-plain dict."""
+    if isinstance(disease, dict):
+        return disease
+    if hasattr(disease, "model_dump"):
+        return disease.model_dump()
+    return disease.dict()
+
+
+def record_json(record) -> bytes:
+    """Compact UTF-8 JSON of one record: the stored form, and the form sent in API responses."""
+    return json.dumps(disease_to_dict(record), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def write_records(path: str, records: Mapping):
+    """Write {id: Disease or dict} to `path` atomically (per-process temp file, then os.replace)."""
+    ids = []
+    bodies = []
+    offsets = []
+    lengths = []
+    position = 0
+    raw = getattr(records, "raw", None)   # stored bytes: no decode / re-encode of unchanged records
+    for record_id in records:
+        body = raw(record_id) if raw is not None else record_json(records[record_id])
+        ids.append(str(record_id))
+        offsets.append(position)
+        lengths.append(len(body))
+        bodies.append(body)
+        position += len(body)
+
+    header = json.dumps({"ids": ids, "offsets": offsets, "lengths": lengths}).encode("utf-8")
+
+    tmp_path = f"{path}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(_HEADER_LEN.pack(len(header)))
+        f.write(header)
+        for body in bodies:
+            f.write(body)
+    os.replace(tmp_path, path)
+
+
+class RecordStore(Mapping):
+    """
+    Read-only {id → dict} mapping backed by a memory-mapped record file.
+    memoize=False re-parses on every lookup instead of keeping parsed
+    records around (for large stores that are only sampled, e.g. passages).
+    """
+
+    def __init__(self, path: str, memoize: bool = True):
+        self.path = path
+        self.memoize = memoize
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a record file")
+
+        start = len(MAGIC)
+        (header_len,) = _HEADER_LEN.unpack_from(self._mm, start)
+        start += _HEADER_LEN.size
+        header = json.loads(bytes(self._mm[start:start + header_len]))
+        body_start = start + header_len
+
+        self._ids = header["ids"]
+        self._locations = {
+            record_id: (body_start + offset, length)
+            for record_id, offset, length in zip(header["ids"], header["offsets"], header["lengths"])
+        }
+        self._parsed = {}
+        self._lock = threading.Lock()
+
+    def raw(self, record_id: str) -> bytes:
+        """Stored JSON bytes of one record."""
+        offset, length = self._locations[record_id]
+        return bytes(self._mm[offset:offset + length])
+
+    def _decode(self, raw: bytes):
+        return json.loads(raw)
+
+    def __getitem__(self, record_id: str):
+        record = self._parsed.get(record_id)
+        if record is not None:
+            return record
+        if record_id not in self._locations:
+            raise KeyError(record_id)
+        record = self._decode(self.raw(record_id))
+        if not self.memoize:
+            return record
+        with self._lock:
+            return self._parsed.setdefault(record_id, record)
+
+    def __contains__(self, record_id) -> bool:
+        return record_id in self._locations
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+class DiseaseStore(RecordStore):
+    """Read-only {disease id → Disease} mapping backed by a memory-mapped record file."""
+
+    def _decode(self, raw: bytes) -> Disease:
+        return Disease(**json.loads(raw))
+
+
+class RecordOverlay(Mapping):
+    """
+    `base` minus `removed` ids plus `added` records, without copying `base`:
+    a reload touches only the records that changed. Added ids must be new.
+    """
+
+    def __init__(self, base: Mapping, added: dict, removed: Iterable[str]):
+        self._base = base
+        self._added = added
+        self._removed = {i for i in removed if i in base}
+
+    def raw(self, record_id: str) -> bytes:
+        if record_id in self._added:
+            return record_json(self._added[record_id])
+        if record_id in self._removed:
+            raise KeyError(record_id)
+        base_raw = getattr(self._base, "raw", None)
+        return base_raw(record_id) if base_raw is not None else record_json(self._base[record_id])
+
+    def __getitem__(self, record_id: str):
+        if record_id in self._added:
+            return self._added[record_id]
+        if record_id in self._removed:
+            raise KeyError(record_id)
+        return self._base[record_id]
+
+    def __contains__(self, record_id) -> bool:
+        return record_id in self._added or (record_id in self._base and record_id not in self._removed)
+
+    def __iter__(self):
+        for record_id in self._base:
+            if record_id not in self._removed:
+                yield record_id
+        yield from self._added
+
+    def __len__(self) -> int:
+        return len(self._base) - len(self._removed) + len(self._added)
+
+
+class VectorOwners:
+    """
+    FAISS vector id → document id, as an int32 array of document ordinals
+    (-1: no owner) plus the list of document ids. Loading is one np.load
+    with mmap; only the document list (one entry per document) is parsed.
+    """
+
+    def __init__(self, owners: Optional[np.ndarray] = None, documents: Optional[List[str]] = None):
+        self._owners = owners if owners is not None else np.zeros(0, dtype=np.int32)
+        self.documents = list(documents or [])
+        self._ordinals = {doc_id: i for i, doc_id in enumerate(self.documents)}
+
+    @classmethod
+    def load(cls, path: str, documents: List[str]) -> "VectorOwners":
+        return cls(np.load(path, mmap_mode="r"), documents)
+
+    def save(self, path: str):
+        with open(path, "wb") as f:
+            np.save(f, np.asarray(self._owners, dtype=np.int32))
+
+    def copy(self) -> "VectorOwners":
+        """Writable copy to build the next state on (the array copy is 4 bytes per vector)."""
+        return VectorOwners(np.array(self._owners, dtype=np.int32), self.documents)
+
+    def get(self, vector_id: int) -> Optional[str]:
+        if not 0 <= vector_id < len(self._owners):
+            return None
+        ordinal = int(self._owners[vector_id])
+        return self.documents[ordinal] if ordinal >= 0 else None
+
+    def __contains__(self, vector_id) -> bool:
+        return self.get(int(vector_id)) is not None
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(np.asarray(self._owners) >= 0))
+
+    def ids(self) -> np.ndarray:
+        """Vector ids that have an owner."""
+        return np.flatnonzero(np.asarray(self._owners) >= 0).astype("int64")
+
+    def add(self, vector_ids: np.ndarray, doc_ids: List[str]):
+        """Record the owner of each new vector id."""
+        vector_ids = np.asarray(vector_ids, dtype="int64")
+        if len(vector_ids) == 0:
+            return
+        size = int(vector_ids.max()) + 1
+        if size > len(self._owners):
+            grown = np.full(size, -1, dtype=np.int32)
+            grown[:len(self._owners)] = self._owners
+            self._owners = grown
+        ordinals = np.empty(len(doc_ids), dtype=np.int32)
+        for i, doc_id in enumerate(doc_ids):
+            ordinal = self._ordinals.get(doc_id)
+            if ordinal is None:
+                ordinal = self._ordinals[doc_id] = len(self.documents)
+                self.documents.append(doc_id)
+            ordinals[i] = ordinal
+        self._owners[vector_ids] = ordinals
+
+    def remove_document(self, doc_id: str) -> np.ndarray:
+        """Drop every vector of a document → their ids."""
+        ordinal = self._ordinals.get(doc_id)
+        if ordinal is None:
+            return np.zeros(0, dtype="int64")
+        vector_ids = np.flatnonzero(self._owners == ordinal).astype("int64")
+        self._owners[vector_ids] = -1
+        return vector_ids
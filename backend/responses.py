@@ -0,0 +1,112 @@
+# backend/responses.py
+"""
+Fast JSON bodies for the chat endpoints.
+
+- dumps(): orjson when it is installed, the stdlib json module otherwise
+  (same output: UTF-8, no ASCII escaping, compact separators)
+- chat_body(): a ChatResponse / DiagnoseResponse body assembled from the
+  disease JSON fragments the knowledge base prepares when its index loads
+  (database.AgriKnowledgeBase.disease_fragments), so no Disease model is
+  validated or encoded per request
+- json_response(): gzip or brotli (when the `brotli` package is installed)
+  for bodies of at least RESPONSE_COMPRESS_MIN_BYTES, chosen from the
+  request's Accept-Encoding
+
+Config (env):
+  RESPONSE_COMPRESSION         "1" (default) / "0"
+  RESPONSE_COMPRESS_MIN_BYTES  smallest body worth compressing (default: 1024)
+  RESPONSE_GZIP_LEVEL          1-9 (default: 5)
+  RESPONSE_BROTLI_QUALITY      0-11 (default: 4; higher is much slower)
+"""
+
+import gzip
+import json
+import os
+from typing import List, Optional
+
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:   # optional speed-up
+    orjson = None
+
+try:
+    import brotli
+except ImportError:   # optional: gzip only
+    brotli = None
+
+RESPONSE_COMPRESSION = os.getenv("RESPONSE_COMPRESSION", "1") == "1"
+RESPONSE_COMPRESS_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESS_MIN_BYTES", "1024"))
+RESPONSE_GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "5"))
+RESPONSE_BROTLI_QUALITY = int(os.getenv("RESPONSE_BROTLI_QUALITY", "4"))
+
+_MISSING = object()
+
+
+def dumps(obj) -> bytes:
+    """Compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def chat_body(reply: str, disease_fragments: List[bytes], language: str, prediction=_MISSING) -> bytes:
+    """ChatResponse JSON (DiagnoseResponse when `prediction` is given) from pre-serialised diseases."""
+    parts = [
+        b'{"response":', dumps(reply),
+        b',"source_diseases":[', b",".join(disease_fragments),
+        b'],"language":', dumps(language),
+    ]
+    if prediction is not _MISSING:
+        parts += [b',"prediction":', dumps(prediction)]
+    parts.append(b"}")
+    return b"".join(parts)
+
+
+def _accepted(accept_encoding: str) -> dict:
+    """{"gzip": q, "br": q, ...} from an Accept-Encoding header."""
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.lower()] = q
+    return accepted
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick "br", "gzip" or None; brotli wins ties because it compresses JSON text better."""
+    if not RESPONSE_COMPRESSION or not accept_encoding:
+        return None
+    accepted = _accepted(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    options = []
+    if brotli is not None:
+        options.append((accepted.get("br", wildcard), 1, "br"))
+    options.append((accepted.get("gzip", wildcard), 0, "gzip"))
+    q, _, name = max(options)
+    return name if q > 0 else None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, mode=brotli.MODE_TEXT, quality=RESPONSE_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=RESPONSE_GZIP_LEVEL, mtime=0)
+
+
+def json_response(body: bytes, accept_encoding: Optional[str] = None, status_code: int = 200) -> Response:
+    """application/json Response for ready-made bytes, compressed when large and accepted."""
+    headers = {"Vary": "Accept-Encoding"}
+    if len(body) >= RESPONSE_COMPRESS_MIN_BYTES:
+        encoding = choose_encoding(accept_encoding)
+        if encoding is not None:
+            body = compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
@@ -0,0 +1,347 @@
+# backend/score_images.py
+"""
+Offline bulk scoring of leaf photos with the CNN (no HTTP, no server).
+
+Reads images from a directory (recursively) or a .zip / .tar(.gz/.bz2/.xz)
+archive, decodes + resizes them in a process pool (preprocessing.load_pixels),
+runs batched inference with the model from cnn_model.py and appends one
+row per image to a CSV or JSONL file:
+
+    file, class_index, label, confidence, top_k, error
+
+    python score_images.py survey_2024/ --output scores.csv
+    python score_images.py photos.zip --output scores.jsonl --top-k 5 --workers 8
+    python score_images.py photos.tar.gz --output scores.csv --resume
+
+The output file is the checkpoint: rows are flushed after every batch and
+--resume skips files that already have a row (a half-written last line
+from a crash is dropped first). Images that fail to decode get a row with
+an error message instead of a prediction; add --retry-errors to score
+those again (the new row is appended, the last row for a file wins).
+
+    python score_images.py photos.tar.gz --output scores.csv --resume --retry-errors
+
+Model selection follows cnn_model.py (CNN_MODEL_PATH / CNN_BACKEND /
+TFLITE_*), or --model / --backend here.
+"""
+
+import argparse
+import csv
+import io
+import json
+import multiprocessing as mp
+import os
+import sys
+import tarfile
+import time
+import zipfile
+from collections import deque
+
+import numpy as np
+
+from labels import BINARY_CLASS_NAMES, class_label
+from preprocessing import IMG_SIZE, load_pixels, to_model_input
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp", ".tif", ".tiff")
+FIELDS = ("file", "class_index", "label", "confidence", "top_k", "error")
+
+
+# -------------------------------------------------
+# Input: directory / zip / tar → decode tasks
+# -------------------------------------------------
+def _is_image(name: str) -> bool:
+    base = os.path.basename(name)
+    return not base.startswith(".") and name.lower().endswith(IMAGE_EXTENSIONS)
+
+
+def list_tasks(source: str):
+    """
+    Yield (name, kind, payload) decode tasks.
+    Directory and zip entries are read by the pool workers themselves;
+    tar members can only be read in order, so their bytes are sent along.
+    """
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                if _is_image(name):
+                    yield os.path.relpath(path, source), "path", path
+    elif zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as zf:
+            for info in zf.infolist():
+                if not info.is_dir() and _is_image(info.filename):
+                    yield info.filename, "zip", info.filename
+    elif tarfile.is_tarfile(source):
+        with tarfile.open(source, "r|*") as tf:   # streaming mode: no random access needed
+            for member in tf:
+                if member.isfile() and _is_image(member.name):
+                    yield member.name, "bytes", tf.extractfile(member).read()
+    else:
+        raise SystemExit(f"❌ {source} is not a directory, zip or tar archive")
+
+
+_zip = None
+
+
+def _init_worker(zip_path):
+    global _zip
+    if zip_path:
+        _zip = zipfile.ZipFile(zip_path)
+
+
+def _decode(task):
+    """Pool worker: (name, kind, payload) → (name, uint8 pixels or None, error or None)."""
+    name, kind, payload = task
+    try:
+        if kind == "path":
+            with open(payload, "rb") as f:
+                data = f.read()
+        elif kind == "zip":
+            data = _zip.read(payload)
+        else:
+            data = payload
+        return name, load_pixels(data), None
+    except Exception as e:
+        return name, None, f"{type(e).__name__}: {e}"
+
+
+def decode_all(pool, tasks, max_pending: int):
+    """
+    Like pool.imap(_decode, tasks), but with at most `max_pending` tasks in
+    flight: imap queues every task up front, and tar payloads plus decoded
+    pixels would pile up in memory whenever inference is the slower side.
+    """
+    pending = deque()
+    for task in tasks:
+        pending.append(pool.apply_async(_decode, (task,)))
+        if len(pending) >= max_pending:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+# -------------------------------------------------
+# Output: CSV / JSONL, doubling as the checkpoint
+# -------------------------------------------------
+def _output_format(path: str, fmt: str = None) -> str:
+    if fmt:
+        return fmt
+    return "jsonl" if path.lower().endswith((".jsonl", ".ndjson")) else "csv"
+
+
+def load_done(path: str, fmt: str, retry_errors: bool = False) -> set:
+    """Files that already have a row (without an error if retry_errors); drops a partially written last line."""
+    if not os.path.exists(path):
+        return set()
+
+    with open(path, "rb+") as f:
+        content = f.read()
+        end = content.rfind(b"\n") + 1
+        if end < len(content):
+            f.truncate(end)
+    text = content[:end].decode("utf-8")
+
+    if fmt == "jsonl":
+        rows = []
+        for line in text.splitlines():
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                continue
+    else:
+        rows = csv.DictReader(io.StringIO(text))
+
+    # Rows are in order: a later row for the same file replaces the earlier one
+    errors = {}
+    for row in rows:
+        if isinstance(row, dict) and row.get("file"):
+            errors[row["file"]] = bool(row.get("error"))
+    return {name for name, failed in errors.items() if not (retry_errors and failed)}
+
+
+class ResultWriter:
+    def __init__(self, path: str, fmt: str, append: bool):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        write_header = not (append and os.path.exists(path) and os.path.getsize(path) > 0)
+        self.fmt = fmt
+        self._file = open(path, "a" if append else "w", encoding="utf-8", newline="")
+        self._csv = None
+        if fmt == "csv":
+            self._csv = csv.DictWriter(self._file, fieldnames=FIELDS)
+            if write_header:
+                self._csv.writeheader()
+
+    def write(self, rows):
+        for row in rows:
+            if self._csv is not None:
+                top_k = ";".join(f"{t['label']}:{t['confidence']:.4f}" for t in row["top_k"])
+                self._csv.writerow({**row, "top_k": top_k})
+            else:
+                self._file.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+# -------------------------------------------------
+# Inference
+# -------------------------------------------------
+def _label(class_index: int, binary: bool) -> str:
+    """Same index → label mapping as cnn_model._format_prediction."""
+    if binary:
+        return BINARY_CLASS_NAMES[class_index]
+    return class_label(class_index) or f"class_{class_index}"
+
+
+def _rows(names, probs, top_k: int):
+    rows = []
+    for name, p in zip(names, probs):
+        p = np.asarray(p, dtype=np.float32).ravel()
+        binary = p.size == 1
+        if binary:
+            # Binary sigmoid model: one probability for class 1
+            p = np.array([1.0 - p[0], p[0]], dtype=np.float32)
+        order = np.argsort(p)[::-1][:top_k]
+        best = int(order[0])
+        rows.append({
+            "file": name,
+            "class_index": best,
+            "label": _label(best, binary),
+            "confidence": round(float(p[best]), 6),
+            "top_k": [
+                {"class_index": int(i), "label": _label(int(i), binary), "confidence": round(float(p[i]), 6)}
+                for i in order
+            ],
+            "error": "",
+        })
+    return rows
+
+
+class Scorer:
+    """Batched forward passes through the model loaded by cnn_model.py."""
+
+    def __init__(self, batch_size: int):
+        import cnn_model   # imported after --model / --backend are applied
+
+        try:
+            cnn_model.load_model()
+        except Exception as e:
+            raise SystemExit(f"❌ CNN model could not be loaded (see CNN_MODEL_PATH): {e}")
+        self._cnn = cnn_model
+        self.remote = cnn_model.INFERENCE_MODE == "remote"
+        self._buffer = np.zeros((batch_size, IMG_SIZE[1], IMG_SIZE[0], 3), dtype=np.float32)
+
+    def predict(self, pixels_list) -> np.ndarray:
+        if self.remote:
+            # The model server batches these together
+            futures = [self._cnn.submit_pixels(p) for p in pixels_list]
+            return np.concatenate([self._cnn.wait_prediction(f) for f in futures], axis=0)
+        n = len(pixels_list)
+        for i, pixels in enumerate(pixels_list):
+            to_model_input(pixels, self._buffer[i])
+        return np.asarray(self._cnn.cnn_model.predict(self._buffer[:n]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="directory, .zip or .tar(.gz) archive of images")
+    parser.add_argument("--output", required=True, help=".csv or .jsonl results file")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="override format detection")
+    parser.add_argument("--resume", action="store_true", help="skip files already in --output")
+    parser.add_argument("--retry-errors", action="store_true",
+                        help="with --resume, score files whose earlier row has an error again")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1),
+                        help="decode processes")
+    parser.add_argument("--max-pending", type=int,
+                        help="decode tasks in flight (default: 4 batches or 16 per worker, whichever is more)")
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--model", help="model file (sets CNN_MODEL_PATH)")
+    parser.add_argument("--backend", choices=("keras", "tflite"), help="sets CNN_BACKEND")
+    parser.add_argument("--report", help="write the throughput summary as JSON")
+    parser.add_argument("--progress-every", type=float, default=10.0, help="seconds between progress lines")
+    args = parser.parse_args()
+
+    if args.model:
+        os.environ["CNN_MODEL_PATH"] = os.path.abspath(args.model)
+    if args.backend:
+        os.environ["CNN_BACKEND"] = args.backend
+
+    fmt = _output_format(args.output, args.format)
+    done = load_done(args.output, fmt, args.retry_errors) if args.resume else set()
+    if done:
+        print(f"↩️ Resuming: {len(done)} files already scored", file=sys.stderr)
+
+    zip_path = args.source if not os.path.isdir(args.source) and zipfile.is_zipfile(args.source) else None
+    tasks = (t for t in list_tasks(args.source) if t[0] not in done)
+
+    # Spawned decode workers import only PIL / numpy, never TensorFlow
+    ctx = mp.get_context("spawn")
+    pool = ctx.Pool(args.workers, initializer=_init_worker, initargs=(zip_path,))
+    scorer = Scorer(args.batch_size)
+    writer = ResultWriter(args.output, fmt, append=args.resume)
+
+    scored = errors = 0
+    infer_seconds = 0.0
+    start = last_report = time.perf_counter()
+    names, pixels_list = [], []
+
+    def flush():
+        nonlocal scored, infer_seconds
+        if not names:
+            return
+        t0 = time.perf_counter()
+        probs = scorer.predict(pixels_list)
+        infer_seconds += time.perf_counter() - t0
+        writer.write(_rows(names, probs, args.top_k))
+        scored += len(names)
+        names.clear()
+        pixels_list.clear()
+
+    try:
+        max_pending = args.max_pending or max(4 * args.batch_size, 16 * args.workers)
+        for name, pixels, error in decode_all(pool, tasks, max_pending):
+            if error is not None:
+                errors += 1
+                writer.write([{"file": name, "class_index": "", "label": "", "confidence": "",
+                               "top_k": [], "error": error}])
+            else:
+                names.append(name)
+                pixels_list.append(pixels)
+                if len(names) >= args.batch_size:
+                    flush()
+
+            now = time.perf_counter()
+            if now - last_report >= args.progress_every:
+                last_report = now
+                print(f"⏳ {scored} scored, {errors} errors, {scored / (now - start):.1f} images/s",
+                      file=sys.stderr)
+        flush()
+    finally:
+        writer.close()
+        pool.terminate()
+
+    elapsed = time.perf_counter() - start
+    summary = {
+        "source": args.source,
+        "output": args.output,
+        "scored": scored,
+        "errors": errors,
+        "skipped_resumed": len(done),
+        "elapsed_s": round(elapsed, 3),
+        "images_per_s": round(scored / elapsed, 2) if elapsed > 0 else 0.0,
+        "inference_s": round(infer_seconds, 3),
+        "batch_size": args.batch_size,
+        "workers": args.workers,
+    }
+    print(f"✅ Scored {scored} images ({errors} errors) in {elapsed:.1f}s: "
+          f"{summary['images_per_s']} images/s, {infer_seconds:.1f}s in inference", file=sys.stderr)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+admission.Limiter priority queue / rejection and admission.RateLimiter token buckets.
+
+    cd backend && python -m unittest discover tests
+"""
+
+import asyncio
+import unittest
+from unittest import mock
+
+import admission
+from admission import PRIORITY_HIGH, PRIORITY_NORMAL, AdmissionRejected, Limiter, RateLimiter
+
+
+class LimiterTest(unittest.TestCase):
+    def test_queued_requests_are_admitted_by_priority_then_arrival(self):
+        async def scenario():
+            limiter = Limiter("chat", max_concurrency=1, max_queue=10, queue_timeout=5)
+            release_first = await limiter.acquire()
+            order = []
+
+            async def request(name, priority):
+                release = await limiter.acquire(priority)
+                order.append(name)
+                release()
+
+            tasks = [
+                asyncio.create_task(request("normal-1", PRIORITY_NORMAL)),
+                asyncio.create_task(request("high-1", PRIORITY_HIGH)),
+                asyncio.create_task(request("normal-2", PRIORITY_NORMAL)),
+                asyncio.create_task(request("high-2", PRIORITY_HIGH)),
+            ]
+            await asyncio.sleep(0)   # all four are queued now
+            self.assertEqual(limiter.stats()["queued"], 4)
+            release_first()
+            await asyncio.gather(*tasks)
+            return order, limiter.stats()
+
+        order, stats = asyncio.run(scenario())
+        self.assertEqual(order, ["high-1", "high-2", "normal-1", "normal-2"])
+        self.assertEqual((stats["active"], stats["queued"], stats["admitted"]), (0, 0, 5))
+
+    def test_full_queue_is_rejected_with_503_and_retry_after(self):
+        async def scenario():
+            limiter = Limiter("predict", max_concurrency=1, max_queue=1, queue_timeout=5)
+            release = await limiter.acquire()
+            waiting = asyncio.create_task(limiter.acquire())
+            await asyncio.sleep(0)
+            with self.assertRaises(AdmissionRejected) as caught:
+                await limiter.acquire()
+            release()
+            (await waiting)()
+            return caught.exception, limiter.stats()
+
+        rejected, stats = asyncio.run(scenario())
+        self.assertEqual(rejected.status_code, 503)
+        self.assertGreaterEqual(rejected.retry_after, 1)
+        self.assertEqual(stats["rejected_full"], 1)
+        self.assertEqual(stats["active"], 0)
+
+    def test_wait_past_queue_timeout_is_rejected_and_frees_its_place(self):
+        async def scenario():
+            limiter = Limiter("chat", max_concurrency=1, max_queue=1, queue_timeout=0.02)
+            release = await limiter.acquire()
+            with self.assertRaises(AdmissionRejected) as caught:
+                await limiter.acquire()
+            self.assertEqual(limiter.stats()["queued"], 0)
+            release()
+            (await limiter.acquire())()   # the slot was not leaked to the timed-out waiter
+            return caught.exception, limiter.stats()
+
+        rejected, stats = asyncio.run(scenario())
+        self.assertEqual(rejected.status_code, 503)
+        self.assertEqual(stats["rejected_timeout"], 1)
+        self.assertEqual(stats["active"], 0)
+
+    def test_release_is_idempotent(self):
+        async def scenario():
+            limiter = Limiter("chat", max_concurrency=2, max_queue=0, queue_timeout=1)
+            release = await limiter.acquire()
+            release()
+            release()
+            return limiter.stats()["active"]
+
+        self.assertEqual(asyncio.run(scenario()), 0)
+
+
+class RateLimiterTest(unittest.TestCase):
+    def test_burst_then_429_then_refill(self):
+        now = [1000.0]
+        limiter = RateLimiter(rate=2.0, burst=3)
+        with mock.patch.object(admission.time, "monotonic", side_effect=lambda: now[0]):
+            for _ in range(3):
+                limiter.check("10.0.0.1")
+            with self.assertRaises(AdmissionRejected) as caught:
+                limiter.check("10.0.0.1")
+            self.assertEqual(caught.exception.status_code, 429)
+            self.assertEqual(caught.exception.retry_after, 1)
+
+            limiter.check("10.0.0.2")   # other clients have their own bucket
+
+            now[0] += 0.5               # 2 tokens/s → one token back
+            limiter.check("10.0.0.1")
+            with self.assertRaises(AdmissionRejected):
+                limiter.check("10.0.0.1")
+
+            now[0] += 60                # refill is capped at the burst size
+            for _ in range(3):
+                limiter.check("10.0.0.1")
+            with self.assertRaises(AdmissionRejected):
+                limiter.check("10.0.0.1")
+
+        self.assertEqual(limiter.rejected, 3)
+
+    def test_retry_after_covers_the_missing_tokens(self):
+        limiter = RateLimiter(rate=0.25, burst=1)
+        with mock.patch.object(admission.time, "monotonic", return_value=50.0):
+            limiter.check("client")
+            with self.assertRaises(AdmissionRejected) as caught:
+                limiter.check("client")
+        self.assertEqual(caught.exception.retry_after, 4)
+
+    def test_disabled_limiter_never_rejects(self):
+        limiter = RateLimiter(rate=0, burst=1)
+        for _ in range(100):
+            limiter.check("client")
+        self.assertEqual(limiter.rejected, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+caches.AnswerCache: similarity threshold, (language, class) groups, TTL and invalidation.
+
+    cd backend && python -m unittest discover tests
+"""
+
+import time
+import unittest
+
+import numpy as np
+
+from caches import AnswerCache
+
+
+def _unit(*values) -> np.ndarray:
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+Q1 = _unit(1, 0, 0)
+Q1_NEAR = _unit(1, 0.05, 0)
+Q2 = _unit(0, 1, 0)
+
+
+class AnswerCacheTest(unittest.TestCase):
+    def test_near_duplicate_hits_and_distant_question_misses(self):
+        cache = AnswerCache(threshold=0.95)
+        cache.store(Q1, "English", None, "a1")
+
+        self.assertEqual(cache.lookup(Q1_NEAR, "English", None), "a1")
+        self.assertIsNone(cache.lookup(Q2, "English", None))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_language_and_class_are_separate_groups(self):
+        cache = AnswerCache()
+        cache.store(Q1, "English", None, "en")
+        cache.store(Q1, "Hindi", None, "hi")
+        cache.store(Q1, "English", 7, "en-7")
+
+        self.assertEqual(cache.lookup(Q1, " english ", None), "en")
+        self.assertEqual(cache.lookup(Q1, "Hindi", None), "hi")
+        self.assertEqual(cache.lookup(Q1, "English", 7), "en-7")
+        self.assertIsNone(cache.lookup(Q1, "English", 8))
+        self.assertIsNone(cache.lookup(Q1, "Tamil", None))
+
+    def test_entries_expire_after_ttl(self):
+        cache = AnswerCache(ttl_seconds=0.05)
+        cache.store(Q1, "English", None, "old")
+        time.sleep(0.06)
+        cache.store(Q2, "English", None, "new")
+
+        self.assertIsNone(cache.lookup(Q1, "English", None))
+        self.assertEqual(cache.lookup(Q2, "English", None), "new")
+        self.assertEqual(cache.stats()["entries"], 1)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_hit_does_not_extend_ttl(self):
+        cache = AnswerCache(ttl_seconds=0.08)
+        cache.store(Q1, "English", None, "a1")
+        time.sleep(0.05)
+        self.assertEqual(cache.lookup(Q1, "English", None), "a1")
+        time.sleep(0.05)
+        self.assertIsNone(cache.lookup(Q1, "English", None))
+
+    def test_fingerprint_change_invalidates_everything(self):
+        cache = AnswerCache()
+        cache.store(Q1, "English", None, "a1", fingerprint="v1")
+        cache.store(Q2, "English", 3, "a2", fingerprint="v1")
+        self.assertEqual(cache.lookup(Q1, "English", None, fingerprint="v1"), "a1")
+
+        self.assertIsNone(cache.lookup(Q1, "English", None, fingerprint="v2"))
+        self.assertIsNone(cache.lookup(Q2, "English", 3, fingerprint="v2"))
+        self.assertEqual(cache.invalidations, 1)
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_oldest_entry_is_evicted_over_capacity(self):
+        cache = AnswerCache(max_entries=2)
+        cache.store(Q1, "English", None, "a1")
+        cache.store(Q2, "English", None, "a2")
+        cache.store(_unit(0, 0, 1), "English", None, "a3")
+
+        self.assertIsNone(cache.lookup(Q1, "English", None))
+        self.assertEqual(cache.lookup(Q2, "English", None), "a2")
+        self.assertEqual(cache.evictions, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+"""
+Micro-batching of cnn_model.BatchScheduler, with a stub predict function (no model).
+
+    cd backend && python -m unittest discover tests
+"""
+
+import threading
+import time
+import unittest
+
+import numpy as np
+
+from cnn_model import BatchScheduler, _bucket_size
+
+
+def _pixels(value: int) -> np.ndarray:
+    return np.full((4, 4, 3), value, dtype=np.uint8)
+
+
+class RecordingModel:
+    """predict_fn that records each batch and returns one value per row (its mean)."""
+
+    def __init__(self, gate: threading.Event = None):
+        self.batches = []
+        self.gate = gate
+
+    def __call__(self, inputs):
+        self.batches.append(np.array(inputs))
+        if self.gate is not None:
+            self.gate.wait(5)
+        return inputs.reshape(len(inputs), -1).mean(axis=1, keepdims=True)
+
+
+class BucketSizeTest(unittest.TestCase):
+    def test_next_power_of_two_capped_at_max(self):
+        self.assertEqual(_bucket_size(1, 16), 1)
+        self.assertEqual(_bucket_size(3, 16), 4)
+        self.assertEqual(_bucket_size(5, 16), 8)
+        self.assertEqual(_bucket_size(9, 12), 12)
+        self.assertEqual(_bucket_size(12, 12), 12)
+
+
+class BatchSchedulerTest(unittest.TestCase):
+    def test_full_batch_flushes_before_the_deadline(self):
+        model = RecordingModel()
+        scheduler = BatchScheduler(model, max_batch_size=4, max_wait_ms=10_000)
+
+        started = time.perf_counter()
+        futures = [scheduler.submit(_pixels(i)) for i in range(4)]
+        results = [f.result(timeout=5) for f in futures]
+
+        self.assertLess(time.perf_counter() - started, 5)
+        self.assertEqual([len(b) for b in model.batches], [4])
+        for i, result in enumerate(results):
+            self.assertEqual(result.shape, (1, 1))
+            self.assertAlmostEqual(float(result[0, 0]), i / 255.0, places=5)
+
+    def test_partial_batch_flushes_after_max_wait(self):
+        model = RecordingModel()
+        scheduler = BatchScheduler(model, max_batch_size=8, max_wait_ms=20)
+
+        result = scheduler.submit(_pixels(255)).result(timeout=5)
+
+        self.assertAlmostEqual(float(result[0, 0]), 1.0, places=5)
+        self.assertEqual([len(b) for b in model.batches], [1])
+        self.assertEqual(scheduler.stats()["batch_size_histogram"], {1: 1})
+
+    def test_batch_is_zero_padded_to_a_power_of_two(self):
+        model = RecordingModel()
+        scheduler = BatchScheduler(model, max_batch_size=8, max_wait_ms=200)
+
+        futures = [scheduler.submit(_pixels(10 * (i + 1))) for i in range(3)]
+        results = [f.result(timeout=5) for f in futures]
+
+        (batch,) = model.batches
+        self.assertEqual(batch.shape, (4, 4, 4, 3))
+        self.assertFalse(batch[3].any())
+        self.assertEqual([round(float(r[0, 0]) * 255) for r in results], [10, 20, 30])
+        # Padding rows are not counted as requests
+        self.assertEqual(scheduler.stats()["requests"], 3)
+
+    def test_cancelled_future_is_skipped_and_worker_keeps_serving(self):
+        gate = threading.Event()
+        model = RecordingModel(gate)
+        scheduler = BatchScheduler(model, max_batch_size=1, max_wait_ms=0)
+
+        first = scheduler.submit(_pixels(1))
+        deadline = time.perf_counter() + 5
+        while not model.batches and time.perf_counter() < deadline:
+            time.sleep(0.005)   # worker is now blocked inside the first batch
+
+        abandoned = scheduler.submit(_pixels(2))
+        self.assertTrue(abandoned.cancel())
+        later = scheduler.submit(_pixels(3))
+        gate.set()
+
+        self.assertAlmostEqual(float(first.result(timeout=5)[0, 0]), 1 / 255.0, places=5)
+        self.assertAlmostEqual(float(later.result(timeout=5)[0, 0]), 3 / 255.0, places=5)
+        self.assertTrue(abandoned.cancelled())
+        self.assertEqual(len(model.batches), 2)
+        self.assertEqual(scheduler.stats()["errors"], 0)
+
+    def test_failed_batch_sets_exceptions_and_worker_survives(self):
+        calls = []
+
+        def flaky(inputs):
+            calls.append(len(inputs))
+            if len(calls) == 1:
+                raise RuntimeError("boom")
+            return np.zeros((len(inputs), 1), dtype=np.float32)
+
+        scheduler = BatchScheduler(flaky, max_batch_size=1, max_wait_ms=0)
+
+        with self.assertRaises(RuntimeError):
+            scheduler.submit(_pixels(1)).result(timeout=5)
+        self.assertEqual(scheduler.submit(_pixels(2)).result(timeout=5).shape, (1, 1))
+        self.assertEqual(scheduler.stats()["errors"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
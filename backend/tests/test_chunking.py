@@ -0,0 +1,93 @@
+"""
+chunking.chunk_text passage boundaries / overlap, and load_corpus document ids.
+
+    cd backend && python -m unittest discover tests
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from chunking import chunk_text, load_corpus
+
+
+def _words(n: int, start: int = 0) -> list:
+    return [f"w{i}" for i in range(start, start + n)]
+
+
+class ChunkTextTest(unittest.TestCase):
+    def test_text_that_fits_is_returned_unchanged(self):
+        text = "  Short   text.\nKept as is. "
+        self.assertEqual(chunk_text(text, max_words=10, overlap=3), [text])
+        self.assertEqual(chunk_text(" ".join(_words(10)), max_words=10), [" ".join(_words(10))])
+
+    def test_passages_respect_max_words_and_overlap(self):
+        # One long "sentence": hard-split with exactly `overlap` words repeated
+        passages = [p.split() for p in chunk_text(" ".join(_words(25)), max_words=10, overlap=3)]
+
+        self.assertTrue(all(len(p) <= 10 for p in passages))
+        self.assertEqual(passages[0], _words(10))
+        for previous, current in zip(passages, passages[1:]):
+            self.assertEqual(current[:3], previous[-3:])
+        # Every word is covered, in order, and the last passage ends the text
+        covered = passages[0] + [w for p in passages[1:] for w in p[3:]]
+        self.assertEqual(covered, _words(25))
+
+    def test_splits_on_sentence_boundaries(self):
+        sentences = [" ".join(_words(4, start)) + "." for start in (0, 4, 8, 12)]
+        passages = chunk_text(" ".join(sentences), max_words=8, overlap=0)
+        self.assertEqual(passages, [" ".join(sentences[0:2]), " ".join(sentences[2:4])])
+
+    def test_no_passage_is_only_overlap(self):
+        # 20 words end exactly on a passage: no trailing passage made only of repeated words
+        passages = [p.split() for p in chunk_text(" ".join(_words(20)), max_words=10, overlap=5)]
+        self.assertEqual(passages, [_words(10), _words(10, 5), _words(10, 10)])
+
+    def test_overlap_is_capped_at_half_a_passage(self):
+        passages = [p.split() for p in chunk_text(" ".join(_words(30)), max_words=10, overlap=50)]
+        for previous, current in zip(passages, passages[1:]):
+            self.assertEqual(current[:5], previous[-5:])
+            self.assertNotEqual(current[5:6], previous[-5:-4])
+
+    def test_prefix_on_later_passages_only(self):
+        passages = chunk_text(" ".join(_words(25)), max_words=10, overlap=0, prefix="Title:")
+        self.assertFalse(passages[0].startswith("Title:"))
+        self.assertTrue(all(p.startswith("Title: ") for p in passages[1:]))
+
+
+class LoadCorpusTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+
+    def _write(self, rel: str, content: str):
+        path = os.path.join(self.tmp, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+    def test_unique_ids_are_kept(self):
+        self._write("a.jsonl", json.dumps({"id": "blight", "text": "Late blight."}) + "\n")
+        self._write("notes/b.md", "Mildew notes.")
+        self.assertEqual([d["id"] for d in load_corpus(self.tmp)], ["blight", "notes/b.md"])
+
+    def test_duplicate_ids_are_namespaced_by_file(self):
+        self._write("a.jsonl", json.dumps({"id": "blight", "text": "From a."}) + "\n")
+        self._write("sub/b.json", json.dumps([{"id": "blight", "text": "From b."},
+                                              {"id": "rust", "text": "Rust 1."},
+                                              {"id": "rust", "text": "Rust 2."}]))
+        self._write("c.jsonl", json.dumps({"id": "blight", "text": ""}) + "\n")   # empty: dropped
+
+        documents = {d["id"]: d["text"] for d in load_corpus(self.tmp)}
+        self.assertEqual(documents, {
+            "a.jsonl#blight": "From a.",
+            "sub/b.json#blight": "From b.",
+            "sub/b.json:1#rust": "Rust 1.",
+            "sub/b.json:2#rust": "Rust 2.",
+        })
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+"""
+caches.EmbeddingCache persistence under concurrent puts (background saver thread).
+
+    cd backend && python -m unittest discover tests
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+import numpy as np
+
+from caches import EmbeddingCache
+
+
+class EmbeddingCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        self.path = os.path.join(self.tmp, "query_cache.npz")
+
+    def test_concurrent_puts_are_all_saved(self):
+        cache = EmbeddingCache(max_entries=10_000, path=self.path, encoder_name="enc", save_every=7)
+
+        def put_many(worker: int):
+            for i in range(250):
+                cache.put(f"w{worker} q{i}", np.full((1, 4), worker * 1000 + i, dtype=np.float32))
+
+        threads = [threading.Thread(target=put_many, args=(w,)) for w in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        cache.save()
+        self.assertEqual(cache._unsaved, 0)
+
+        reloaded = EmbeddingCache(max_entries=10_000, path=self.path, encoder_name="enc")
+        self.assertEqual(len(reloaded), 1000)
+        np.testing.assert_array_equal(reloaded.peek("w3 q249"), np.full((1, 4), 3249, dtype=np.float32))
+
+    def test_file_from_another_encoder_is_ignored(self):
+        cache = EmbeddingCache(path=self.path, encoder_name="enc")
+        cache.put("q", np.ones((1, 4), dtype=np.float32))
+        cache.save()
+        self.assertEqual(len(EmbeddingCache(path=self.path, encoder_name="other")), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
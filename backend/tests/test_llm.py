@@ -0,0 +1,64 @@
+"""
+Circuit breaker behaviour of llm.py, against the local fake Gemini.
+
+    cd backend && python -m unittest discover tests
+"""
+
+import asyncio
+import os
+import unittest
+
+os.environ["LLM_BACKEND"] = "fake"
+os.environ.setdefault("LLM_MAX_RETRIES", "0")
+
+import llm
+from benchmarks.fake_gemini import FakeGenerativeModel
+
+
+class HalfOpenTrialTest(unittest.TestCase):
+    def setUp(self):
+        self._saved = (llm.breaker, llm._model)
+        llm.breaker = llm.CircuitBreaker(failure_threshold=1, cooldown=0.05)
+        llm._model = FakeGenerativeModel(first_token_ms=5000, jitter=0.0)
+
+    def tearDown(self):
+        llm.breaker, llm._model = self._saved
+
+    def _open_breaker(self):
+        llm.breaker.record_failure()
+        self.assertEqual(llm.breaker.stats()["state"], "open")
+        asyncio.run(asyncio.sleep(0.06))   # past the cooldown: the next call is the trial
+
+    async def _cancel_trial(self, call):
+        task = asyncio.ensure_future(call)
+        await asyncio.sleep(0.05)
+        self.assertEqual(llm.breaker.stats()["state"], "half_open")
+        self.assertFalse(llm.breaker.allow(), "only one trial at a time")
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+
+    async def _consume(self, timeout):
+        async for _ in llm.stream("prompt", timeout=timeout):
+            pass
+
+    def test_cancelled_generate_releases_trial(self):
+        self._open_breaker()
+        asyncio.run(self._cancel_trial(llm.generate("prompt", timeout=10)))
+        self.assertEqual(llm.breaker.allow(), llm.TRIAL)
+
+    def test_cancelled_stream_releases_trial(self):
+        self._open_breaker()
+        asyncio.run(self._cancel_trial(self._consume(timeout=10)))
+        self.assertEqual(llm.breaker.allow(), llm.TRIAL)
+
+    def test_breaker_closes_after_trial_following_cancel(self):
+        self._open_breaker()
+        asyncio.run(self._cancel_trial(llm.generate("prompt", timeout=10)))
+        llm._model = FakeGenerativeModel(first_token_ms=1, jitter=0.0)
+        self.assertTrue(asyncio.run(llm.generate("prompt", timeout=5)))
+        self.assertEqual(llm.breaker.stats()["state"], "closed")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+"""
+Model server socket: owner-only permissions, authkey handshake, no start without a key.
+
+    cd backend && python -m unittest discover tests
+"""
+
+import os
+import stat
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client
+from unittest import mock
+
+import model_client
+import model_server
+from model_client import ModelServerError
+
+
+class ModelServerSocketTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.umask = os.umask(0o022)
+        os.umask(cls.umask)
+        # Not removed afterwards: the listener unlinks its socket at exit
+        cls.tmp = tempfile.mkdtemp()
+        cls.address = os.path.join(cls.tmp, "models.sock")
+        server = model_server.ModelServer(cls.address, b"test-secret", model_server.TextBatcher(None, 1, 0))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        deadline = time.time() + 5
+        while not os.path.exists(cls.address) and time.time() < deadline:
+            time.sleep(0.01)
+
+    def test_socket_is_owner_only(self):
+        self.assertEqual(stat.S_IMODE(os.stat(self.address).st_mode), 0o600)
+
+    def test_process_umask_is_restored(self):
+        current = os.umask(0o022)
+        os.umask(current)
+        self.assertEqual(current, self.umask)
+
+    def test_right_key_is_served(self):
+        conn = Client(self.address, family="AF_UNIX", authkey=b"test-secret")
+        try:
+            conn.send((1, "ping", None))
+            self.assertEqual(conn.recv(), (1, True, "pong"))
+        finally:
+            conn.close()
+
+    def test_wrong_key_is_rejected(self):
+        with self.assertRaises((AuthenticationError, EOFError, ConnectionError)):
+            Client(self.address, family="AF_UNIX", authkey=b"guess")
+
+
+class AuthkeyRequiredTest(unittest.TestCase):
+    def test_require_authkey(self):
+        with mock.patch.object(model_client, "MODEL_SERVER_AUTHKEY", b""):
+            with self.assertRaises(ModelServerError):
+                model_client.require_authkey()
+        with mock.patch.object(model_client, "MODEL_SERVER_AUTHKEY", b"set"):
+            model_client.require_authkey()
+
+    def test_server_refuses_to_start_without_a_key(self):
+        with mock.patch.object(model_client, "MODEL_SERVER_AUTHKEY", b""), \
+                mock.patch.object(sys, "argv", ["model_server.py"]), \
+                mock.patch.object(model_server.cnn_model, "load_model") as load_model:
+            with self.assertRaises(SystemExit):
+                model_server.main()
+        load_model.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
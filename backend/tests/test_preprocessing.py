@@ -0,0 +1,67 @@
+"""
+preprocessing.load_pixels: size limits map to ImageTooLargeError (413), bad bytes to InvalidImageError (400).
+
+    cd backend && python -m unittest discover tests
+"""
+
+import io
+import unittest
+import warnings
+from unittest import mock
+
+from PIL import Image
+
+import preprocessing
+from preprocessing import ImageTooLargeError, InvalidImageError, load_pixels
+
+
+def _png(width: int, height: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (40, 160, 60)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class LoadPixelsTest(unittest.TestCase):
+    def _limit(self, pixels: int):
+        return mock.patch.object(preprocessing, "MAX_IMAGE_PIXELS", pixels), mock.patch.object(
+            Image, "MAX_IMAGE_PIXELS", pixels)
+
+    def test_valid_image_is_resized(self):
+        pixels = load_pixels(_png(300, 200))
+        self.assertEqual(pixels.shape, preprocessing.IMG_SIZE[::-1] + (3,))
+        self.assertEqual(str(pixels.dtype), "uint8")
+
+    def test_more_than_twice_the_pixel_limit_is_too_large(self):
+        # PIL raises DecompressionBombError in Image.open itself
+        ours, pils = self._limit(1000)
+        with ours, pils, self.assertRaises(ImageTooLargeError):
+            load_pixels(_png(100, 100))
+
+    def test_over_the_pixel_limit_is_too_large(self):
+        ours, pils = self._limit(1000)
+        with ours, pils, warnings.catch_warnings():
+            warnings.simplefilter("ignore", Image.DecompressionBombWarning)
+            with self.assertRaises(ImageTooLargeError):
+                load_pixels(_png(40, 40))
+
+    def test_bomb_warning_as_error_is_too_large(self):
+        ours, pils = self._limit(1000)
+        with ours, pils, warnings.catch_warnings():
+            warnings.simplefilter("error", Image.DecompressionBombWarning)
+            with self.assertRaises(ImageTooLargeError):
+                load_pixels(_png(40, 40))
+
+    def test_oversized_upload_is_too_large(self):
+        with mock.patch.object(preprocessing, "MAX_UPLOAD_BYTES", 10):
+            with self.assertRaises(ImageTooLargeError):
+                load_pixels(_png(20, 20))
+
+    def test_garbage_is_invalid(self):
+        with self.assertRaises(InvalidImageError):
+            load_pixels(b"not an image at all")
+        with self.assertRaises(InvalidImageError):
+            load_pixels(_png(50, 50)[:60])   # truncated
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+"""
+prompts.build_fallback_answer: knowledge-base answer with a notice in the user's language.
+
+    cd backend && python -m unittest discover tests
+"""
+
+import unittest
+
+from models import Disease
+from prompts import DEFAULT_FALLBACK_NOTICE, FALLBACK_NOTICES, build_fallback_answer
+
+SCAB = Disease(
+    id="1", disease_name="Apple Scab", crop="Apple", description="Dark lesions.", causes="Fungus.",
+    symptoms="Spots.", solution="Remove infected leaves. Spray fungicide. Prune.", prevention="Hygiene.",
+    pesticides=[{"name": "Mancozeb", "url": "https://example.com/m"}],
+)
+
+
+class FallbackAnswerTest(unittest.TestCase):
+    def test_english_has_no_notice(self):
+        answer = build_fallback_answer(0, [SCAB], "English")
+        self.assertTrue(answer.startswith("Apple – Apple Scab."))
+        self.assertIn("Mancozeb", answer)
+        self.assertEqual(build_fallback_answer(0, [SCAB]), answer)
+
+    def test_other_languages_get_a_localized_notice_first(self):
+        english = build_fallback_answer(0, [SCAB])
+        for lang in ("Hindi", " tamil ", "MARATHI"):
+            answer = build_fallback_answer(0, [SCAB], lang)
+            notice = FALLBACK_NOTICES[lang.strip().lower()]
+            self.assertEqual(answer, f"{notice}\n\n{english}")
+
+    def test_unknown_language_gets_the_english_notice(self):
+        answer = build_fallback_answer(None, [], "Punjabi")
+        self.assertTrue(answer.startswith(DEFAULT_FALLBACK_NOTICE))
+
+    def test_every_frontend_language_has_a_notice(self):
+        for lang in ("Tamil", "Telugu", "Hindi", "Malayalam", "Kannada", "Gujarati", "Marathi"):
+            self.assertIn(lang.lower(), FALLBACK_NOTICES)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,203 @@
+"""
+record_store round trips, and versioned index publish / reload of database.AgriKnowledgeBase
+(with a small deterministic encoder in place of the sentence transformer).
+
+    cd backend && python -m unittest discover tests
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+import numpy as np
+
+from database import AgriKnowledgeBase
+from models import Disease
+from record_store import DiseaseStore, RecordOverlay, RecordStore, VectorOwners, record_json, write_records
+from vector_index import IndexConfig
+
+
+def _disease(disease_id: str, name: str, description: str = "Leaf spots.") -> dict:
+    return {
+        "id": disease_id, "disease_name": name, "crop": name.split()[0], "description": description,
+        "causes": "Fungus.", "symptoms": "Spots.", "solution": "Spray.", "prevention": "Hygiene.",
+        "pesticides": [{"name": "Mancozeb", "url": "https://example.com/mancozeb"}],
+    }
+
+
+class HashEncoder:
+    """Same text → same unit vector; different texts → unrelated vectors."""
+
+    dim = 32
+
+    def encode(self, texts):
+        rows = []
+        for text in texts:
+            seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:4], "little")
+            vector = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+            rows.append(vector / np.linalg.norm(vector))
+        return np.stack(rows)
+
+
+class RecordStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+
+    def test_write_and_reopen(self):
+        path = os.path.join(self.tmp, "passages.bin")
+        records = {"0": {"text": "first"}, "7": {"text": "ünïcode"}, "3": {"text": ""}}
+        write_records(path, records)
+
+        store = RecordStore(path)
+        self.assertEqual(list(store), ["0", "7", "3"])
+        self.assertEqual(dict(store), records)
+        self.assertEqual(store.raw("7"), record_json(records["7"]))
+        self.assertIs(store["0"], store["0"])   # memoized
+        self.assertNotIn("1", store)
+        with self.assertRaises(KeyError):
+            store["1"]
+
+        unmemoized = RecordStore(path, memoize=False)
+        self.assertIsNot(unmemoized["0"], unmemoized["0"])
+
+    def test_empty_store(self):
+        path = os.path.join(self.tmp, "empty.bin")
+        write_records(path, {})
+        self.assertEqual(len(RecordStore(path)), 0)
+
+    def test_not_a_record_file(self):
+        path = os.path.join(self.tmp, "junk.bin")
+        with open(path, "wb") as f:
+            f.write(b"not records")
+        with self.assertRaises(ValueError):
+            RecordStore(path)
+
+    def test_disease_store_and_overlay_round_trip(self):
+        path = os.path.join(self.tmp, "records.bin")
+        write_records(path, {d["id"]: Disease(**d) for d in (_disease("1", "Apple Scab"), _disease("2", "Corn Rust"))})
+        store = DiseaseStore(path)
+        self.assertIsInstance(store["1"], Disease)
+        self.assertEqual(store["2"].disease_name, "Corn Rust")
+
+        overlay = RecordOverlay(store, {"3": Disease(**_disease("3", "Tomato Leaf Mold"))}, removed=["1", "missing"])
+        self.assertEqual(list(overlay), ["2", "3"])
+        self.assertEqual(len(overlay), 2)
+        self.assertNotIn("1", overlay)
+
+        rewritten = os.path.join(self.tmp, "records2.bin")
+        write_records(rewritten, overlay)
+        reopened = DiseaseStore(rewritten)
+        self.assertEqual(list(reopened), ["2", "3"])
+        self.assertEqual(reopened.raw("2"), store.raw("2"))   # unchanged record copied byte for byte
+        self.assertEqual(reopened["3"].disease_name, "Tomato Leaf Mold")
+
+    def test_vector_owners_round_trip(self):
+        owners = VectorOwners()
+        owners.add(np.array([0, 1, 4]), ["a", "a", "b"])
+        self.assertEqual([owners.get(i) for i in range(6)], ["a", "a", None, None, "b", None])
+        self.assertEqual(owners.remove_document("a").tolist(), [0, 1])
+
+        path = os.path.join(self.tmp, "owners.npy")
+        owners.save(path)
+        loaded = VectorOwners.load(path, owners.documents)
+        self.assertEqual(loaded.ids().tolist(), [4])
+        self.assertEqual(loaded.get(4), "b")
+        self.assertEqual(len(loaded), 1)
+
+        grown = loaded.copy()   # the loaded array is a read-only mmap
+        grown.add(np.array([6]), ["c"])
+        self.assertEqual(grown.get(6), "c")
+        self.assertIsNone(loaded.get(6))
+
+
+class KnowledgeBasePublishTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        self.data_path = os.path.join(self.tmp, "knowledge_data.json")
+        self._write_data("Dark lesions.")
+
+    def _write_data(self, description: str):
+        diseases = [_disease("1", "Apple Scab", description), _disease("2", "Corn Common Rust")]
+        with open(self.data_path, "w", encoding="utf-8") as f:
+            json.dump({"diseases": diseases}, f)
+
+    def _kb(self) -> AgriKnowledgeBase:
+        kb = AgriKnowledgeBase(self.data_path, load=False)
+        kb.model = HashEncoder()
+        return kb
+
+    def test_published_index_reopens_without_embedding(self):
+        first = self._kb()
+        summary = first.reload()
+        self.assertEqual(summary["added"], 2)
+
+        second = self._kb()
+        second.model = None   # would fail if anything were re-embedded
+        self.assertEqual(second.reload()["added"], 0)
+        self.assertIsInstance(second.diseases_map, DiseaseStore)
+        self.assertEqual(second.diseases_for_class(0)[0].disease_name, "Apple Scab")
+        self.assertEqual(second.data_fingerprint(), first.data_fingerprint())
+
+    def test_meta_records_the_index_type_actually_built(self):
+        kb = self._kb()
+        kb.index_config = IndexConfig("ivfpq", pq_m=8)   # far too few vectors to train
+        kb.reload()
+        self.assertEqual(kb._state.index_type, "flat")
+        with open(os.path.join(kb._current_version_dir(), "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        self.assertEqual(meta["index_type"], "flat")
+        self.assertEqual(meta["index_params"]["index_type"], "ivfpq")
+
+        reopened = self._kb()
+        reopened.index_config = kb.index_config
+        reopened.model = None
+        self.assertEqual(reopened.reload()["added"], 0)
+        self.assertEqual(reopened._state.index_type, "flat")
+
+    def test_reload_while_reading(self):
+        kb = self._kb()
+        kb.reload()
+        old_store = kb.diseases_map
+        query = HashEncoder().encode(["anything"])
+        errors = []
+        stop = threading.Event()
+
+        def read():
+            while not stop.is_set():
+                try:
+                    diseases, _ = kb.retrieve(query, 2, 0, min_score=-1.0)
+                    assert len(diseases) == 2, diseases
+                    assert kb.diseases_for_class(0)[0].id == "1"
+                except Exception as e:   # noqa: BLE001 – reported below
+                    errors.append(e)
+                    return
+
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        for reader in readers:
+            reader.start()
+        fingerprints = {kb.data_fingerprint()}
+        for i in range(4):
+            self._write_data(f"Dark lesions, edit {i}.")
+            kb.reload()
+            fingerprints.add(kb.data_fingerprint())
+        stop.set()
+        for reader in readers:
+            reader.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(fingerprints), 5)
+        self.assertEqual(kb.diseases_for_class(0)[0].description, "Dark lesions, edit 3.")
+        # Pruned versions stay readable through mappings opened before the reload
+        self.assertEqual(old_store["1"].description, "Dark lesions.")
+        versions = [n for n in os.listdir(kb.index_path) if os.path.isdir(os.path.join(kb.index_path, n))]
+        self.assertLessEqual(len(versions), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
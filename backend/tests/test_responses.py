@@ -0,0 +1,70 @@
+"""
+responses.chat_body must produce the same bytes as dumping the equivalent pydantic model,
+with orjson and with the stdlib json fallback.
+
+    cd backend && python -m unittest discover tests
+"""
+
+import json
+import unittest
+from unittest import mock
+
+import responses
+from models import ChatResponse, DiagnoseResponse, Disease
+from record_store import disease_to_dict, record_json
+from responses import chat_body
+
+DISEASES = [
+    Disease(
+        id="1", disease_name="Apple Scab", crop="Apple", description="Dark \"scabby\" lesions.",
+        causes="Venturia inaequalis", symptoms="Olive-green spots", solution="Spray\nfungicide",
+        prevention="Hygiene", pesticides=[{"name": "Mancozeb 75% WP", "url": "https://example.com/m?a=1&b=2"}],
+    ),
+    Disease(
+        id="2", disease_name="टमाटर झुलसा", crop="Tomato", description="झुलसा रोग", causes="—",
+        symptoms="", solution="", prevention="", pesticides=[],
+    ),
+]
+PREDICTION = {"prediction": 0, "class_index": 0, "class_name": "Apple Scab", "confidence": 0.93}
+
+
+def _model_json(model) -> bytes:
+    return json.dumps(disease_to_dict(model), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class ChatBodyTest(unittest.TestCase):
+    def _check_both_encoders(self, check):
+        with self.subTest(encoder="orjson" if responses.orjson is not None else "json"):
+            check()
+        with mock.patch.object(responses, "orjson", None), self.subTest(encoder="json"):
+            check()
+
+    def test_with_fragments(self):
+        def check():
+            body = chat_body("Use \"Mancozeb\" ✓", [record_json(d) for d in DISEASES], "Hindi")
+            model = ChatResponse(response="Use \"Mancozeb\" ✓", source_diseases=DISEASES, language="Hindi")
+            self.assertEqual(body, _model_json(model))
+
+        self._check_both_encoders(check)
+
+    def test_without_fragments(self):
+        def check():
+            body = chat_body("No match.", [], "English")
+            self.assertEqual(body, _model_json(ChatResponse(response="No match.", source_diseases=[], language="English")))
+            self.assertEqual(json.loads(body)["source_diseases"], [])
+
+        self._check_both_encoders(check)
+
+    def test_diagnose_body_with_prediction(self):
+        def check():
+            for prediction in (PREDICTION, None, {"error": "Invalid image"}):
+                body = chat_body("Reply", [record_json(DISEASES[0])], "English", prediction=prediction)
+                model = DiagnoseResponse(response="Reply", source_diseases=DISEASES[:1], language="English",
+                                         prediction=prediction)
+                self.assertEqual(body, _model_json(model))
+
+        self._check_both_encoders(check)
+
+
+if __name__ == "__main__":
+    unittest.main()
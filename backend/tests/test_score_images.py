@@ -0,0 +1,59 @@
+"""
+score_images.load_done: which files --resume skips, with and without --retry-errors.
+
+    cd backend && python -m unittest discover tests
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from score_images import ResultWriter, load_done
+
+OK_ROW = {"file": "a.jpg", "class_index": 0, "label": "Apple Scab", "confidence": 0.9,
+          "top_k": [{"class_index": 0, "label": "Apple Scab", "confidence": 0.9}], "error": ""}
+FAILED_ROW = {"file": "b.jpg", "class_index": "", "label": "", "confidence": "", "top_k": [],
+              "error": "InvalidImageError: Could not read image"}
+
+
+class LoadDoneTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+
+    def _write(self, fmt: str, rows, append: bool = False) -> str:
+        path = os.path.join(self.tmp, f"scores.{fmt}")
+        writer = ResultWriter(path, fmt, append=append)
+        writer.write(rows)
+        writer.close()
+        return path
+
+    def test_failed_rows_are_retried_only_with_retry_errors(self):
+        for fmt in ("csv", "jsonl"):
+            with self.subTest(fmt=fmt):
+                path = self._write(fmt, [OK_ROW, FAILED_ROW])
+                self.assertEqual(load_done(path, fmt), {"a.jpg", "b.jpg"})
+                self.assertEqual(load_done(path, fmt, retry_errors=True), {"a.jpg"})
+
+    def test_last_row_for_a_file_wins(self):
+        for fmt in ("csv", "jsonl"):
+            with self.subTest(fmt=fmt):
+                path = self._write(fmt, [OK_ROW, FAILED_ROW])
+                self._write(fmt, [{**OK_ROW, "file": "b.jpg"}], append=True)   # retried successfully
+                self.assertEqual(load_done(path, fmt, retry_errors=True), {"a.jpg", "b.jpg"})
+
+    def test_partial_last_line_is_dropped(self):
+        path = self._write("jsonl", [OK_ROW])
+        with open(path, "a", encoding="utf-8") as f:
+            f.write('{"file": "c.jpg", "class_in')
+        self.assertEqual(load_done(path, "jsonl"), {"a.jpg"})
+        with open(path, encoding="utf-8") as f:
+            self.assertTrue(f.read().endswith("\n"))
+
+    def test_missing_output_means_nothing_done(self):
+        self.assertEqual(load_done(os.path.join(self.tmp, "none.csv"), "csv"), set())
+
+
+if __name__ == "__main__":
+    unittest.main()
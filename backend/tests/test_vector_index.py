@@ -0,0 +1,37 @@
+"""
+vector_index.create_index: configured vs actually built index type.
+
+    cd backend && python -m unittest discover tests
+"""
+
+import unittest
+
+import numpy as np
+
+from vector_index import IndexConfig, create_index, index_kind
+
+
+def _vectors(n: int, dim: int = 16) -> np.ndarray:
+    vectors = np.random.default_rng(0).standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+class CreateIndexTest(unittest.TestCase):
+    def test_ivfpq_falls_back_to_flat_on_little_data(self):
+        index, index_type = create_index(16, IndexConfig("ivfpq", pq_m=4), _vectors(20))
+        self.assertEqual(index_type, "flat")
+        self.assertEqual(index_kind(index), "flat")
+
+    def test_index_kind_matches_the_built_type(self):
+        for configured in ("flat", "hnsw"):
+            index, index_type = create_index(16, IndexConfig(configured), _vectors(20))
+            self.assertEqual(index_type, configured)
+            self.assertEqual(index_kind(index), configured)
+
+        config = IndexConfig("ivfpq", nlist=2, pq_m=4, pq_bits=4)
+        index, index_type = create_index(16, config, _vectors(1000))
+        self.assertEqual((index_type, index_kind(index)), ("ivfpq", "ivfpq"))
+
+
+if __name__ == "__main__":
+    unittest.main()
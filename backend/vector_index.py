@@ -0,0 +1,172 @@
+# backend/vector_index.py
+"""
+FAISS index construction for the knowledge base.
+
+Index types (KB_INDEX_TYPE):
+  "flat"   exact inner-product search (IndexFlatIP). Best for small corpora.
+  "ivfpq"  inverted lists + product quantisation. Needs a training step;
+           ~16-48 bytes per vector, sub-millisecond at 10^5–10^6 vectors.
+  "hnsw"   graph index over full vectors. No training, fast and accurate,
+           but more memory and no in-place deletes (rebuilt from stored vectors).
+
+Every index is addressed by our own int64 vector ids (IDMap2 / IVF ids).
+
+Config (env):
+  KB_INDEX_TYPE        flat | ivfpq | hnsw (default flat)
+  KB_IVF_NLIST         IVF lists (default: 4 * sqrt(N), clamped to [16, 65536])
+  KB_PQ_M              PQ sub-quantisers, must divide the embedding size (default 48)
+  KB_PQ_BITS           bits per PQ code (default 8)
+  KB_HNSW_M            HNSW neighbours per node (default 32)
+  KB_HNSW_EF_BUILD     HNSW efConstruction (default 200)
+  KB_NPROBE            IVF lists visited per query (default 16)
+  KB_EF_SEARCH         HNSW candidate list size per query (default 64)
+  KB_TRAIN_SIZE        max vectors sampled for training (default 100000)
+"""
+
+import math
+import os
+
+import faiss
+import numpy as np
+
+from observability import get_logger
+
+logger = get_logger("index")
+
+INDEX_TYPES = ("flat", "ivfpq", "hnsw")
+
+# k-means wants ~39 training points per centroid; PQ has 2^bits centroids per sub-quantiser
+_POINTS_PER_CENTROID = 39
+
+
+class IndexConfig:
+    def __init__(self, index_type: str = "flat", nlist: int = 0, pq_m: int = 48, pq_bits: int = 8,
+                 hnsw_m: int = 32, ef_construction: int = 200, nprobe: int = 16, ef_search: int = 64,
+                 train_size: int = 100_000):
+        index_type = index_type.lower()
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"KB_INDEX_TYPE must be one of {INDEX_TYPES}, got {index_type!r}")
+        self.index_type = index_type
+        self.nlist = nlist
+        self.pq_m = pq_m
+        self.pq_bits = pq_bits
+        self.hnsw_m = hnsw_m
+        self.ef_construction = ef_construction
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        self.train_size = train_size
+
+    @classmethod
+    def from_env(cls) -> "IndexConfig":
+        return cls(
+            index_type=os.getenv("KB_INDEX_TYPE", "flat"),
+            nlist=int(os.getenv("KB_IVF_NLIST", "0")),
+            pq_m=int(os.getenv("KB_PQ_M", "48")),
+            pq_bits=int(os.getenv("KB_PQ_BITS", "8")),
+            hnsw_m=int(os.getenv("KB_HNSW_M", "32")),
+            ef_construction=int(os.getenv("KB_HNSW_EF_BUILD", "200")),
+            nprobe=int(os.getenv("KB_NPROBE", "16")),
+            ef_search=int(os.getenv("KB_EF_SEARCH", "64")),
+            train_size=int(os.getenv("KB_TRAIN_SIZE", "100000")),
+        )
+
+    def build_params(self) -> dict:
+        """Parameters that change the stored index (a mismatch forces a rebuild)."""
+        params = {"index_type": self.index_type}
+        if self.index_type == "ivfpq":
+            params.update(nlist=self.nlist, pq_m=self.pq_m, pq_bits=self.pq_bits)
+        elif self.index_type == "hnsw":
+            params.update(hnsw_m=self.hnsw_m, ef_construction=self.ef_construction)
+        return params
+
+
+def default_nlist(n_vectors: int) -> int:
+    return int(min(65536, max(16, 4 * math.sqrt(max(1, n_vectors)))))
+
+
+def min_training_points(config: IndexConfig, n_vectors: int) -> int:
+    nlist = config.nlist or default_nlist(n_vectors)
+    return _POINTS_PER_CENTROID * max(nlist, 2 ** config.pq_bits)
+
+
+def create_index(dim: int, config: IndexConfig, vectors: np.ndarray):
+    """
+    Empty index of the configured type, trained on `vectors` if needed.
+    Returns (index, actual_type). IVF-PQ falls back to flat when there
+    is not enough data to train it.
+    """
+    index_type = config.index_type
+    if index_type == "ivfpq" and len(vectors) < min_training_points(config, len(vectors)):
+        logger.warning(
+            "%d vectors are too few to train IVF-PQ (need %d), using flat index",
+            len(vectors), min_training_points(config, len(vectors)),
+        )
+        index_type = "flat"
+
+    if index_type == "flat":
+        index = faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+
+    elif index_type == "hnsw":
+        hnsw = faiss.IndexHNSWFlat(dim, config.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        hnsw.hnsw.efConstruction = config.ef_construction
+        index = faiss.IndexIDMap2(hnsw)
+
+    else:
+        if dim % config.pq_m:
+            raise ValueError(f"KB_PQ_M={config.pq_m} must divide the embedding size {dim}")
+        nlist = config.nlist or default_nlist(len(vectors))
+        quantizer = faiss.IndexFlatIP(dim)
+        index = faiss.IndexIVFPQ(quantizer, dim, nlist, config.pq_m, config.pq_bits, faiss.METRIC_INNER_PRODUCT)
+
+        train = vectors
+        if len(train) > config.train_size:
+            rng = np.random.default_rng(0)
+            train = train[rng.choice(len(train), config.train_size, replace=False)]
+        logger.info("Training IVF-PQ (nlist=%d, m=%d) on %d vectors...", nlist, config.pq_m, len(train))
+        index.train(np.ascontiguousarray(train, dtype=np.float32))
+        # Hashtable direct map: supports both reconstruct() and remove_ids()
+        index.set_direct_map_type(faiss.DirectMap.Hashtable)
+
+    configure_search(index, config)
+    return index, index_type
+
+
+def index_kind(index) -> str:
+    """Type of a built or loaded index ("flat", "hnsw" or "ivfpq"), whatever was configured."""
+    base = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    if isinstance(base, faiss.IndexIVF):
+        return "ivfpq"
+    if isinstance(base, faiss.IndexHNSW):
+        return "hnsw"
+    return "flat"
+
+
+def configure_search(index, config: IndexConfig):
+    """Apply query-time knobs (nprobe / efSearch) to a built or loaded index."""
+    base = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    if isinstance(base, faiss.IndexIVF):
+        base.nprobe = config.nprobe
+    elif isinstance(base, faiss.IndexHNSW):
+        base.hnsw.efSearch = config.ef_search
+
+
+def remove_vectors(index, config: IndexConfig, remove_ids, keep_ids):
+    """
+    Remove vectors by id. Returns the index to use afterwards: the same index
+    if it supports deletion, else a rebuilt copy holding only `keep_ids`
+    (vectors recovered with reconstruct(), so nothing is re-embedded).
+    """
+    remove_ids = np.asarray(remove_ids, dtype="int64")
+    try:
+        index.remove_ids(remove_ids)
+        return index
+    except RuntimeError:
+        pass
+
+    keep_ids = np.asarray(sorted(keep_ids), dtype="int64")
+    vectors = np.vstack([index.reconstruct(int(i)) for i in keep_ids]) if len(keep_ids) else \
+        np.zeros((0, index.d), dtype=np.float32)
+    rebuilt, _ = create_index(index.d, config, vectors)
+    if len(keep_ids):
+        rebuilt.add_with_ids(vectors, keep_ids)
+    return rebuilt
@@ -53,12 +53,13 @@ const ChatInterface = () => {
     try {
       const result = await chatAPI.predictImage(file);
       // result from backend should be:
-      // { prediction: <int>, class_name: <str>, confidence: <float> }
+      // { prediction: <int>, class_index: <int|null>, class_name: <str>, confidence: <float> }
+      // class_index is the 38-class index (also for the legacy binary model)
 
-      const classIndex = result?.prediction;
+      const classIndex = result?.class_index ?? result?.prediction;
       const className = result?.class_name;
 
-      setCnnPrediction(classIndex || 0); // store index for backend
+      setCnnPrediction(Number.isInteger(classIndex) ? classIndex : null); // store index for backend
       setCnnLabel(className || "Disease not recognized");
 
       // Show one clean assistant message with detected disease
@@ -109,22 +110,39 @@ const ChatInterface = () => {
     try {
       const languageLabel = LANGUAGE_LABELS[language] || "English";
 
-      const res = await chatAPI.sendMessage(
+      // Placeholder assistant message, filled in token by token
+      let streamed = "";
+      let started = false;
+      const updateReply = (text) => {
+        const replaceLast = started; // capture now: the updater runs later
+        started = true;
+        setMessages((prev) => {
+          const next = [...prev];
+          if (replaceLast) {
+            next[next.length - 1] = { role: "assistant", content: text };
+          } else {
+            next.push({ role: "assistant", content: text });
+          }
+          return next;
+        });
+      };
+
+      const result = await chatAPI.streamMessage(
         userText,
         languageLabel,
-        cnnPrediction // can be null or class index
+        cnnPrediction, // can be null or class index
+        {
+          onToken: (token) => {
+            streamed += token;
+            setIsSending(false); // first token → hide "Thinking…"
+            updateReply(streamed);
+          },
+        }
       );
 
       const replyText =
-        res?.response || "Sorry, I could not generate a response.";
-
-      setMessages((prev) => [
-        ...prev,
-        {
-          role: "assistant",
-          content: replyText,
-        },
-      ]);
+        result?.response || streamed || "Sorry, I could not generate a response.";
+      updateReply(replyText);
     } catch (error) {
       console.error("Error sending message:", error);
       setMessages((prev) => [
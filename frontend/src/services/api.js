@@ -22,14 +22,14 @@ export const chatAPI = {
       throw new Error("Image prediction failed");
     }
 
-    return res.json(); // expected: { prediction: 0 or 1, ... }
+    return res.json(); // expected: { prediction, class_index: <class index>, class_name, confidence }
   },
 
   async sendMessage(message, language, cnnPrediction) {
     const payload = {
       message,
       language, // e.g. "English", "Tamil", "Hindi"
-      cnn_prediction: cnnPrediction, // null or 0/1
+      cnn_prediction: cnnPrediction, // null or class index from predictImage
     };
 
     const res = await fetch(`${BASE_URL}/chat`, {
@@ -46,4 +46,113 @@ export const chatAPI = {
 
     return res.json(); // expected: { response: "...", source_diseases: [...], language: "..." }
   },
+  // Streaming variant of sendMessage (Server-Sent Events over POST).
+  // handlers: { onSources(diseases), onToken(text), onDone(result), onError(detail) }
+  async streamMessage(message, language, cnnPrediction, handlers = {}) {
+    const payload = {
+      message,
+      language,
+      cnn_prediction: cnnPrediction,
+    };
+
+    const res = await fetch(`${BASE_URL}/chat/stream`, {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+        Accept: "text/event-stream",
+      },
+      body: JSON.stringify(payload),
+    });
+
+    if (!res.ok || !res.body) {
+      throw new Error("Chat stream failed");
+    }
+
+    return readEventStream(res, handlers); // { response: "...", language: "..." }
+  },
+
+  // Image + question in one request: CNN and retrieval run in parallel on the server.
+  // Without handlers.stream → { prediction, response, source_diseases, language }.
+  // With { stream: true, ...handlers } the answer streams like streamMessage, plus
+  // onPrediction(result) as soon as the image is classified; resolves to
+  // { prediction, response, language }.
+  async diagnose(file, message, language, handlers = {}) {
+    const formData = new FormData();
+    formData.append("file", file);
+    formData.append("message", message || "");
+    formData.append("language", language || "English");
+    formData.append("stream", handlers.stream ? "true" : "false");
+
+    const res = await fetch(`${BASE_URL}/diagnose`, {
+      method: "POST",
+      headers: handlers.stream ? { Accept: "text/event-stream" } : undefined,
+      body: formData,
+    });
+
+    if (!res.ok) {
+      throw new Error("Diagnosis failed");
+    }
+    if (!handlers.stream) {
+      return res.json();
+    }
+    if (!res.body) {
+      throw new Error("Diagnosis stream failed");
+    }
+
+    let prediction = null;
+    const result = await readEventStream(res, {
+      ...handlers,
+      onPrediction: (data) => {
+        prediction = data;
+        handlers.onPrediction?.(data);
+      },
+    });
+    return { ...result, prediction };
+  },
 };
+
+// Parse a Server-Sent Events response body and call the matching handler per event.
+// Resolves with the data of the "done" event.
+async function readEventStream(res, handlers) {
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  let result = null;
+
+  const dispatch = (rawEvent) => {
+    let event = "message";
+    const dataLines = [];
+    rawEvent.split("\n").forEach((line) => {
+      if (line.startsWith("event:")) event = line.slice(6).trim();
+      else if (line.startsWith("data:")) dataLines.push(line.slice(5).trimStart());
+    });
+    if (dataLines.length === 0) return;
+    const data = JSON.parse(dataLines.join("\n"));
+
+    if (event === "prediction") handlers.onPrediction?.(data);
+    else if (event === "sources") handlers.onSources?.(data);
+    else if (event === "token") handlers.onToken?.(data.text);
+    else if (event === "error") handlers.onError?.(data.detail);
+    else if (event === "done") {
+      result = data;
+      handlers.onDone?.(data);
+    }
+  };
+
+  // eslint-disable-next-line no-constant-condition
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary = buffer.indexOf("\n\n");
+    while (boundary !== -1) {
+      dispatch(buffer.slice(0, boundary));
+      buffer = buffer.slice(boundary + 2);
+      boundary = buffer.indexOf("\n\n");
+    }
+  }
+  if (buffer.trim()) dispatch(buffer);
+
+  return result;
+}